@@ -0,0 +1,323 @@
+"""Benchmark ollamarama's chat turns against a stub Ollama server.
+
+Starts stub_ollama.py (and stub_mcp.py for scenarios that call tools) and
+drives a headless App through the same ``send`` path as the prompt, with
+its console rendering to an off-screen terminal. For each scenario it
+measures, per turn:
+
+- latency: wall time of the whole turn, tool rounds included;
+- cpu_us_per_token: process CPU time (every thread) per streamed token;
+- frames_per_second and render_ms_per_frame: Live repaints and their cost;
+- peak_memory_kib: peak Python allocations, from a separate traced turn.
+
+Results go to a JSON file; pass an earlier one as --baseline to compare:
+
+    python benchmarks/run.py -o before.json
+    git switch my-branch
+    python benchmarks/run.py -o after.json --baseline before.json
+    python benchmarks/run.py --diff before.json after.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import gc
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from rich.console import Console  # noqa: E402
+from rich.live import Live  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+from ollamarama.app import App  # noqa: E402
+from ollamarama.config import (  # noqa: E402
+    AppConfig,
+    CompactionOptions,
+    ContextOptions,
+    HistoryOptions,
+    LogOptions,
+    ModelOptions,
+    ToolOptions,
+)
+from ollamarama.stats import percentile  # noqa: E402
+from scenarios import load  # noqa: E402
+
+PROMPT = "Explain how streamed replies are rendered, with an example."
+
+# Metric -> whether a larger value is better, for --baseline/--diff
+METRICS = {
+    "latency_p50": False,
+    "latency_p95": False,
+    "ttft_p50": False,
+    "cpu_us_per_token": False,
+    "frames_per_second": True,
+    "render_ms_per_frame": False,
+    "peak_memory_kib": False,
+}
+
+
+class Sink:
+    """An off-screen terminal: counts what the console writes and keeps none of it."""
+
+    def __init__(self) -> None:
+        self.bytes = 0
+
+    def write(self, text: str) -> int:
+        self.bytes += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return True
+
+
+class FrameCounter:
+    """Count Live repaints, from updates and from its refresh thread alike, and time them."""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._original = Live.refresh
+
+    def __enter__(self) -> "FrameCounter":
+        original = self._original
+        counter = self
+
+        def refresh(live: Live) -> None:
+            started = time.perf_counter()
+            original(live)
+            elapsed = time.perf_counter() - started
+            with counter._lock:
+                counter.frames += 1
+                counter.seconds += elapsed
+
+        Live.refresh = refresh  # type: ignore[method-assign]
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        Live.refresh = self._original  # type: ignore[method-assign]
+
+    def read(self) -> Tuple[int, float]:
+        with self._lock:
+            return self.frames, self.seconds
+
+
+def start_stub(scenarios_path: Optional[str]) -> Tuple[subprocess.Popen, str]:
+    command = [sys.executable, str(HERE / "stub_ollama.py"), "--port", "0"]
+    if scenarios_path:
+        command += ["--scenarios", scenarios_path]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    url = process.stdout.readline().strip() if process.stdout else ""
+    if not url:
+        process.kill()
+        raise RuntimeError("The stub Ollama server did not start")
+    return process, url
+
+
+def create_app(url: str, scenarios: Dict[str, Dict[str, Any]], sink: Sink, *, log: str = "") -> App:
+    names = list(scenarios)
+    mcp_servers = None
+    if any(scenario.get("tool_calls") for scenario in scenarios.values()):
+        mcp_servers = {"bench": {"command": sys.executable, "args": [str(HERE / "stub_mcp.py")]}}
+    config = AppConfig(
+        api_base=url,
+        models={name: name for name in names},
+        default_model=names[0],
+        prompt=["you are ", "."],
+        personality="",
+        options=ModelOptions(),
+        intro=False,
+        mcp_servers=mcp_servers,
+        mcp_cache=False,
+        # Every turn runs its tools, instead of the second one hitting the cache
+        tools=ToolOptions(cache={"calculate_expression": False}),
+        context=ContextOptions(max_tokens=32768),
+        # Nothing in the background between turns
+        compaction=CompactionOptions(enabled=False),
+        history=HistoryOptions(enabled=False),
+        # No log unless asked for, so runs leave ./ollamarama.log alone
+        log=LogOptions(path=log),
+    )
+    console = Console(file=sink, width=120, height=40, force_terminal=True, color_system="truecolor", highlight=False)
+    app = App(interactive=False, config=config, console=console)
+    if mcp_servers:
+        app.load_mcp_servers()
+    return app
+
+
+def run_turn(app: App, frames: FrameCounter, sink: Sink) -> Dict[str, float]:
+    app.messages.clear()
+    gc.collect()
+    frames_before, render_before = frames.read()
+    bytes_before = sink.bytes
+    cpu = time.process_time()
+    started = time.perf_counter()
+    reply = app.send(PROMPT)
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    frames_after, render_after = frames.read()
+    turn = app.stats.last_turn
+    if not reply or not turn:
+        raise RuntimeError(f"No reply from {app.model}; run with --log FILE for details")
+    tokens = sum(stats.tokens for stats in turn)
+    frame_count = frames_after - frames_before
+    return {
+        "latency": wall,
+        "ttft": turn[0].ttft or 0.0,
+        "tokens": tokens,
+        "cpu": cpu,
+        "frames": frame_count,
+        "render": render_after - render_before,
+        "output": sink.bytes - bytes_before,
+    }
+
+
+def run_scenario(app: App, name: str, frames: FrameCounter, sink: Sink, *, turns: int, warmup: int) -> Dict[str, Any]:
+    app.model = name
+    for _ in range(warmup):
+        run_turn(app, frames, sink)
+    samples = [run_turn(app, frames, sink) for _ in range(turns)]
+
+    # Tracing slows allocation down, so memory gets a turn of its own
+    tracemalloc.start()
+    try:
+        run_turn(app, frames, sink)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies = [s["latency"] for s in samples]
+    tokens = sum(s["tokens"] for s in samples)
+    frame_count = sum(s["frames"] for s in samples)
+    return {
+        "turns": turns,
+        "tokens_per_turn": tokens / turns,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "ttft_p50": percentile([s["ttft"] for s in samples], 50),
+        "cpu_us_per_token": sum(s["cpu"] for s in samples) / tokens * 1e6 if tokens else 0.0,
+        "frames_per_second": frame_count / sum(latencies),
+        "render_ms_per_frame": sum(s["render"] for s in samples) / frame_count * 1e3 if frame_count else 0.0,
+        "output_kib_per_turn": sum(s["output"] for s in samples) / turns / 1024,
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=HERE, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return commit.stdout.strip()
+
+
+def _max_rss_kib() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # Kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else float(rss)
+
+
+def compare(console: Console, baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    table = Table(title=f"{baseline.get('commit') or 'baseline'} → {current.get('commit') or 'current'}")
+    table.add_column("scenario")
+    table.add_column("metric")
+    table.add_column("before", justify="right")
+    table.add_column("after", justify="right")
+    table.add_column("change", justify="right")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before["results"].get(metric), result["results"].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            style = "dim" if abs(change) < 5 else "green" if better else "red"
+            table.add_row(name, metric, f"{old:.3f}", f"{new:.3f}", f"[{style}]{change:+.1f}%[/]")
+    console.print(table)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chat turns against a stub Ollama server")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="Results file (default benchmark.json)")
+    parser.add_argument("-n", "--turns", type=int, default=5, help="Measured turns per scenario (default 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured turns first (default 1)")
+    parser.add_argument("-s", "--scenario", action="append", help="Run only this scenario (repeatable)")
+    parser.add_argument("--scenarios", help="JSON file of scenarios to use instead of the bundled ones")
+    parser.add_argument("--log", default="", help="Write the app's log to this file (default: no log)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--diff", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two results files and exit")
+    args = parser.parse_args(argv)
+
+    console = Console(stderr=True, highlight=False)
+    if args.diff:
+        before, after = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.diff)
+        compare(console, before, after)
+        return
+
+    scenarios = load(args.scenarios)
+    if args.scenario:
+        unknown = [name for name in args.scenario if name not in scenarios]
+        if unknown:
+            parser.error(f"unknown scenario: {', '.join(unknown)}")
+        scenarios = {name: scenarios[name] for name in args.scenario}
+
+    stub, url = start_stub(args.scenarios)
+    sink = Sink()
+    app = None
+    results: Dict[str, Any] = {}
+    try:
+        app = create_app(url, scenarios, sink, log=args.log)
+        with FrameCounter() as frames:
+            for name, scenario in scenarios.items():
+                console.print(f"{name}…", end=" ")
+                result = run_scenario(app, name, frames, sink, turns=max(1, args.turns), warmup=args.warmup)
+                results[name] = {"scenario": scenario, "results": result}
+                console.print(
+                    f"{result['latency_p50'] * 1e3:.0f} ms/turn, {result['cpu_us_per_token']:.0f} µs CPU/token, "
+                    f"{result['frames_per_second']:.1f} fps, {result['peak_memory_kib']:.0f} KiB peak"
+                )
+    finally:
+        if app is not None:
+            app.shutdown()
+        stub.terminate()
+        stub.wait()
+
+    report = {
+        "commit": _git_commit(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_rss_kib": _max_rss_kib(),
+        "scenarios": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    console.print(f"Results written to {args.output}")
+    if args.baseline:
+        compare(console, json.loads(Path(args.baseline).read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
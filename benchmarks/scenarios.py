@@ -0,0 +1,121 @@
+"""Replies the stub Ollama server streams, shared by the stub and the runner.
+
+A scenario is a model name on the stub. Its reply is built from a fixed
+seed, so every run (and every version being compared) streams exactly the
+same chunks. Fields:
+
+- ``tokens``: roughly how many visible tokens the answer has (about four characters each).
+- ``chunk_tokens``: tokens per streamed chunk; Ollama sends one.
+- ``rate``: tokens per second, or 0 to stream as fast as possible.
+- ``ttft``: seconds before the first chunk, standing in for prompt evaluation.
+- ``think``: tokens of a leading ``<think>`` block the app has to hide.
+- ``code_lines``: lines of a fenced code block in the middle of the answer.
+- ``tool_calls``: calls the first round asks for, as ``{"name", "arguments"}``.
+  The stub answers with the text once the request carries tool results.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+from typing import Any, Dict, List, Optional
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    # Raw throughput: the app's cost per token with nothing throttling it
+    "prose": {"tokens": 1200},
+    # A typical local model; measures the frame rate while text trickles in
+    "paced": {"tokens": 240, "rate": 60, "ttft": 0.2},
+    # A reasoning model: a long hidden block before the answer
+    "think": {"tokens": 400, "think": 1500},
+    # Syntax highlighting of a large code block as it grows
+    "code": {"tokens": 300, "code_lines": 200},
+    # Several tokens per chunk, as from a fast remote host
+    "chunky": {"tokens": 1200, "chunk_tokens": 8},
+    # One round of two tool calls, to the stub MCP server and to a bundled tool
+    "tools": {
+        "tokens": 300,
+        "tool_calls": [
+            {"name": "lookup", "arguments": {"key": "alpha", "size": 2000}},
+            {"name": "calculate_expression", "arguments": {"expression": "(17 * 23) + 4"}},
+        ],
+    },
+}
+
+_WORDS = (
+    "the model streams tokens into a live view while markdown blocks are parsed rendered and cached so "
+    "each frame only repaints the unfinished tail of the answer which keeps long replies cheap to show"
+).split()
+_CODE = [
+    "def compute(values, scale=2):",
+    "    total = 0",
+    "    for index, value in enumerate(values):",
+    "        if value % scale == 0:",
+    "            total += value * index  # weighted",
+    "        else:",
+    '            print(f"skip {index}: {value!r}")',
+    "    return {'total': total, 'count': len(values)}",
+    "",
+]
+
+
+def load(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """The bundled scenarios, or the ones in a JSON file mapping names to fields."""
+    if not path:
+        return SCENARIOS
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _words(rng: random.Random, count: int) -> List[str]:
+    return [rng.choice(_WORDS) for _ in range(count)]
+
+
+def _prose(rng: random.Random, tokens: int) -> str:
+    """Markdown of about ``tokens`` tokens: headings, paragraphs and lists."""
+    parts: List[str] = []
+    left = tokens
+    section = 0
+    while left > 0:
+        section += 1
+        parts.append(f"## Section {section}")
+        paragraph = _words(rng, min(left, 60))
+        paragraph[0] = paragraph[0].capitalize()
+        paragraph[len(paragraph) // 2] = f"**{paragraph[len(paragraph) // 2]}**"
+        parts.append(" ".join(paragraph) + ".")
+        left -= len(paragraph) + 2
+        if left > 0:
+            items = [f"- `{word}` " + " ".join(_words(rng, 6)) for word in _words(rng, min(4, max(1, left // 8)))]
+            parts.append("\n".join(items))
+            left -= len(items) * 8
+    return "\n\n".join(parts)
+
+
+def _tokenize(text: str) -> List[str]:
+    # Roughly what a tokenizer does: words with their leading whitespace, long ones split
+    tokens: List[str] = []
+    for word in re.findall(r"\s*\S+|\s+", text):
+        while len(word) > 8:
+            tokens.append(word[:6])
+            word = word[6:]
+        tokens.append(word)
+    return tokens
+
+
+def reply(name: str, scenario: Dict[str, Any]) -> Dict[str, List[str]]:
+    """The tokens of a scenario's answer: ``{"think": [...], "content": [...]}``."""
+    rng = random.Random(name)
+    think: List[str] = []
+    if scenario.get("think"):
+        think = ["<think>"] + _tokenize(" ".join(_words(rng, int(scenario["think"])))) + ["</think>", "\n\n"]
+    text = _prose(rng, int(scenario.get("tokens", 200)))
+    code_lines = int(scenario.get("code_lines", 0))
+    if code_lines:
+        code = "\n".join(_CODE[i % len(_CODE)] for i in range(code_lines))
+        middle = text.find("\n\n", len(text) // 2)
+        middle = len(text) if middle < 0 else middle
+        text = f"{text[:middle]}\n\n```python\n{code}\n```{text[middle:]}"
+    return {"think": think, "content": _tokenize(text)}
+
+
+__all__ = ["SCENARIOS", "load", "reply"]
@@ -0,0 +1,32 @@
+"""A stdio MCP server with tools whose cost the benchmark scenarios control.
+
+    "mcp_servers": {"bench": {"command": "python", "args": ["benchmarks/stub_mcp.py"]}}
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict
+
+from fastmcp import FastMCP
+
+mcp = FastMCP("bench")
+
+
+@mcp.tool
+def lookup(key: str, size: int = 200, delay: float = 0.0) -> Dict[str, Any]:
+    """Look up a record by key. Returns about ``size`` characters after ``delay`` seconds."""
+    if delay > 0:
+        time.sleep(delay)
+    filler = (key + " ") * (max(0, size) // (len(key) + 1) + 1)
+    return {"key": key, "value": filler[:size]}
+
+
+@mcp.tool
+def echo(text: str) -> str:
+    """Return the text unchanged."""
+    return text
+
+
+if __name__ == "__main__":
+    mcp.run(show_banner=False, log_level="WARNING")
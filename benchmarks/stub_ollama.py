@@ -0,0 +1,179 @@
+"""A stand-in for Ollama's /api/chat and /api/tags that replays scenarios.
+
+Each scenario in scenarios.py is served as a model of the same name and
+streamed as Ollama would: one ndjson frame per chunk, then a done frame
+with token counts and durations. Run it on its own to point ollamarama at
+it by hand:
+
+    python benchmarks/stub_ollama.py --port 11500
+    ollamarama --api-base http://127.0.0.1:11500 --model code
+
+It prints the URL it listens on as its first line (useful with --port 0).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from scenarios import load, reply
+
+_NS = 1e9
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_frame(self, frame: Dict[str, Any]) -> None:
+        body = (json.dumps(frame) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") != "/api/tags":
+            self._send_json(404, {"error": "not found"})
+            return
+        models = [{"name": name, "model": name, "size": 0} for name in self.server.scenarios]
+        self._send_json(200, {"models": models})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self.path.rstrip("/") != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+        model = str(request.get("model") or "")
+        scenario = self.server.scenarios.get(model)
+        if scenario is None:
+            self._send_json(404, {"error": f"model '{model}' not found"})
+            return
+        messages: List[Dict[str, Any]] = request.get("messages") or []
+        started = time.perf_counter()
+        done: Dict[str, Any] = {
+            "model": model,
+            "done": True,
+            "prompt_eval_count": len(json.dumps(messages)) // 4,
+            "prompt_eval_duration": int(float(scenario.get("ttft", 0)) * _NS),
+            "load_duration": 0,
+        }
+        if not messages:
+            # A warm-up load
+            done.update(eval_count=0, eval_duration=0, total_duration=0)
+            self._send_json(200, {"message": {"role": "assistant", "content": ""}, **done})
+            return
+
+        # Ask for the tools until the request carries their results
+        wants_tools = bool(request.get("tools") and scenario.get("tool_calls"))
+        if wants_tools and messages[-1].get("role") != "tool":
+            calls = [{"function": call} for call in scenario["tool_calls"]]
+            tokens: List[str] = []
+            message: Dict[str, Any] = {"role": "assistant", "content": "", "tool_calls": calls}
+        else:
+            parts = self.server.replies[model]
+            tokens = parts["think"] + parts["content"]
+            message = {"role": "assistant", "content": ""}
+
+        if not request.get("stream", True):
+            time.sleep(float(scenario.get("ttft", 0)))
+            message["content"] = "".join(tokens)
+            elapsed = time.perf_counter() - started
+            done.update(eval_count=len(tokens), eval_duration=int(elapsed * _NS), total_duration=int(elapsed * _NS))
+            self._send_json(200, {"message": message, **done})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            self._stream(scenario, message, tokens, done, started)
+        except (BrokenPipeError, ConnectionResetError):
+            # The app stopped reading (e.g. an interrupted reply)
+            pass
+
+    def _stream(
+        self,
+        scenario: Dict[str, Any],
+        message: Dict[str, Any],
+        tokens: List[str],
+        done: Dict[str, Any],
+        started: float,
+    ) -> None:
+        time.sleep(float(scenario.get("ttft", 0)))
+        first = time.perf_counter()
+        if message.get("tool_calls"):
+            self._write_frame({"model": done["model"], "message": message, "done": False})
+        rate = float(scenario.get("rate", 0))
+        size = max(1, int(scenario.get("chunk_tokens", 1)))
+        for start in range(0, len(tokens), size):
+            if rate > 0:
+                # Keep to the schedule rather than sleeping a fixed time per chunk
+                delay = first + start / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            chunk = "".join(tokens[start : start + size])
+            message = {"role": "assistant", "content": chunk}
+            self._write_frame({"model": done["model"], "message": message, "done": False})
+        now = time.perf_counter()
+        done.update(
+            eval_count=len(tokens),
+            eval_duration=int((now - first) * _NS),
+            total_duration=int((now - started) * _NS),
+            message={"role": "assistant", "content": ""},
+        )
+        self._write_frame(done)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Any, scenarios: Dict[str, Dict[str, Any]]) -> None:
+        super().__init__(address, StubHandler)
+        self.scenarios = scenarios
+        # Built once, so building them is not part of what is measured
+        self.replies = {name: reply(name, scenario) for name, scenario in scenarios.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve benchmark scenarios as a fake Ollama")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500, help="Port to listen on (0 picks a free one)")
+    parser.add_argument("--scenarios", help="JSON file of scenarios (default: the bundled ones)")
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), load(args.scenarios))
+    host, port = server.server_address[:2]
+    print(f"http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,18 @@
-from .app import App
-from .fastmcp_client import FastMCPClient
+from typing import Any
 
 __version__ = "1.3.3"
 __all__ = ["App", "FastMCPClient"]
+
+
+def __getattr__(name: str) -> Any:
+    # Imported on first use so `import ollamarama` (and the CLI) stay fast;
+    # FastMCPClient pulls in fastmcp, which is slow to import.
+    if name == "App":
+        from .app import App
+
+        return App
+    if name == "FastMCPClient":
+        from .fastmcp_client import FastMCPClient
+
+        return FastMCPClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
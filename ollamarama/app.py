@@ -1,54 +1,100 @@
 from __future__ import annotations
 
 import copy
+import json
 import logging
 import os
-from typing import Any, Dict, List
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Tuple
 
+from rich.console import Console, Group, RenderableType
 from rich.live import Live
-from rich.markdown import Markdown
 from rich.spinner import Spinner
+from rich.text import Text
 
+from .cache import ToolResultCache
 from .client import OllamaClient
+from .compaction import Compactor, transcript
+from .context import ContextWindow, estimate_text
 from .config import AppConfig, load_config
-from .render import get_console, print_error, print_info, print_markdown, print_help
+from .paths import cache_dir, data_dir
+from .render import MarkdownStream, get_console, print_error, print_info, print_markdown, print_help
+from .think import ThinkFilter, strip_think
+from .logs import log_fields, log_message, log_turn, setup_logging
+from .metrics import Metrics
+from .startup import PROFILE
+from .stats import GenerationStats, StatsRecorder
+from .store import MATCH_END, MATCH_START, SessionStore
 from .tools import execute_tool
+from .toolrunner import ToolRunner, parse_tool_call, preview_call
 from .sessions import create_keybindings, create_session
-from .fastmcp_client import FastMCPClient
 
+if TYPE_CHECKING:
+    from prompt_toolkit import PromptSession
+
+    from .fastmcp_client import FastMCPClient
+
+
+def _json_object(text: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
 
-class App:
-    def __init__(self) -> None:
-        logging.basicConfig(
-            filename="ollamarama.log",
-            level=logging.INFO,
-            format="%(asctime)s - %(message)s",
-        )
 
-        self.console = get_console()
-        self.messages: List[Dict[str, str]] = []
+# Receives the streaming events of App.complete
+EventCallback = Callable[[Dict[str, Any]], None]
 
-        self.config: AppConfig = load_config("config.json")
-        self.client = OllamaClient(self.config.api_base)
-        
-        # Fetch models dynamically if not provided in config
+
+class App:
+    def __init__(
+        self,
+        *,
+        interactive: bool = True,
+        config: AppConfig | None = None,
+        console: Console | None = None,
+    ) -> None:
+        # Headless use (batch runs) needs no prompts and keeps no history,
+        # and its console goes to stderr so stdout stays free for results.
+        # A config and console can be passed in instead of config.json and
+        # the terminal, e.g. to drive the app from the benchmarks.
+        self.interactive = interactive
+        self.console = console or get_console(stderr=not interactive)
+
+        self.config: AppConfig = config or load_config("config.json")
+        setup_logging(self.config.log)
+        self.messages = ContextWindow(self.config.context.max_tokens)
+        PROFILE.mark("load config")
+        # Timings of every request, for /stats and the status line, and the
+        # metrics exported when config.metrics asks for them
+        self.stats = StatsRecorder()
+        self.metrics = Metrics()
+        self.status_line: bool = self.config.status_line
+        self.client = self._create_client()
+
+        self._models: Dict[str, str] = {}
+        self._models_future: Future | None = None
+        self.default_model: str = self.config.default_model
+        self.model: str = self.default_model
         if self.config.models is None:
-            self.models: Dict[str, str] = self.client.get_models()
-            # If no models fetched and no default_model set, try to use first available
-            if not self.models and not self.config.default_model:
-                print_error(self.console, "No models available from Ollama API")
-                self.models = {}
-                self.default_model = ""
-                self.model = ""
-            else:
-                # Use configured default_model or first available model
-                self.default_model: str = self.config.default_model or next(iter(self.models), "")
-                self.model: str = self.models.get(self.default_model, self.default_model)
+            # Fetch the model list from the API in the background; only
+            # /model and --model need it, or picking a model when none is set
+            self.fetch_models()
+            if not self.default_model:
+                if not self.models:
+                    print_error(self.console, "No models available from Ollama API")
+                # Use the first available model
+                self.default_model = next(iter(self.models), "")
+                self.model = self.default_model
         else:
             # Use models from config (legacy behavior)
-            self.models: Dict[str, str] = self.config.models
-            self.default_model: str = self.config.default_model
-            self.model: str = self.models.get(self.default_model, self.default_model)
+            self._models = self.config.models
+            self.model = self._models.get(self.default_model, self.default_model)
+        PROFILE.mark("create client")
 
         self.options: Dict[str, float] = self.config.options.to_dict()
         # Keep a safe copy for resets
@@ -56,69 +102,62 @@ class App:
 
         # Tool calling
         self.tools_enabled: bool = True
+        # Set by /tools; otherwise tool calling follows whether there are any tools
+        self._tools_off = False
         self.mcp_client: FastMCPClient | None = None
         self._mcp_tool_names: set[str] = set()
-        builtin_schema = self._load_tools_schema()
-        mcp_schema: List[Dict[str, Any]] = []
-        # Initialize MCP servers robustly: if one server fails, others can still load
-        if self.config.mcp_servers:
-            # Filter out empty entries
-            candidate_servers = {k: v for k, v in self.config.mcp_servers.items() if v}
-            successful_servers: dict[str, Any] = {}
-            mcp_schema: List[Dict[str, Any]] = []
-
-            # Show a spinner while initializing/loading MCP servers and tools
-            spinner = Spinner("dots", text="Loading MCP servers...", style="bold gold3")
-            with Live(spinner, console=self.console, refresh_per_second=24, transient=True) as live:
-                for name, cfg in candidate_servers.items():
-                    try:
-                        # Attempt to create a client for a single server
-                        client = FastMCPClient({name: cfg})
-                        tools = client.list_tools()
-                        # If successful, merge into overall schema and keep the server
-                        successful_servers[name] = cfg
-                        mcp_schema.extend(tools)
-                        # Register tool function names
-                        for tool in tools:
-                            fn = (tool.get("function") or {}).get("name")
-                            if isinstance(fn, str):
-                                self._mcp_tool_names.add(fn)
-                    except Exception as e:
-                        # Log the failure but continue with other servers
-                        # print_error(
-                        #     self.console,
-                        #     f"Failed to load tools from MCP server '{name}': {e}",
-                        # )
-                        pass
-                # If any servers succeeded, create a client handling all successful ones
-                if successful_servers:
-                    try:
-                        self.mcp_client = FastMCPClient(successful_servers)
-                        # Populate the consolidated client's tool->server map by listing tools once
-                        _ = self.mcp_client.list_tools()
-                    except Exception as e:
-                        # This should be rare; log and continue without MCP client
-                        print_error(
-                            self.console,
-                            f"Failed to initialize FastMCPClient with successful servers: {e}",
-                        )
-                else:
-                    # No servers could be loaded
-                    self.mcp_client = None
-        # Combine MCP and bundled schema (MCP takes precedence on name clashes)
-        combined: List[Dict[str, Any]] = list(mcp_schema)
-        for tool in builtin_schema:
-            fn = (tool.get("function") or {}).get("name")
-            if isinstance(fn, str) and fn not in self._mcp_tool_names:
-                combined.append(tool)
-        self._tools_schema = combined
+        self._builtin_schema = self._load_tools_schema()
+        self._set_tools_schema([])
         if not self._tools_schema:
             self.tools_enabled = False
+        PROFILE.mark("load tool schema")
+        self.tool_cache = ToolResultCache(
+            self._tool_cache_policies(), max_entries=self.config.tools.cache_size
+        )
+        self.tool_runner = ToolRunner(
+            self._execute_tool,
+            max_workers=self.config.tools.max_workers,
+            serial=self.config.tools.serial,
+        )
+        self._collect_metrics()
+        compaction = self.config.compaction
+        self.compactor: Compactor | None = None
+        if compaction.enabled:
+            self.compactor = Compactor(
+                self._summarize,
+                threshold=compaction.threshold,
+                keep_turns=compaction.keep_turns,
+                min_tokens=compaction.summary_tokens,
+            )
 
         self.default_personality: str = self.config.personality
         self.personality: str = self.default_personality
         self.prompt_tpl = self.config.prompt
+        self.intro: bool = self.config.intro
+        # Session id (or "last") to continue instead of starting fresh
+        self.resume: str | None = None
+
+        # Conversation history on disk; a session is created with the first
+        # user message, earlier messages (system prompt, intro) wait for it
+        self.store: SessionStore | None = None
+        self.session_id: int | None = None
+        self._unsaved: List[Dict[str, Any]] = []
+        if self.config.history.enabled and interactive:
+            path = self.config.history.path or str(data_dir() / "sessions.db")
+            try:
+                self.store = SessionStore(path)
+            except Exception as e:
+                print_error(self.console, f"Conversation history disabled: {e}")
+                logging.exception("Failed to open the session store")
+        PROFILE.mark("open session store")
+        # (model, system prompt) last sent to warm_up, to avoid repeating it
+        self._prefilled: Tuple[str, str | None] | None = None
 
+        if interactive:
+            self._create_prompt_sessions()
+        PROFILE.mark("create prompt sessions")
+
+    def _create_prompt_sessions(self) -> None:
         kb = create_keybindings()
         self.session = create_session(
             key_bindings=kb,
@@ -133,6 +172,12 @@ class App:
                 "/custom",
                 "/model",
                 "/tools",
+                "/cache",
+                "/sessions",
+                "/resume",
+                "/search",
+                "/stats",
+                "/status",
                 "/copy",
                 "/temperature",
                 "/top_p",
@@ -148,13 +193,214 @@ class App:
         )
 
         self.custom_session = create_session(key_bindings=kb, multiline=True)
+        # Completes model names, so it is created once the list is needed
+        self._kb = kb
+        self._model_session: PromptSession | None = None
+
+    def _create_client(self, api_base: Any = None, *, pool_size: int | None = None) -> OllamaClient:
+        http = self.config.http.to_dict()
+        if pool_size is not None:
+            http["pool_size"] = pool_size
+        client = OllamaClient(api_base or self.config.api_base, **http, **self.config.backends.to_dict())
+        client.on_stats = self._on_stats
+        client.on_error = self._on_request_error
+        return client
+
+    def _on_stats(self, stats: GenerationStats) -> None:
+        self.stats.record(stats)
+        self.metrics.observe_request(stats)
+
+    def _on_request_error(self, model: str, error: BaseException) -> None:
+        self.metrics.chat_errors.inc(model)
+
+    def connect(self, api_base: Any = None, *, pool_size: int | None = None) -> None:
+        """Replace the Ollama client, e.g. for another API base or a larger connection pool."""
+        client = self._create_client(api_base or self.client.api_bases, pool_size=pool_size)
+        self.client.close()
+        self.client = client
+
+    def fetch_models(self) -> None:
+        """(Re)load the model list from the API on a background thread."""
+        future: Future = Future()
+        client = self.client
+        self._models_future = future
+        threading.Thread(
+            target=lambda: future.set_result(client.get_models()), name="ollamarama-models", daemon=True
+        ).start()
+
+    @property
+    def models(self) -> Dict[str, str]:
+        """Model keys to names; waits for the background fetch if it is still running."""
+        if self._models_future is not None:
+            self._models = self._models_future.result()
+            self._models_future = None
+        return self._models
+
+    @models.setter
+    def models(self, models: Dict[str, str]) -> None:
+        self._models_future = None
+        self._models = models
+
+    @property
+    def model_session(self) -> PromptSession:
+        if self._model_session is None:
+            # Create shortened model names for autocomplete
+            shortened_model_names = [self._shorten_model_name(name) for name in self.models.keys()]
+            self._model_session = create_session(key_bindings=self._kb, words=shortened_model_names)
+        return self._model_session
+
+    def load_mcp_servers(self) -> None:
+        """Connect to the configured MCP servers and merge their tools.
+
+        Servers are loaded robustly: if one fails, the others still load.
+        """
+        if not self.config.mcp_servers or self.mcp_client is not None:
+            return
+        # fastmcp is slow to import, so it is only loaded when servers are configured
+        from .fastmcp_client import FastMCPClient
+
+        # Filter out empty entries
+        candidate_servers = {k: v for k, v in self.config.mcp_servers.items() if v}
+        client = FastMCPClient(
+            candidate_servers,
+            schema_cache=cache_dir() / "mcp_tools.json" if self.config.mcp_cache else None,
+        )
 
-        # Create shortened model names for autocomplete
-        shortened_model_names = [self._shorten_model_name(name) for name in self.models.keys()]
-        self.model_session = create_session(
-            key_bindings=kb,
-            words=shortened_model_names,
+        cached = client.cached_tools()
+        if cached is not None:
+            # Start with last run's schemas; refresh them in the background
+            self.mcp_client = client
+            self._set_tools_schema(cached)
+            client.refresh(timeout=self.config.mcp_timeout).add_done_callback(self._on_mcp_refresh)
+            return
+
+        # Show a spinner while connecting to all servers and listing their tools
+        spinner = Spinner("dots", text="Loading MCP servers...", style="bold gold3")
+        with Live(spinner, console=self.console, refresh_per_second=24, transient=True):
+            mcp_schema, failures = client.discover(timeout=self.config.mcp_timeout)
+        self._report_mcp_failures(failures, show=True)
+        for name in client.servers:
+            self.metrics.mcp_events.inc(name, "connected")
+        self._set_tools_schema(mcp_schema)
+
+        if client.servers:
+            # Keep the discovery connections open for tool calls
+            self.mcp_client = client
+        else:
+            # No servers could be loaded
+            client.close()
+
+    def _collect_metrics(self) -> None:
+        """Export state other components already keep, read at export time."""
+        metrics = self.metrics
+
+        def tool_cache(field: str) -> List[Tuple[Tuple[str, ...], float]]:
+            return [((name,), counts[field]) for name, counts in self.tool_cache.stats().items()]
+
+        def http_cache(field: str) -> List[Tuple[Tuple[str, ...], float]]:
+            from .tools.web import http_cache
+
+            return [((), getattr(http_cache(), field))]
+
+        def backends(field: str) -> List[Tuple[Tuple[str, ...], float]]:
+            return [((b.url,), float(getattr(b, field))) for b in self.client.backends.backends]
+
+        counters = (
+            ("ollamarama_tool_cache_hits", "Tool results served from the cache", ["tool"], lambda: tool_cache("hits")),
+            ("ollamarama_tool_cache_misses", "Cacheable tool calls that ran", ["tool"], lambda: tool_cache("misses")),
+            ("ollamarama_http_cache_hits", "fetch_url responses served from the cache", [], lambda: http_cache("hits")),
+            (
+                "ollamarama_http_cache_revalidated",
+                "fetch_url responses revalidated with the server",
+                [],
+                lambda: http_cache("revalidated"),
+            ),
+            ("ollamarama_http_cache_misses", "fetch_url responses downloaded", [], lambda: http_cache("misses")),
         )
+        gauges = (
+            ("ollamarama_history_messages", "Messages in the chat history", [], lambda: [((), len(self.messages))]),
+            (
+                "ollamarama_history_tokens",
+                "Estimated tokens in the chat history",
+                [],
+                lambda: [((), self.messages.total)],
+            ),
+            (
+                "ollamarama_history_budget_tokens",
+                "Token budget of the chat history",
+                [],
+                lambda: [((), self.messages.max_tokens)],
+            ),
+            ("ollamarama_backend_up", "Whether a backend is in rotation", ["backend"], lambda: backends("healthy")),
+            ("ollamarama_backend_in_flight", "Open requests per backend", ["backend"], lambda: backends("in_flight")),
+        )
+        for name, help, labels, collect in counters:
+            metrics.collect(name, help, collect, labels=labels, type="counter")
+        for name, help, labels, collect in gauges:
+            metrics.collect(name, help, collect, labels=labels)
+
+    def start_metrics(self) -> None:
+        """Start the exporters configured in config.metrics (both are off by default)."""
+        options = self.config.metrics
+        if options.port:
+            try:
+                host, port = self.metrics.serve(options.host, options.port)
+            except OSError as e:
+                print_error(self.console, f"Metrics endpoint disabled: {e}")
+            else:
+                logging.info(f"Metrics on http://{host}:{port}/metrics")
+        if options.file:
+            self.metrics.write_file(options.file, options.interval)
+
+    def _keep_alive(self, model: str | None = None) -> Any:
+        """Return the configured keep_alive for a model (None leaves Ollama's default)."""
+        keep_alive = self.config.keep_alive
+        if not isinstance(keep_alive, dict):
+            return keep_alive
+        model = model or self.model
+        if model in keep_alive:
+            return keep_alive[model]
+        # Only configured models have keys that differ from their names, so
+        # don't wait for a model list still being fetched
+        for key, name in self._models.items():
+            if name == model and key in keep_alive:
+                return keep_alive[key]
+        return keep_alive.get("default")
+
+    def warm_up(self, system: str | None = None) -> None:
+        """Load the current model in the background and prefill ``system``.
+
+        The load (and the evaluation of the system prompt into the KV cache)
+        then overlaps with MCP discovery or with the user typing, instead of
+        being paid by the first reply.
+        """
+        if not self.model or self._prefilled == (self.model, system):
+            return
+        self._prefilled = (self.model, system)
+        model = self.model
+        messages = [{"role": "system", "content": system}] if system else None
+        options = dict(self.options)
+        keep_alive = self._keep_alive(model)
+
+        def run() -> None:
+            started = time.perf_counter()
+            try:
+                data = self.client.load(
+                    model=model, messages=messages, options=options, keep_alive=keep_alive
+                )
+            except Exception as e:
+                logging.warning(f"Warm-up of {model} failed: {e}")
+                return
+            logging.info(
+                f"Warmed up {model} in {time.perf_counter() - started:.2f}s "
+                f"(load {data.get('load_duration', 0) / 1e9:.2f}s, "
+                f"prefilled {data.get('prompt_eval_count', 0)} prompt tokens)"
+            )
+
+        threading.Thread(target=run, name="ollamarama-warmup", daemon=True).start()
+
+    def _persona_prompt(self, personality: str) -> str:
+        return f"{self.prompt_tpl[0]}{personality}{self.prompt_tpl[1]}"
 
     def _shorten_model_name(self, name: str) -> str:
         """Strip hf.co prefix from model name."""
@@ -168,13 +414,173 @@ class App:
     # ---- Tool calling helpers ----
     def toggle_tools(self) -> None:
         self.tools_enabled = not self.tools_enabled
+        self._tools_off = not self.tools_enabled
         state = "enabled" if self.tools_enabled else "disabled"
         print_info(self.console, f"Tools {state}")
 
     def _execute_tool(self, name: str, arguments: Dict[str, Any]) -> str:
-        if self.mcp_client is not None and name in self._mcp_tool_names:
-            return self.mcp_client.call_tool(name, arguments)
-        return execute_tool(name, arguments)
+        self.metrics.tool_calls.inc(name)
+        return self.tool_cache.call(name, arguments, self._run_tool)
+
+    def _run_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        started = time.perf_counter()
+        try:
+            if self.mcp_client is not None and name in self._mcp_tool_names:
+                result = self.mcp_client.call_tool(name, arguments)
+            else:
+                result = execute_tool(name, arguments)
+        except Exception:
+            self.metrics.observe_tool(name, time.perf_counter() - started, error=True)
+            raise
+        # Tools report failures as a JSON object with an "error" key
+        error = '"error"' in result and "error" in _json_object(result)
+        self.metrics.observe_tool(name, time.perf_counter() - started, error=error)
+        return result
+
+    def _tool_cache_policies(self) -> Dict[str, float | None]:
+        """Collect per-tool cache TTLs.
+
+        Bundled tools declare ``"cache": {"ttl": seconds | null}`` (or ``false``) in
+        schema.json; ``tools.cache`` in config.json overrides or adds entries
+        (including MCP tools) with a TTL, null for no expiry, or false to
+        disable caching for that tool.
+        """
+        policies: Dict[str, float | None] = {}
+        for tool in self._builtin_schema:
+            fn = (tool.get("function") or {}).get("name")
+            policy = tool.get("cache")
+            if isinstance(fn, str) and isinstance(policy, dict):
+                ttl = policy.get("ttl")
+                policies[fn] = float(ttl) if ttl is not None else None
+        for fn, ttl in self.config.tools.cache.items():
+            if ttl is False:
+                policies.pop(fn, None)
+            else:
+                policies[fn] = float(ttl) if ttl is not None else None
+        return policies
+
+    def show_tool_cache(self, *, clear: bool = False) -> None:
+        if clear:
+            self.tool_cache.clear()
+            print_info(self.console, "Tool result cache cleared")
+            return
+        cache = self.tool_cache
+        total = cache.hits + cache.misses
+        rate = f"{cache.hits / total:.0%}" if total else "n/a"
+        print_info(
+            self.console,
+            f"Tool cache: {len(cache)} entries, {cache.hits} hits, {cache.misses} misses (hit rate {rate})",
+        )
+        for name, counts in sorted(cache.stats().items()):
+            self.console.print(f"  {name}: {counts['hits']} hits, {counts['misses']} misses")
+        from .tools.web import http_cache
+
+        http = http_cache().stats()
+        served = http["hits"] + http["revalidated"]
+        total = served + http["misses"]
+        rate = f"{served / total:.0%}" if total else "n/a"
+        print_info(
+            self.console,
+            f"HTTP cache: {http['entries']} pages ({http['bytes'] / 1024:.0f} KiB), {http['hits']} hits, "
+            f"{http['revalidated']} revalidated, {http['misses']} misses (hit rate {rate})",
+        )
+
+    def show_stats(self) -> None:
+        """Show the last turn's generation stats and percentiles for the session."""
+        turn = self.stats.last_turn
+        if not turn:
+            print_info(self.console, "No responses yet")
+            return
+        print_info(self.console, "Last turn:" if len(turn) == 1 else f"Last turn ({len(turn)} requests):")
+        for stats in turn:
+            ttft = "n/a" if stats.ttft is None else f"{stats.ttft:.2f}s"
+            line = (
+                f"  {stats.model}: prompt {stats.prompt_tokens} tokens ({stats.prompt_rate:.0f} tok/s), "
+                f"reply {stats.tokens} tokens ({stats.rate:.1f} tok/s), first token {ttft}, "
+                f"total {stats.latency:.2f}s"
+            )
+            if stats.load >= 0.01:
+                line += f", model load {stats.load:.2f}s"
+            if len(self.client.backends) > 1:
+                line += f" on {stats.backend}"
+            self.console.print(line, highlight=False)
+        summary = self.stats.summary()
+        print_info(
+            self.console,
+            f"Session: {summary['requests']} requests, {summary['prompt_tokens']} prompt tokens, "
+            f"{summary['tokens']} generated",
+        )
+        for label, key, unit in (
+            ("speed", "rate", " tok/s"),
+            ("first token", "ttft", "s"),
+            ("total", "latency", "s"),
+            ("between chunks", "gap", "ms"),
+        ):
+            p50, p95 = summary[key]["p50"], summary[key]["p95"]
+            if key == "gap":
+                p50, p95 = p50 * 1000, p95 * 1000
+            self.console.print(f"  {label}: p50 {p50:.2f}{unit}, p95 {p95:.2f}{unit}", highlight=False)
+
+    def toggle_status_line(self) -> None:
+        self.status_line = not self.status_line
+        print_info(self.console, f"Status line {'on' if self.status_line else 'off'}")
+
+    def _set_tools_schema(self, mcp_schema: List[Dict[str, Any]]) -> None:
+        """Combine MCP and bundled schema (MCP takes precedence on name clashes)."""
+        mcp_names: set[str] = set()
+        for tool in mcp_schema:
+            fn = (tool.get("function") or {}).get("name")
+            if isinstance(fn, str):
+                mcp_names.add(fn)
+        combined: List[Dict[str, Any]] = list(mcp_schema)
+        for tool in self._builtin_schema:
+            fn = (tool.get("function") or {}).get("name")
+            if isinstance(fn, str) and fn not in mcp_names:
+                # The cache policy is ours, not part of the tool definition
+                combined.append({k: v for k, v in tool.items() if k != "cache"})
+        self._mcp_tool_names = mcp_names
+        self._tools_schema = combined
+        # MCP tools arrive after startup, so tools may have been off for lack of a bundled schema
+        if combined and not self._tools_off:
+            self.tools_enabled = True
+        # Tool definitions are sent with every tool-aware request
+        self._tools_tokens = estimate_text(json.dumps(combined, ensure_ascii=False)) if combined else 0
+
+    def _report_mcp_failures(self, failures: Dict[str, str], *, show: bool) -> None:
+        for name, err in failures.items():
+            self.metrics.mcp_events.inc(name, "failed")
+            msg = f"Failed to load tools from MCP server '{name}': {err}"
+            if show:
+                print_error(self.console, msg)
+            logging.warning(msg)
+
+    def _on_mcp_refresh(self, future: Future) -> None:
+        """Swap in freshly listed MCP tools (runs on the MCP loop thread)."""
+        try:
+            mcp_schema, failures = future.result()
+        except Exception as e:
+            logging.warning(f"Background MCP tool refresh failed: {e}")
+            return
+        # Printing here would tear through the active prompt, so only log
+        self._report_mcp_failures(failures, show=False)
+        if self.mcp_client is not None:
+            for name in self.mcp_client.servers:
+                if name not in failures:
+                    self.metrics.mcp_events.inc(name, "refreshed")
+        previous = self._tools_schema
+        self._set_tools_schema(mcp_schema)
+        if self._tools_schema != previous:
+            logging.info("MCP tool schemas changed; using refreshed tools")
+
+    @staticmethod
+    def _tool_status_text(calls: List[Tuple[str, Dict[str, Any]]], states: List[str]) -> str:
+        if len(calls) == 1:
+            return f"Executing tool: {preview_call(*calls[0])}"
+        marks = {"queued": "·", "running": "…", "done": "✓"}
+        lines = [f"Executing {len(calls)} tools:"]
+        for call, state in zip(calls, states):
+            lines.append(f"  {marks.get(state, '·')} {preview_call(*call, limit=100)}")
+        return "\n".join(lines)
 
     def _load_tools_schema(self, path: str | None = None) -> List[Dict[str, Any]]:
         import json
@@ -215,152 +621,372 @@ class App:
     ) -> str:
         """Handle tool-calling loop with Ollama's /api/chat and local tool execution.
 
-        Repeats until the assistant returns content without further tool calls.
-        Streams the final assistant message for parity with normal replies.
+        Every round is streamed. Rounds that end with tool calls execute the
+        tools and continue; the first round without tool calls is the final
+        answer, which has already been rendered as it arrived.
         """
-        # Show spinner during blocking tool-call phase to avoid gaps before streaming
+        self.stats.begin_turn()
         spinner = Spinner("dots", text=(spinner_text or "thinking…"), style=spinner_style)
-        with Live(spinner, console=self.console, refresh_per_second=24, transient=True) as live:
-            try:
-                result = self.client.chat_with_tools(
-                    model=self.model,
-                    messages=message,
-                    options=self.options,
-                    tools=self._tools_schema,
-                    tool_choice="auto",
-                )
-            except Exception as e:
-                err = f"Failed to get tool-aware response: {e}"
-                print_error(self.console, err)
-                logging.exception(err)
-                return ""
-
-            # Tool loop
-            max_iterations = 8
-            iterations = 0
-            while iterations < max_iterations:
-                msg = result.get("message", {})
-                tool_calls = msg.get("tool_calls") or []
-                if not tool_calls:
-                    break
-                # Append assistant tool_calls message to history as-is
-                self.messages.append(msg)
-                for call in tool_calls:
-                    func = (call.get("function") or {})
-                    name = func.get("name") or ""
-                    raw_args = func.get("arguments")
-                    try:
-                        # arguments may be stringified JSON or dict
-                        if isinstance(raw_args, str):
-                            import json as _json
-
-                            args = _json.loads(raw_args) if raw_args.strip() else {}
-                        elif isinstance(raw_args, dict):
-                            args = raw_args
-                        else:
-                            args = {}
-                    except Exception:
-                        args = {}
-                    # Update spinner to show tool execution details
-                    try:
-                        import json as _json
-                        _preview = _json.dumps(args, ensure_ascii=False)
-                        if len(_preview) > 120:
-                            _preview = _preview[:117] + "..."
-                        spinner.text = f"Executing tool: {name} {_preview}"
-                    except Exception:
-                        spinner.text = f"Executing tool: {name}"
-                    try:
-                        live.update(spinner, refresh=True)
-                    except Exception:
-                        pass
-                    tool_result = self._execute_tool(name, args)
-                    # Indicate tool completion
-                    try:
-                        spinner.text = f"thinking…"
-                        live.update(spinner, refresh=True)
-                    except Exception:
-                        pass
-                    # Echo tool result back
-                    tool_msg: Dict[str, Any] = {
-                        "role": "tool",
-                        "content": str(tool_result),
-                    }
-                    # If an id is present, attach it for threading
-                    if call.get("id"):
-                        tool_msg["tool_call_id"] = call["id"]
-                    self.messages.append(tool_msg)
-
-                try:
-                    result = self.client.chat_with_tools(
-                        model=self.model,
-                        messages=self.messages,
-                        options=self.options,
-                        tools=self._tools_schema,
-                        tool_choice="auto",
+        visible = ""
+        interrupted = False
+        generated = 0
+        done: Dict[str, Any] = {}
+        max_iterations = 8
+        iteration = 0
+        try:
+            with Live(spinner, console=self.console, refresh_per_second=24) as live:
+                for iteration in range(max_iterations + 1):
+                    history = message if iteration == 0 else self.messages
+                    done.clear()
+                    if iteration < max_iterations:
+                        deltas = self.client.chat_with_tools(
+                            model=self.model,
+                            messages=history,
+                            options=self.options,
+                            tools=self._tools_schema,
+                            tool_choice="auto",
+                            on_done=done.update,
+                            keep_alive=self._keep_alive(),
+                        )
+                    else:
+                        # Tool budget exhausted: ask for a plain answer
+                        deltas = (
+                            {"content": chunk}
+                            for chunk in self.client.chat_stream(
+                                model=self.model,
+                                messages=history,
+                                options=self.options,
+                                on_done=done.update,
+                                keep_alive=self._keep_alive(),
+                            )
+                        )
+                    visible, tool_calls, interrupted, generated = self._stream_into(live, spinner, deltas)
+
+                    if interrupted or not tool_calls:
+                        break
+
+                    # Drop any preamble shown this round and go back to the spinner
+                    live.update(spinner)
+                    # Append assistant tool_calls message to history
+                    self.messages.append(
+                        {"role": "assistant", "content": visible, "tool_calls": tool_calls}
                     )
-                except Exception as e:
-                    err = f"Failed to continue after tool call: {e}"
-                    print_error(self.console, err)
-                    logging.exception(err)
-                    # Purge any tool artifacts accumulated so far to keep history clean
-                    self.messages[:] = [
-                        m
-                        for m in self.messages
-                        if not (m.get("role") == "tool" or (isinstance(m, dict) and m.get("tool_calls")))
-                    ]
-                    return ""
-                iterations += 1
-
-        # No more tool calls: now stream the final assistant content
-        streamed = self.respond_stream(
-            self.messages,
-            spinner_text=spinner_text or "thinking…",
-            spinner_style=spinner_style,
-        )
+                    calls = [parse_tool_call(call) for call in tool_calls]
+                    states = ["queued"] * len(calls)
 
-        # Purge all tool call artifacts from persistent history so only system/user/assistant remain
-        self.messages[:] = [
-            m
-            for m in self.messages
-            if not (m.get("role") == "tool" or (isinstance(m, dict) and m.get("tool_calls")))
-        ]
-
-        # Apply sliding window after purge (preserve leading system message when present)
-        if len(self.messages) > 24:
-            if self.messages and self.messages[0].get("role") == "system":
-                self.messages.pop(1)
+                    def on_status(index: int, state: str) -> None:
+                        # Called from tool threads; Live repaints on its own refresh
+                        states[index] = state
+                        spinner.text = self._tool_status_text(calls, states)
+
+                    spinner.text = self._tool_status_text(calls, states)
+                    results = self.tool_runner.run(calls, on_status)
+                    # Indicate tool completion
+                    spinner.text = f"thinking…"
+                    # Echo tool results back in call order
+                    for call, tool_result in zip(tool_calls, results):
+                        tool_msg: Dict[str, Any] = {
+                            "role": "tool",
+                            "content": str(tool_result),
+                        }
+                        # If an id is present, attach it for threading
+                        if call.get("id"):
+                            tool_msg["tool_call_id"] = call["id"]
+                        self.messages.append(tool_msg)
+        except Exception as e:
+            if iteration == 0:
+                err = f"Failed to get tool-aware response: {e}"
             else:
-                self.messages.pop(0)
+                err = f"Failed to continue after tool call: {e}"
+            print_error(self.console, err)
+            logging.exception(err)
+            # Purge any tool artifacts accumulated so far to keep history clean
+            self._purge_tool_messages()
+            return ""
 
-        return streamed
+        self._finish_stream(visible, interrupted)
+        overhead = self._tools_tokens if iteration < max_iterations else 0
+        self.messages.record(done, generated=generated, overhead=overhead)
 
-    @staticmethod
-    def _visible_after_think(text: str) -> str:
-        """Return only the content after a closing </think> tag.
-
-        - If one or more </think> tags exist (case-insensitive), return the
-          substring after the last closing tag.
-        - If a <think> appears without a closing tag, return an empty string
-          to avoid exposing hidden reasoning.
-        - If no think tags exist, return the text unchanged.
-        """
-        if not text:
-            return text
+        # Purge all tool call artifacts from persistent history so only system/user/assistant remain
+        self._purge_tool_messages()
+        self._after_turn()
 
-        lower = text.lower()
-        open_idx = lower.find("<think>")
-        close_idx = lower.rfind("</think>")
+        return visible
 
-        if close_idx != -1:
-            after = close_idx + len("</think>")
-            return text[after:].lstrip()
+    def _remember(self, message: Dict[str, Any], *, starts_session: bool = False) -> None:
+        """Queue a finished message for the session store."""
+        if self.store is None:
+            return
+        if self.session_id is None:
+            if not starts_session:
+                self._unsaved.append(message)
+                return
+            try:
+                self.session_id = self.store.create_session(self.model, str(message.get("content") or ""))
+            except Exception as e:
+                logging.warning(f"Could not save conversation: {e}")
+                return
+            for pending in self._unsaved:
+                self.store.append(self.session_id, pending)
+            self._unsaved.clear()
+        self.store.append(self.session_id, message)
+
+    def list_sessions(self) -> None:
+        if self.store is None:
+            print_error(self.console, "Conversation history is disabled")
+            return
+        sessions = self.store.list_sessions()
+        if not sessions:
+            print_info(self.console, "No saved conversations")
+            return
+        print_info(self.console, "Saved conversations (/resume <id> to continue one):")
+        for session in sessions:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated"]))
+            self.console.print(
+                f"  [bold]{session['id']:>4}[/]  {when}  {session['message_count']:>4} msgs  "
+                f"{session['title'] or '(untitled)'}",
+                markup=True,
+                highlight=False,
+            )
 
-        # If there's an opening tag but no closing tag, hide everything
-        if open_idx != -1 and close_idx == -1:
-            return ""
+    def search_history(self, query: str) -> None:
+        """Show saved messages matching ``query``, best matches first."""
+        if self.store is None:
+            print_error(self.console, "Conversation history is disabled")
+            return
+        if not query.strip():
+            print_error(self.console, "Usage: /search <words>")
+            return
+        started = time.perf_counter()
+        try:
+            hits = self.store.search(query)
+        except Exception as e:
+            print_error(self.console, f"Search failed: {e}")
+            logging.exception("Search failed")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        if not hits:
+            print_info(self.console, f"No saved messages match {query.strip()!r}")
+            return
+        print_info(self.console, f"{len(hits)} matches in {elapsed:.0f} ms (conversation:message, /resume <id> to open):")
+        for hit in hits:
+            line = Text(f"  {hit['session_id']:>4}:{hit['seq']:<4} {hit['role']:<9} ", style="dim")
+            # Matched terms come wrapped in MATCH_START/MATCH_END
+            highlight = False
+            for part in re.split(f"({MATCH_START}|{MATCH_END})", " ".join(hit["snippet"].split())):
+                if part in (MATCH_START, MATCH_END):
+                    highlight = part == MATCH_START
+                elif part:
+                    line.append(part, style="bold gold3" if highlight else "")
+            if hit.get("title"):
+                line.append(f"  ({hit['title']})", style="dim")
+            self.console.print(line)
+
+    def resume_session(self, arg: str = "") -> bool:
+        """Load a saved conversation (by id, or the latest) and continue it."""
+        if self.store is None:
+            print_error(self.console, "Conversation history is disabled")
+            return False
+        arg = arg.strip()
+        if arg in ("", "last"):
+            session_id = self.store.latest_session()
+            if session_id is None:
+                print_error(self.console, "No saved conversations")
+                return False
+        else:
+            try:
+                session_id = int(arg)
+            except ValueError:
+                print_error(self.console, "Usage: /resume <id>")
+                return False
+        session = self.store.get_session(session_id)
+        if session is None:
+            print_error(self.console, f"No conversation with id {session_id}")
+            return False
 
-        return text
+        self.messages.clear()
+        if self.compactor is not None:
+            self.compactor.cancel()
+        self.messages.extend(self.store.load_messages(session_id))
+        self._trim_history()
+        self.session_id = session_id
+        self._unsaved.clear()
+        logging.info(f"Resumed session {session_id}")
+        print_info(
+            self.console,
+            f"Resumed conversation {session_id}: {session['title'] or '(untitled)'} "
+            f"({session['message_count']} messages)",
+        )
+        for message in reversed(self.messages):
+            if message.get("role") == "assistant" and message.get("content"):
+                print_markdown(self.console, message["content"])
+                break
+        self.warm_up(self._system_prompt())
+        return True
+
+    def _after_turn(self) -> None:
+        """Trim the history and, past the threshold, start compacting it."""
+        self._trim_history()
+        if self.compactor is not None:
+            self.compactor.maybe_start(self.messages)
+
+    def _apply_compaction(self) -> None:
+        """Swap in a finished summary of old turns before the next request."""
+        if self.compactor is not None and self.compactor.apply(self.messages):
+            self.metrics.compactions.inc()
+
+    def _summarize(self, messages: List[Dict[str, Any]]) -> str:
+        """Summarize old turns (runs on the compaction thread)."""
+        options = dict(self.options)
+        options["num_predict"] = self.config.compaction.summary_tokens
+        model = self.config.compaction.model or self.model
+        text = self.client.chat(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Summarize the conversation transcript you are given so it can replace it as context. "
+                        "Keep facts, names, numbers, decisions, preferences the user stated and open questions; "
+                        "drop pleasantries. Write terse notes in the third person, with no preamble."
+                    ),
+                },
+                {"role": "user", "content": transcript(messages)},
+            ],
+            options=options,
+            keep_alive=self._keep_alive(model),
+        )
+        return strip_think(text)
+
+    def _trim_history(self) -> None:
+        # Tool definitions share the context window with the history
+        overhead = self._tools_tokens if self.tools_enabled and self._tools_schema else 0
+        dropped = self.messages.trim(overhead)
+        if dropped:
+            self.metrics.history_trimmed.inc(amount=dropped)
+            logging.info(
+                f"Dropped {dropped} old messages to fit the context budget "
+                f"({self.messages.total} + {overhead}/{self.messages.max_tokens} tokens)"
+            )
+
+    def _purge_tool_messages(self) -> None:
+        # Earlier turns were purged when they finished, so only messages after
+        # the latest user message can hold tool calls; pop keeps the counts
+        index = len(self.messages) - 1
+        while index >= 0 and self.messages[index].get("role") != "user":
+            message = self.messages[index]
+            if message.get("role") == "tool" or message.get("tool_calls"):
+                self.messages.pop(index)
+            index -= 1
+
+    def complete(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        tools: bool | None = None,
+        model: str | None = None,
+        options: Dict[str, Any] | None = None,
+        on_event: EventCallback | None = None,
+    ) -> Tuple[str, Dict[str, int]]:
+        """Run one turn without any UI and return the reply and its token usage.
+
+        Same tool loop as respond_with_tools (up to 8 tool rounds, then a
+        plain answer), but nothing is rendered and ``messages`` is left
+        untouched, so several threads can run turns at once. ``model`` and
+        ``options`` default to the app's. ``on_event`` receives the visible
+        text as it streams (``{"type": "delta", "content": ...}``) and each
+        tool call (``{"type": "tool_call", "name": ..., "arguments": ...}``).
+        Usage sums the rounds: rounds, tool_calls, prompt_eval_count and
+        eval_count. Errors propagate to the caller.
+        """
+        with log_turn():
+            started = time.perf_counter()
+            reply, usage = self._complete(messages, tools=tools, model=model, options=options, on_event=on_event)
+            log_fields(
+                "Turn completed",
+                model=model or self.model,
+                rounds=usage["rounds"],
+                tool_calls=usage["tool_calls"],
+                prompt_tokens=usage["prompt_eval_count"],
+                tokens=usage["eval_count"],
+                chars=len(reply),
+                seconds=round(time.perf_counter() - started, 3),
+            )
+            return reply, usage
+
+    def _complete(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        tools: bool | None,
+        model: str | None,
+        options: Dict[str, Any] | None,
+        on_event: EventCallback | None,
+    ) -> Tuple[str, Dict[str, int]]:
+        history = list(messages)
+        use_tools = (self.tools_enabled and bool(self._tools_schema)) if tools is None else tools
+        model = model or self.model
+        options = self.options if options is None else options
+        usage = {"rounds": 0, "tool_calls": 0, "prompt_eval_count": 0, "eval_count": 0}
+
+        def count(done: Dict[str, Any]) -> None:
+            for key in ("prompt_eval_count", "eval_count"):
+                usage[key] += int(done.get(key) or 0)
+
+        max_iterations = 8
+        for iteration in range(max_iterations + 1):
+            usage["rounds"] += 1
+            think = ThinkFilter()
+            tool_calls: List[Dict[str, Any]] = []
+            deltas: Iterable[Dict[str, Any]]
+            if use_tools and iteration < max_iterations:
+                deltas = self.client.chat_with_tools(
+                    model=model,
+                    messages=history,
+                    options=options,
+                    tools=self._tools_schema,
+                    tool_choice="auto",
+                    on_done=count,
+                    keep_alive=self._keep_alive(model),
+                )
+            else:
+                deltas = (
+                    {"content": chunk}
+                    for chunk in self.client.chat_stream(
+                        model=model,
+                        messages=history,
+                        options=options,
+                        on_done=count,
+                        keep_alive=self._keep_alive(model),
+                    )
+                )
+            for delta in deltas:
+                tool_calls.extend(delta.get("tool_calls") or [])
+                to_emit = think.feed(delta.get("content") or "")
+                if to_emit and on_event is not None:
+                    on_event({"type": "delta", "content": to_emit})
+            to_emit = think.finish()
+            if to_emit and on_event is not None:
+                on_event({"type": "delta", "content": to_emit})
+            # Opening <think> without closing: nothing was visible
+            visible = "" if think.hidden else think.text
+            if not tool_calls:
+                return visible, usage
+
+            history.append({"role": "assistant", "content": visible, "tool_calls": tool_calls})
+            usage["tool_calls"] += len(tool_calls)
+            calls = [parse_tool_call(call) for call in tool_calls]
+            if on_event is not None:
+                for name, arguments in calls:
+                    on_event({"type": "tool_call", "name": name, "arguments": arguments})
+            results = self.tool_runner.run(calls)
+            for call, tool_result in zip(tool_calls, results):
+                tool_msg: Dict[str, Any] = {"role": "tool", "content": str(tool_result)}
+                if call.get("id"):
+                    tool_msg["tool_call_id"] = call["id"]
+                history.append(tool_msg)
+        return visible, usage
 
     def set_prompt(
         self,
@@ -371,6 +997,11 @@ class App:
         spinner_style: str = "gold3",
     ) -> None:
         self.messages.clear()
+        if self.compactor is not None:
+            self.compactor.cancel()
+        # A new prompt starts a new conversation
+        self.session_id = None
+        self._unsaved.clear()
         system = None
 
         if persona:
@@ -379,19 +1010,26 @@ class App:
             else:
                 personality = persona
             if personality:
-                system = f"{self.prompt_tpl[0]}{personality}{self.prompt_tpl[1]}"
-                logging.info(f"Persona set to {system}")
+                system = self._persona_prompt(personality)
+                log_message("Persona set", system)
         elif custom:
             system = self.custom_session.prompt("System prompt: ")
             if system:
-                logging.info(f"Custom system prompt set: {system}")
+                log_message("Custom system prompt set", system)
         else:
             logging.info("Stock model settings applied")
             print_info(self.console, "Stock model settings applied")
 
         if system:
             self.messages.append({"role": "system", "content": system})
+            self._remember(self.messages[-1])
+            if not self.intro:
+                # No introduction: just get the new prompt into the KV cache
+                self.warm_up(system)
+                print_info(self.console, "Persona set" if persona else "System prompt set")
+                return
             self.messages.append({"role": "user", "content": "introduce yourself"})
+            self._remember(self.messages[-1])
 
             _ = self.respond_stream(
                 self.messages,
@@ -401,25 +1039,30 @@ class App:
             self.console.print()
 
     def respond(self, message: List[Dict[str, str]]) -> str:
+        self.stats.begin_turn()
+        done: Dict[str, Any] = {}
         try:
-            text = self.client.chat(model=self.model, messages=message, options=self.options)
+            text = self.client.chat(
+                model=self.model,
+                messages=message,
+                options=self.options,
+                on_done=done.update,
+                keep_alive=self._keep_alive(),
+            )
         except Exception as e:
             err = f"Failed to get response: {e}"
             print_error(self.console, err)
             logging.exception(err)
             return "An error occurred. Check logs."
 
-        # Hide reasoning: only expose content after </think>
-        visible = self._visible_after_think(text)
+        # Hide reasoning: only expose content after a leading <think> block
+        visible = strip_think(text)
 
         self.messages.append({"role": "assistant", "content": visible})
-        logging.info(f"Bot: {visible}")
-
-        if len(self.messages) > 24:
-            if self.messages[0]["role"] == "system":
-                self.messages.pop(1)
-            else:
-                self.messages.pop(0)
+        self._remember(self.messages[-1])
+        self._log_reply(visible)
+        self.messages.record(done, generated=len(text))
+        self._after_turn()
         return visible
 
     def respond_stream(
@@ -437,107 +1080,136 @@ class App:
         <think> appears without a closing tag, emit nothing and return an empty
         string.
         """
-        total: str = ""
-        visible_accum: str = ""
-        suppress_until_close: bool | None = None
-        emitted_upto: int = 0
-
+        self.stats.begin_turn()
+        done: Dict[str, Any] = {}
         try:
-            interrupted = False
-            # Use Rich Live to continuously update a Markdown renderable
             spinner = Spinner("dots", text=spinner_text, style=spinner_style)
-            showing_spinner = True
             with Live(
                 spinner,
                 console=self.console,
                 refresh_per_second=24,
             ) as live:
-                try:
+                deltas = (
+                    {"content": chunk}
                     for chunk in self.client.chat_stream(
-                        model=self.model, messages=message, options=self.options
-                    ):
-                        # Accumulate raw text
-                        total += chunk
-
-                        # Decide suppression on first content
-                        if suppress_until_close is None:
-                            leading = total.lstrip().lower()
-                            suppress_until_close = leading.startswith("<think>")
-
-                        if suppress_until_close:
-                            lower = total.lower()
-                            close_idx = lower.find("</think>")
-                            if close_idx != -1:
-                                # Start emitting after the first closing tag
-                                start = close_idx + len("</think>")
-                                # Emit everything after close (that hasn't been emitted)
-                                to_emit = total[start:]
-                                if to_emit:
-                                    visible_accum += to_emit
-                                    live.update(
-                                        Markdown(visible_accum, code_theme="monokai", style="gold3"),
-                                        refresh=True,
-                                    )
-                                emitted_upto = len(total)
-                                suppress_until_close = False
-                            else:
-                                # Still suppressing; keep spinner visible
-                                if not showing_spinner:
-                                    live.update(spinner, refresh=True)
-                                    showing_spinner = True
-                                continue
-                        else:
-                            # Emit any newly added text
-                            to_emit = total[emitted_upto:]
-                            if to_emit:
-                                visible_accum += to_emit
-                                if showing_spinner:
-                                    showing_spinner = False
-                                live.update(
-                                    Markdown(visible_accum, code_theme="monokai", style="gold3"),
-                                    refresh=True,
-                                )
-                                emitted_upto = len(total)
-                except KeyboardInterrupt:
-                    interrupted = True
-                    # Gracefully stop streaming on Ctrl+C
-                    pass
+                        model=self.model,
+                        messages=message,
+                        options=self.options,
+                        on_done=done.update,
+                        keep_alive=self._keep_alive(),
+                    )
+                )
+                visible, _, interrupted, generated = self._stream_into(live, spinner, deltas)
         except Exception as e:
             err = f"Failed to stream response: {e}"
             print_error(self.console, err)
             logging.exception(err)
             return ""
 
-        if 'interrupted' in locals() and interrupted:
+        self._finish_stream(visible, interrupted)
+        self.messages.record(done, generated=generated)
+        self._after_turn()
+
+        return visible
+
+    def _stream_into(
+        self,
+        live: Live,
+        spinner: Spinner,
+        deltas: Iterable[Dict[str, Any]],
+    ) -> Tuple[str, List[Dict[str, Any]], bool, int]:
+        """Render streamed message deltas into an active Live display.
+
+        Markdown is rendered incrementally through MarkdownStream, at most
+        once per frame, and a leading <think> block is filtered out by
+        ThinkFilter; if the block is not closed the visible text is empty.
+        Returns the visible text, any tool calls seen in the stream, whether
+        the user interrupted it with Ctrl+C and the number of characters
+        generated (hidden ones included).
+
+        With the status line on, the generation speed is shown under the
+        text (or next to the spinner while a think block is hidden) and
+        replaced by the request's stats once it is done.
+        """
+        tool_calls: List[Dict[str, Any]] = []
+        think = ThinkFilter()
+        stream = MarkdownStream(self.console)
+        interrupted = False
+        generated = 0
+        spinner_text = spinner.text
+        # Ollama streams about one token per chunk
+        chunks = 0
+        first = 0.0
+
+        def status() -> str:
+            elapsed = time.perf_counter() - first
+            return f"{chunks - 1} tokens · {(chunks - 1) / elapsed:.1f} tok/s" if chunks > 1 and elapsed > 0 else ""
+
+        try:
+            for delta in deltas:
+                tool_calls.extend(delta.get("tool_calls") or [])
+                content = delta.get("content") or ""
+                generated += len(content)
+                if content and self.status_line:
+                    chunks += 1
+                    if chunks == 1:
+                        first = time.perf_counter()
+                    elif not stream.text and chunks % 8 == 0:
+                        spinner.text = f"{spinner_text} {status()}"
+                to_emit = think.feed(content)
+                if to_emit:
+                    stream.feed(to_emit)
+                    if stream.due():
+                        # Live's refresh thread paints; a repaint here as well would double the frame rate
+                        live.update(self._with_status(stream.renderable(), status()))
+        except KeyboardInterrupt:
+            interrupted = True
+            # Gracefully stop streaming on Ctrl+C
+
+        spinner.text = spinner_text
+        stream.feed(think.finish())
+        # Opening <think> without closing: hide all so far
+        visible = "" if think.hidden else stream.text
+        if visible:
+            # Frames are throttled; the complete answer is painted next, at the latest when Live stops
+            turn = self.stats.last_turn
+            final = turn[-1].summary() if turn and not interrupted else status()
+            live.update(self._with_status(stream.final(), final))
+        return visible, tool_calls, interrupted, generated
+
+    def _with_status(self, renderable: RenderableType, status: str) -> RenderableType:
+        if not self.status_line or not status:
+            return renderable
+        return Group(renderable, Text(status, style="dim"))
+
+    def _finish_stream(self, visible: str, interrupted: bool) -> None:
+        """Report an interruption and persist the streamed assistant reply."""
+        if interrupted:
             logging.info("Streaming interrupted by user (Ctrl+C)")
             # Add a newline so the next prompt doesn't collide with the live area
             self.console.print()
             # Subtle status to indicate stop
             self.console.print("[stopped]", style="italic dim")
 
-        # Finalize visible text respecting think rules
-        if suppress_until_close:
-            # Opening <think> without closing: hide all so far
-            visible = ""
-        else:
-            visible = visible_accum
-
         # Persist assistant message to history when non-empty or not an interruption-only think block
-        if not ('interrupted' in locals() and interrupted and not visible.strip()):
+        if not (interrupted and not visible.strip()):
             self.messages.append({"role": "assistant", "content": visible})
-            logging.info(f"Bot: {visible}")
-
-        if len(self.messages) > 24:
-            if self.messages[0]["role"] == "system":
-                self.messages.pop(1)
-            else:
-                self.messages.pop(0)
-
-        return visible
+            self._remember(self.messages[-1])
+            self._log_reply(visible)
+
+    def _log_reply(self, text: str) -> None:
+        fields: Dict[str, Any] = {"model": self.model}
+        turn = self.stats.last_turn
+        if turn:
+            fields["tokens"] = sum(stats.tokens for stats in turn)
+            fields["rate"] = round(turn[-1].rate, 1)
+            if turn[0].ttft is not None:
+                fields["ttft"] = round(turn[0].ttft, 3)
+        log_message("Bot", text, **fields)
 
     def reset(self) -> None:
         logging.info("Bot reset")
-        self.model = self.models.get(self.default_model, self.default_model)
+        self.model = self._models.get(self.default_model, self.default_model)
         self.options = copy.deepcopy(self.defaults)
 
         # Use set_prompt to handle spinner/rendering; avoid nested Live spinners
@@ -572,10 +1244,17 @@ class App:
             self.model = self.models[full_model_name]
             print_info(self.console, f"Model set to {self.model}")
             logging.info(f"Model changed to {self.model}")
+            self.warm_up(self._system_prompt())
         elif model in self.models:
             self.model = self.models[model]
             print_info(self.console, f"Model set to {self.model}")
             logging.info(f"Model changed to {self.model}")
+            self.warm_up(self._system_prompt())
+
+    def _system_prompt(self) -> str | None:
+        if self.messages and self.messages[0].get("role") == "system":
+            return self.messages[0].get("content")
+        return None
 
     def change_option(self, option: str) -> None:
         ranges = {"temperature": (0, 1), "top_p": (0, 1), "repeat_penalty": (0, 2)}
@@ -621,12 +1300,53 @@ class App:
                 "Copy failed. Install pyperclip: pip install pyperclip",
             )
 
+    def shutdown(self) -> None:
+        """Release tool threads, MCP server sessions and HTTP connections."""
+        self.metrics.close()
+        self.tool_runner.shutdown()
+        if self.compactor is not None:
+            self.compactor.shutdown()
+        if self.store is not None:
+            self.store.close()
+        if self.mcp_client is not None:
+            self.mcp_client.close()
+        self.client.close()
+
+    def send(self, message: str) -> str:
+        """Answer one user message in the conversation, as typed at the prompt."""
+        with log_turn():
+            self._apply_compaction()
+            self.messages.append({"role": "user", "content": message})
+            self._remember(self.messages[-1], starts_session=True)
+            log_message("User", message, model=self.model)
+            self._trim_history()
+            if self.tools_enabled and self._tools_schema:
+                return self.respond_with_tools(self.messages)
+            return self.respond_stream(self.messages)
+
+    def quit(self) -> None:
+        self.shutdown()
+        exit()
+
     def start(self) -> None:
-        self.reset()
+        # Load the model while MCP servers start, then set up the conversation
+        resumed = self.resume is not None and self.resume_session(self.resume)
+        if not resumed:
+            self.warm_up(self._persona_prompt(self.personality) if self.personality else None)
+        PROFILE.mark("resume conversation" if resumed else "start model warm-up")
+        self.load_mcp_servers()
+        PROFILE.mark("load MCP servers")
+        self.start_metrics()
+        if not resumed:
+            self.reset()
+            PROFILE.mark("intro" if self.intro else "set system prompt")
+        if PROFILE.enabled:
+            print_info(self.console, "Startup profile:")
+            self.console.print(PROFILE.report(), highlight=False)
 
         commands = {
-            "/quit": lambda: exit(),
-            "/exit": lambda: exit(),
+            "/quit": lambda: self.quit(),
+            "/exit": lambda: self.quit(),
             "/help": lambda: self.help_menu(),
             "/reset": lambda: self.reset(),
             "/stock": lambda: self.set_prompt(),
@@ -640,18 +1360,26 @@ class App:
             "/top_p": lambda: self.change_option("top_p"),
             "/repeat_penalty": lambda: self.change_option("repeat_penalty"),
             "/tools": lambda: self.toggle_tools(),
+            "/cache": lambda: self.show_tool_cache(),
+            "/cache clear": lambda: self.show_tool_cache(clear=True),
+            "/sessions": lambda: self.list_sessions(),
+            "/stats": lambda: self.show_stats(),
+            "/status": lambda: self.toggle_status_line(),
+        }
+        # Commands that take an argument: "/resume 12"
+        arg_commands = {
+            "/resume": self.resume_session,
+            "/search": self.search_history,
         }
 
         while True:
             message = self.session.prompt("> ")
+            name, _, arg = (message or "").partition(" ")
             if message in commands:
                 commands[message]()
+            elif name in arg_commands:
+                arg_commands[name](arg)
             elif message is not None:
-                self.messages.append({"role": "user", "content": message})
-                logging.info(f"User: {message}")
-                if self.tools_enabled and self._tools_schema:
-                    _ = self.respond_with_tools(self.messages)
-                else:
-                    _ = self.respond_stream(self.messages)
+                _ = self.send(message)
                 # Ensure newline after streaming output and keep markdown print for consistency if desired
                 # print_markdown(self.console, response)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+POLICIES = ("round_robin", "least_in_flight", "model_affinity")
+
+# Fetches a backend's installed model names (its /api/tags); raises if the backend is unreachable
+ListModels = Callable[["Backend"], List[str]]
+
+
+def _model_key(name: str) -> str:
+    # "qwen3" and "qwen3:latest" are the same model
+    return name if ":" in name else name + ":latest"
+
+
+class Backend:
+    """One Ollama host and what the pool knows about it."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        # Installed models as listed by /api/tags, and the same names normalized for lookups
+        self.names: List[str] = []
+        self.models: Set[str] = set()
+        self.down_until = 0.0
+        self.failures = 0
+        self.last_error = ""
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def has_model(self, model: str) -> bool:
+        return _model_key(model) in self.models
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "models": len(self.models),
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class BackendPool:
+    """Pick which Ollama host serves each request.
+
+    ``candidates(model)`` orders the backends for one request: healthy
+    ones by ``policy``, then the ones marked down as a last resort, so a
+    caller can fail over down the list. Policies:
+
+    - ``round_robin``: rotate through the backends.
+    - ``least_in_flight``: the backend with the fewest open requests.
+    - ``model_affinity``: backends that have the model installed (from
+      their /api/tags) before the rest, each group by fewest open requests;
+      ties go to the backend that served the model last, whose copy is
+      most likely still loaded.
+
+    A failed request takes its backend out of rotation for ``cooldown``
+    seconds. With more than one backend, a daemon thread probes each one's
+    /api/tags every ``health_interval`` seconds, which brings recovered
+    hosts back and keeps the model lists current.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        list_models: ListModels,
+        *,
+        policy: str = "round_robin",
+        health_interval: float = 30.0,
+        cooldown: float = 15.0,
+    ) -> None:
+        if not urls:
+            raise ValueError("At least one API base is required")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backend policy {policy!r}; expected one of {', '.join(POLICIES)}")
+        self.backends = [Backend(url) for url in urls]
+        self.policy = policy
+        self.health_interval = health_interval
+        self.cooldown = cooldown
+        self._list_models = list_models
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        # Model -> the backend that last answered for it
+        self._served: Dict[str, Backend] = {}
+        self._stop = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+        if len(self.backends) > 1 and health_interval > 0:
+            self._prober = threading.Thread(target=self._probe_loop, name="ollamarama-health", daemon=True)
+            self._prober.start()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    # ---- selection ----
+    def candidates(self, model: str | None = None) -> List[Backend]:
+        """Backends to try for one request, best first."""
+        if len(self.backends) == 1:
+            return list(self.backends)
+        with self._lock:
+            healthy = [b for b in self.backends if b.healthy]
+            down = sorted((b for b in self.backends if not b.healthy), key=lambda b: b.down_until)
+            if self.policy == "round_robin":
+                start = next(self._turn) % len(healthy) if healthy else 0
+                ordered = healthy[start:] + healthy[:start]
+            elif self.policy == "least_in_flight" or not model:
+                ordered = sorted(healthy, key=lambda b: b.in_flight)
+            else:
+                last = self._served.get(_model_key(model))
+                ordered = sorted(
+                    healthy,
+                    key=lambda b: (not b.has_model(model), b.in_flight, b is not last),
+                )
+        return ordered + down
+
+    def begin(self, backend: Backend) -> None:
+        with self._lock:
+            backend.in_flight += 1
+
+    def end(self, backend: Backend) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+
+    def succeeded(self, backend: Backend, model: str | None = None) -> None:
+        with self._lock:
+            backend.failures = 0
+            backend.down_until = 0.0
+            if model:
+                self._served[_model_key(model)] = backend
+                backend.models.add(_model_key(model))
+
+    def failed(self, backend: Backend, error: Any) -> None:
+        """Take a backend out of rotation for the cooldown."""
+        with self._lock:
+            backend.failures += 1
+            backend.last_error = str(error)
+            backend.down_until = time.monotonic() + self.cooldown
+        if len(self.backends) > 1:
+            logging.warning(f"Ollama backend {backend.url} failed, trying others for {self.cooldown:.0f}s: {error}")
+
+    def lacks_model(self, backend: Backend, model: str) -> None:
+        with self._lock:
+            backend.models.discard(_model_key(model))
+
+    # ---- health ----
+    def probe(self, backend: Backend) -> bool:
+        """Refresh one backend's model list; marks it down if it does not answer."""
+        try:
+            models = self._list_models(backend)
+        except Exception as e:
+            self.failed(backend, e)
+            return False
+        with self._lock:
+            backend.names = list(models)
+            backend.models = {_model_key(name) for name in models}
+            if backend.down_until:
+                logging.info(f"Ollama backend {backend.url} is back")
+            backend.down_until = 0.0
+            backend.failures = 0
+        return True
+
+    def probe_all(self) -> None:
+        """Probe every backend at once and wait for the answers."""
+        if len(self.backends) == 1:
+            self.probe(self.backends[0])
+            return
+        with ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="ollamarama-probe") as pool:
+            list(pool.map(self.probe, self.backends))
+
+    def models(self) -> List[str]:
+        """Model names installed on any healthy backend, in /api/tags order, first backend first."""
+        seen: Dict[str, None] = {}
+        with self._lock:
+            for backend in self.backends:
+                if backend.healthy:
+                    seen.update(dict.fromkeys(backend.names))
+        return list(seen)
+
+    def _probe_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.probe_all()
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+__all__ = ["Backend", "BackendPool", "POLICIES"]
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .cli import add_common_arguments, apply_overrides, grow_pool
+
+if TYPE_CHECKING:
+    from .app import App
+
+# (position among the jobs run, id, input record)
+Job = Tuple[int, Any, Dict[str, Any]]
+
+
+def read_jobs(stream: IO[str]) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Yield (id, record) for each non-empty input line.
+
+    A line is a JSON object with "prompt" (or a full "messages" list) and
+    optionally "id" and "system"; a JSON string or plain text is a prompt.
+    Records without an id get their line number.
+    """
+    for lineno, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line
+        if isinstance(record, str):
+            record = {"prompt": record}
+        if not isinstance(record, dict):
+            record = {"error": f"line {lineno}: expected an object or a string"}
+        yield record.get("id", lineno), record
+
+
+def _key(job_id: Any) -> str:
+    return json.dumps(job_id, sort_keys=True)
+
+
+def finished_ids(path: str) -> Set[str]:
+    """Ids already answered in a previous output file (failed ones are retried)."""
+    done: Set[str] = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interrupted run
+                    continue
+                if isinstance(record, dict) and "id" in record and "error" not in record:
+                    done.add(_key(record["id"]))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def drop_partial_line(path: str) -> None:
+    """Cut off a last line that an interrupted run left without its newline."""
+    try:
+        with open(path, "rb+") as f:
+            end = f.seek(0, 2)
+            position = end
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position < end:
+                f.truncate(position)
+    except FileNotFoundError:
+        pass
+
+
+def record_messages(app: App, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build the chat messages for a record: its "messages", or its prompt after the system prompt."""
+    if isinstance(record.get("messages"), list):
+        return record["messages"]
+    prompt = record.get("prompt")
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise ValueError('record needs a "prompt" string or a "messages" list')
+    system = record.get("system")
+    if system is None and app.personality:
+        system = app._persona_prompt(app.personality)
+    messages: List[Dict[str, Any]] = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def run_job(app: App, job_id: Any, record: Dict[str, Any], *, tools: bool) -> Dict[str, Any]:
+    """Answer one input record; errors are returned in the output record."""
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"id": job_id}
+    try:
+        if "error" in record:
+            raise ValueError(record["error"])
+        response, usage = app.complete(record_messages(app, record), tools=tools)
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+    result.update(
+        response=response,
+        model=app.model,
+        prompt_tokens=usage["prompt_eval_count"],
+        tokens=usage["eval_count"],
+        tool_calls=usage["tool_calls"],
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return result
+
+
+class BatchRunner:
+    """Run jobs on ``concurrency`` threads and write one JSON line per result.
+
+    At most ``concurrency`` requests are in flight and only a bounded
+    window of jobs is read ahead, so input of any size streams through.
+    With ``ordered`` results are written in input order (finished results
+    wait for slower ones before them); otherwise as they complete. Every
+    line is flushed right away, so an interrupted run can be resumed.
+    """
+
+    def __init__(
+        self,
+        app: App,
+        out: IO[str],
+        *,
+        concurrency: int = 4,
+        ordered: bool = True,
+        tools: bool = True,
+    ) -> None:
+        self.app = app
+        self.out = out
+        self.concurrency = max(1, int(concurrency))
+        self.ordered = ordered
+        self.tools = tools
+        self.completed = 0
+        self.failed = 0
+        self.tokens = 0
+
+    def _write(self, result: Dict[str, Any]) -> None:
+        self.out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.out.flush()
+        self.completed += 1
+        if "error" in result:
+            self.failed += 1
+        self.tokens += int(result.get("tokens") or 0)
+
+    def run(self, jobs: Iterator[Job]) -> None:
+        window = self.concurrency * 2
+        pending: Dict[Future, int] = {}
+        finished: Dict[int, Dict[str, Any]] = {}
+        next_index = 0
+
+        def collect(block: bool) -> None:
+            nonlocal next_index
+            if not pending:
+                return
+            done, _ = wait(list(pending), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                if self.ordered:
+                    finished[index] = future.result()
+                else:
+                    self._write(future.result())
+            while next_index in finished:
+                self._write(finished.pop(next_index))
+                next_index += 1
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ollamarama-batch")
+        try:
+            for index, job_id, record in jobs:
+                # Results held back for ordering count against the window too
+                while len(pending) + len(finished) >= window:
+                    collect(block=True)
+                pending[pool.submit(run_job, self.app, job_id, record, tools=self.tools)] = index
+                collect(block=False)
+            while pending:
+                collect(block=True)
+        finally:
+            # Jobs still queued (after an interrupt) are dropped; cancel_futures needs Python 3.9
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="ollamarama batch",
+        description=(
+            "Answer a file of prompts without the interactive UI. Each input line is a JSON object with "
+            '"prompt" (or "messages"), optional "id" and "system", or just the prompt text. Each output line '
+            'is a JSON object with the id and the "response", token counts and timing, or an "error".'
+        ),
+    )
+    parser.add_argument("input", nargs="?", default="-", help="Input JSONL file (default: stdin)")
+    parser.add_argument("-o", "--output", help="Output JSONL file (default: stdout)")
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=4, help="Requests in flight at once (default 4)"
+    )
+    parser.add_argument(
+        "--as-completed",
+        dest="ordered",
+        action="store_false",
+        help="Write results as they finish instead of in input order",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip ids already answered in the output file and append the rest",
+    )
+    parser.add_argument("--no-tools", dest="tools", action="store_false", help="Disable tool calling")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+
+    from .app import App
+
+    app = App(interactive=False)
+    if not apply_overrides(app, args):
+        sys.exit(2)
+    grow_pool(app, args.concurrency)
+    app.start_metrics()
+    if args.tools:
+        app.load_mcp_servers()
+
+    skip: Set[str] = set()
+    if args.resume:
+        skip = finished_ids(args.output)
+        # Appending to a cut-off line would garble the first new result
+        drop_partial_line(args.output)
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    skipped = 0
+
+    def jobs() -> Iterator[Job]:
+        nonlocal skipped
+        index = 0
+        for job_id, record in read_jobs(source):
+            if _key(job_id) in skip:
+                skipped += 1
+                continue
+            yield index, job_id, record
+            index += 1
+
+    runner = BatchRunner(app, out, concurrency=args.concurrency, ordered=args.ordered, tools=args.tools)
+    started = time.perf_counter()
+    interrupted = False
+    try:
+        runner.run(jobs())
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        elapsed = time.perf_counter() - started
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        app.shutdown()
+
+    rate = runner.completed / elapsed if elapsed else 0.0
+    token_rate = runner.tokens / elapsed if elapsed else 0.0
+    summary = (
+        f"{runner.completed} prompts in {elapsed:.1f}s ({rate:.2f}/s, {token_rate:.0f} tokens/s generated), "
+        f"{runner.failed} failed"
+    )
+    if skipped:
+        summary += f", {skipped} already done"
+    if interrupted:
+        summary = "Interrupted: " + summary + " (rerun with --resume to continue)"
+    app.console.print(summary, style="yellow" if interrupted or runner.failed else "green")
+    if interrupted:
+        sys.exit(130)
+    if runner.failed:
+        sys.exit(1)
+
+
+__all__ = ["BatchRunner", "drop_partial_line", "finished_ids", "main", "read_jobs", "record_messages", "run_job"]
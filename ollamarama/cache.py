@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from .paths import write_json_atomic
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with an optional expiry per entry.
+
+    ``ttl=None`` means the entry never expires; it is only evicted when the
+    cache is full and it is the least recently used entry.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry  # type: ignore[misc]
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ToolResultCache:
+    """Cache tool results keyed on tool name plus canonical JSON arguments.
+
+    ``policies`` maps tool names to a TTL in seconds, or to None to cache
+    without expiry (pure tools). Tools without a policy are never cached,
+    and results that carry an "error" key are not stored.
+    """
+
+    def __init__(self, policies: Dict[str, Optional[float]], max_entries: int = 256) -> None:
+        self.policies = dict(policies)
+        self._cache = TTLCache(max_entries)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> str:
+        args = json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return f"{name}\x00{args}"
+
+    def _count(self, name: str, field: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(name, {"hits": 0, "misses": 0})
+            counts[field] += 1
+
+    def call(self, name: str, arguments: Dict[str, Any], func: Callable[[str, Dict[str, Any]], str]) -> str:
+        if name not in self.policies:
+            return func(name, arguments)
+        key = self.key(name, arguments)
+        cached = self._cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            self._count(name, "hits")
+            return cached
+        self._count(name, "misses")
+        result = func(name, arguments)
+        if not _is_error(result):
+            self._cache.set(key, result, self.policies[name])
+        return result
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._stats.items()}
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+# Response headers kept with a cached body
+_KEPT_HEADERS = ("content-type", "content-length", "content-encoding", "etag", "last-modified")
+# Cap for heuristic freshness of responses that only carry Last-Modified
+_HEURISTIC_MAX = 24 * 3600.0
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _lower(headers: Mapping[str, str]) -> Dict[str, str]:
+    return {k.lower(): v for k, v in headers.items()}
+
+
+def freshness(headers: Mapping[str, str], now: float) -> Tuple[bool, float, bool]:
+    """Return (storable, fresh_for_seconds, must_revalidate) for response headers.
+
+    Follows Cache-Control (no-store, no-cache, max-age), then Expires, then
+    the usual 10%-of-age heuristic for responses with only Last-Modified.
+    """
+    headers = _lower(headers)
+    cc = _parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in cc or headers.get("vary", "").strip() == "*":
+        return False, 0.0, False
+    no_cache = "no-cache" in cc
+    if "max-age" in cc:
+        try:
+            return True, max(0.0, float(cc["max-age"] or 0)), no_cache
+        except ValueError:
+            return True, 0.0, no_cache
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        date = _http_date(headers.get("date")) or now
+        return True, max(0.0, expires - date), no_cache
+    modified = _http_date(headers.get("last-modified"))
+    if modified is not None:
+        return True, min(_HEURISTIC_MAX, max(0.0, (now - modified) * 0.1)), no_cache
+    return True, 0.0, no_cache
+
+
+class HttpCache:
+    """Size-bounded on-disk HTTP response cache with conditional revalidation.
+
+    Each URL is stored as ``<sha256>.json`` (status, selected headers and
+    freshness) next to ``<sha256>.body``. Bodies may be partial when the
+    caller capped the read; ``complete`` and ``size`` record that. When the
+    directory grows past ``max_bytes`` the least recently used entries
+    (by body mtime, bumped on every hit) are evicted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes: Optional[Dict[str, int]] = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json", self.directory / f"{digest}.body"
+
+    def _index(self) -> Dict[str, int]:
+        # Body sizes by digest; built from the directory on first use
+        if self._sizes is None:
+            self._sizes = {}
+            try:
+                for body in self.directory.glob("*.body"):
+                    self._sizes[body.stem] = body.stat().st_size
+            except OSError:
+                pass
+        return self._sizes
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry (metadata plus "body") for ``url``, if any."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with meta_path.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["body"] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any], now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        if entry.get("no_cache"):
+            return False
+        return now < entry.get("stored", 0) + entry.get("ttl", 0)
+
+    @staticmethod
+    def validators(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = entry.get("headers") or {}
+        conditional: Dict[str, str] = {}
+        if headers.get("etag"):
+            conditional["If-None-Match"] = headers["etag"]
+        if headers.get("last-modified"):
+            conditional["If-Modified-Since"] = headers["last-modified"]
+        return conditional
+
+    def hit(self, url: str, *, revalidated: bool = False) -> None:
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+        try:
+            os.utime(self._paths(url)[1])
+        except OSError:
+            pass
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def store(
+        self,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+        *,
+        complete: bool,
+        size: Optional[int] = None,
+    ) -> bool:
+        """Store a response if its headers allow it; returns True when stored."""
+        now = time.time()
+        storable, ttl, no_cache = freshness(headers, now)
+        lowered = _lower(headers)
+        kept = {name: lowered[name] for name in _KEPT_HEADERS if lowered.get(name)}
+        if not storable or (ttl <= 0 and not ("etag" in kept or "last-modified" in kept)):
+            return False
+        entry = {
+            "url": url,
+            "status": status,
+            "headers": kept,
+            "stored": now,
+            "ttl": ttl,
+            "no_cache": no_cache,
+            "complete": complete,
+            "size": size,
+        }
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp = body_path.with_suffix(".tmp")
+                tmp.write_bytes(body)
+                os.replace(tmp, body_path)
+                write_json_atomic(meta_path, entry)
+            except OSError:
+                return False
+            self._index()[body_path.stem] = len(body)
+            self._evict()
+        return True
+
+    def refresh(self, url: str, entry: Dict[str, Any], headers: Mapping[str, str]) -> None:
+        """Update freshness after a 304 Not Modified."""
+        lowered = _lower(headers)
+        merged = dict(entry.get("headers") or {})
+        for name in ("etag", "last-modified"):
+            if lowered.get(name):
+                merged[name] = lowered[name]
+        fresh_headers = dict(lowered)
+        fresh_headers.setdefault("last-modified", merged.get("last-modified", ""))
+        _, ttl, no_cache = freshness(fresh_headers, time.time())
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        meta.update(headers=merged, stored=time.time(), ttl=ttl, no_cache=no_cache)
+        with self._lock:
+            try:
+                write_json_atomic(self._paths(url)[0], meta)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        sizes = self._index()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        aged: List[Tuple[float, str]] = []
+        for digest in sizes:
+            try:
+                aged.append(((self.directory / f"{digest}.body").stat().st_mtime, digest))
+            except OSError:
+                aged.append((0.0, digest))
+        for _, digest in sorted(aged):
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(digest)
+            for suffix in (".json", ".body"):
+                try:
+                    (self.directory / f"{digest}{suffix}").unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            sizes = self._index()
+            return {
+                "entries": len(sizes),
+                "bytes": sum(sizes.values()),
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+
+def _is_error(result: str) -> bool:
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return True
+    return isinstance(data, dict) and "error" in data
+
+
+__all__ = ["HttpCache", "TTLCache", "ToolResultCache", "freshness"]
@@ -2,18 +2,17 @@ from __future__ import annotations
 
 import argparse
 import copy
-from typing import Optional
+import sys
+from typing import TYPE_CHECKING, List, Optional
 
-from .app import App
-from .client import OllamaClient
+from .startup import PROFILE
 
+if TYPE_CHECKING:
+    from .app import App
 
-def main() -> None:
-    parser = argparse.ArgumentParser(
-        prog="ollamarama",
-        description="Terminal chatbot for interacting with local LLMs via Ollama. Supports customization of model, persona, and response parameters to tailor the chat experience.",
-    )
 
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    """Persona, model, API and sampling flags shared by chat and batch mode."""
     persona_group = parser.add_mutually_exclusive_group()
     persona_group.add_argument(
         "-p",
@@ -44,7 +43,7 @@ def main() -> None:
         "-b",
         "--api-base",
         type=str,
-        help="Override Ollama API base URL",
+        help="Override Ollama API base URL (comma-separate several to balance across them)",
     )
     parser.add_argument(
         "-t",
@@ -66,15 +65,34 @@ def main() -> None:
         type=float,
         help="Repeat penalty (0-2)",
     )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve OpenMetrics at http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Write a JSON metrics snapshot to this file periodically",
+    )
 
-    args = parser.parse_args()
 
-    app = App()
+def apply_overrides(app: App, args: argparse.Namespace) -> bool:
+    """Apply the flags from add_common_arguments; returns False for an unknown model."""
+    known_model = True
 
     # API base override
     if args.api_base:
         app.console.print(f"Using API base: {args.api_base}", style="green")
-        app.client = OllamaClient(args.api_base)
+        app.connect(args.api_base)
+        if app.config.models is None:
+            # The list fetched at start-up came from the configured server
+            app.fetch_models()
+
+    if args.metrics_port is not None:
+        app.config.metrics.port = args.metrics_port
+    if args.metrics_file:
+        app.config.metrics.file = args.metrics_file
 
     # Options overrides
     updated_options = False
@@ -112,6 +130,7 @@ def main() -> None:
                     app.console.print(
                         f"[red]Unknown model[/]: {args.model}. Available: {', '.join(sorted(app.models))}"
                     )
+                    known_model = False
 
     # Persona/stock
     if args.stock:
@@ -120,6 +139,82 @@ def main() -> None:
         app.personality = args.persona
     elif args.custom:
         app.personality = args.custom
+    return known_model
+
+
+def grow_pool(app: App, size: int) -> None:
+    """Make sure the client keeps at least ``size`` connections open (one per request in flight)."""
+    if app.config.http.pool_size < size:
+        app.connect(pool_size=size)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "batch":
+        from .batch import main as batch_main
+
+        batch_main(argv[1:])
+        return
+    if argv and argv[0] == "serve":
+        from .server import main as serve_main
+
+        serve_main(argv[1:])
+        return
+
+    PROFILE.reset()
+    parser = argparse.ArgumentParser(
+        prog="ollamarama",
+        description="Terminal chatbot for interacting with local LLMs via Ollama. Supports customization of model, persona, and response parameters to tailor the chat experience.",
+        epilog=(
+            "Run 'ollamarama batch --help' to process a file of prompts non-interactively, "
+            "or 'ollamarama serve --help' to serve chat over HTTP."
+        ),
+    )
+    add_common_arguments(parser)
+
+    parser.add_argument(
+        "--no-intro",
+        dest="intro",
+        action="store_false",
+        default=None,
+        help="Skip the model's self-introduction when a persona is set",
+    )
+
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="last",
+        metavar="ID",
+        help="Continue a saved conversation (the most recent one when no id is given)",
+    )
+    parser.add_argument(
+        "--status-line",
+        action="store_true",
+        default=None,
+        help="Show tokens/s live under each response",
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report how long each start-up phase took",
+    )
+
+    args = parser.parse_args(argv)
+    PROFILE.enabled = args.startup_profile
+    PROFILE.mark("parse arguments")
+
+    # Imported here so --startup-profile can time it
+    from .app import App
+
+    PROFILE.mark("import app")
+    app = App()
+    apply_overrides(app, args)
+
+    if args.intro is not None:
+        app.intro = args.intro
+    if args.status_line:
+        app.status_line = True
+    if args.resume is not None:
+        app.resume = args.resume
 
-    
     app.start()
@@ -1,13 +1,152 @@
 from __future__ import annotations
 
+import json
+import time
+
 import requests
-from typing import Any, Dict, List, Iterator, Optional
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, Dict, List, Iterator, Optional, Sequence, Tuple, Union
+
+from .backends import Backend, BackendPool
+from .stats import GenerationStats
+
+Timeout = Union[float, Tuple[float, float]]
+# Receives the final response object (token counts and timings)
+DoneCallback = Callable[[Dict[str, Any]], None]
+# Receives the stats of every chat request the client makes
+StatsCallback = Callable[[GenerationStats], None]
+# Receives the model and the error of every chat request that fails
+ErrorCallback = Callable[[str, BaseException], None]
+# Ollama keep_alive: a duration string ("30m"), seconds, -1 to stay loaded or 0 to unload
+KeepAlive = Union[str, int, float]
+
+
+# Probing a backend should not wait as long as a generation may
+_PROBE_TIMEOUT = 10.0
+
+
+def split_api_base(api_base: Union[str, Sequence[str]]) -> List[str]:
+    """Return the backend URLs from a URL, a comma-separated list of URLs or a list."""
+    parts = api_base.split(",") if isinstance(api_base, str) else list(api_base)
+    return [str(part).strip().rstrip("/") for part in parts if str(part).strip()]
 
 
 class OllamaClient:
-    def __init__(self, api_base: str) -> None:
-        self.api_base = api_base.rstrip("/")
-        self.api_url = self.api_base + "/api/chat"
+    """Pooled HTTP client for one or more Ollama hosts.
+
+    With several API bases every request goes through a BackendPool: it is
+    sent to the host the selection ``policy`` picks, and if that host
+    cannot be reached, errors or lacks the model before a response starts,
+    the request is retried on the next one. Once a reply is streaming it is
+    never retried, so no text is duplicated.
+    """
+
+    def __init__(
+        self,
+        api_base: Union[str, Sequence[str]],
+        *,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 360.0,
+        policy: str = "round_robin",
+        health_interval: float = 30.0,
+        cooldown: float = 15.0,
+    ) -> None:
+        self.api_bases = split_api_base(api_base)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.backends = BackendPool(
+            self.api_bases,
+            self._list_models,
+            policy=policy,
+            health_interval=health_interval,
+            cooldown=cooldown,
+        )
+        # The first host, for messages and single-host callers
+        self.api_base = self.backends.backends[0].url
+        self.on_stats: Optional[StatsCallback] = None
+        self.on_error: Optional[ErrorCallback] = None
+
+        # One pooled session per client so every turn and tool-loop round trip
+        # reuses an open connection (and TLS session) instead of reconnecting.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(pool_size, len(self.api_bases)), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Timeout:
+        """Return a (connect, read) timeout pair.
+
+        A bare number overrides only the read timeout; the connect timeout
+        always comes from the client configuration unless a tuple is given.
+        """
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, tuple):
+            return timeout
+        return (self.connect_timeout, float(timeout))
+
+    def _report(self, done: Dict[str, Any], payload: Dict[str, Any], backend: Backend, **measured: Any) -> None:
+        if self.on_stats is None:
+            return
+        stats = GenerationStats.from_done(done, backend=backend.url, **measured)
+        stats.model = stats.model or str(payload.get("model") or "")
+        self.on_stats(stats)
+
+    def _failed(self, payload: Dict[str, Any], error: BaseException) -> None:
+        if self.on_error is not None:
+            self.on_error(str(payload.get("model") or ""), error)
+
+    def close(self) -> None:
+        self.backends.close()
+        self.session.close()
+
+    def _post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: Optional[Timeout],
+        *,
+        stream: bool = False,
+    ) -> Tuple[requests.Response, Backend]:
+        """POST to the best backend, failing over to the others until one answers.
+
+        Returns the response with its backend counted as busy; callers call
+        ``self.backends.end(backend)`` once they have read the response.
+        Connection errors, timeouts and 5xx statuses mark a backend down; a
+        404 means the host lacks the model, the last backend's included.
+        Only the last backend's error is raised or its response returned.
+        """
+        model = payload.get("model")
+        candidates = self.backends.candidates(model)
+        for i, backend in enumerate(candidates):
+            last = i == len(candidates) - 1
+            self.backends.begin(backend)
+            try:
+                response = self.session.post(
+                    backend.url + path, json=payload, timeout=self._timeout(timeout), stream=stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.backends.end(backend)
+                self.backends.failed(backend, e)
+                if last:
+                    raise
+                continue
+            if response.status_code >= 500 or response.status_code == 404:
+                if response.status_code == 404 and model:
+                    self.backends.lacks_model(backend, model)
+                else:
+                    self.backends.failed(backend, f"HTTP {response.status_code}")
+                if not last:
+                    self.backends.end(backend)
+                    response.close()
+                    continue
+            if response.ok:
+                self.backends.succeeded(backend, model)
+            return response, backend
+        raise RuntimeError("No Ollama backend available")
 
     def chat(
         self,
@@ -16,9 +155,11 @@ class OllamaClient:
         messages: List[Dict[str, Any]],
         options: Dict[str, Any],
         stream: bool = False,
-        timeout: int = 360,
+        timeout: Optional[Timeout] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
         tool_choice: Optional[str] = None,
+        on_done: Optional[DoneCallback] = None,
+        keep_alive: Optional[KeepAlive] = None,
     ) -> str:
         payload: Dict[str, Any] = {
             "model": model,
@@ -26,14 +167,27 @@ class OllamaClient:
             "stream": stream,
             "options": options,
         }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
         if tools:
             payload["tools"] = tools
         if tool_choice:
             payload["tool_choice"] = tool_choice
 
-        response = requests.post(self.api_url, json=payload, timeout=timeout)
-        response.raise_for_status()
-        data = response.json()
+        started = time.perf_counter()
+        try:
+            response, backend = self._post("/api/chat", payload, timeout)
+            try:
+                response.raise_for_status()
+                data = response.json()
+            finally:
+                self.backends.end(backend)
+        except Exception as e:
+            self._failed(payload, e)
+            raise
+        self._report(data, payload, backend, latency=time.perf_counter() - started)
+        if on_done is not None:
+            on_done(data)
         text: str = data["message"]["content"]
         if (
             isinstance(text, str)
@@ -44,46 +198,84 @@ class OllamaClient:
             text = text.strip('"')
         return text.strip()
 
+    def _stream_frames(
+        self, payload: Dict[str, Any], timeout: Optional[Timeout]
+    ) -> Iterator[Dict[str, Any]]:
+        """POST a streaming chat payload and yield each decoded JSONL frame.
+
+        The final frame (``done: true``) is yielded as well so callers can
+        decide whether they need it. Time to the first content chunk and the
+        gaps between chunks are measured here and reported with the final
+        frame's stats to ``on_stats``; failures go to ``on_error``.
+        """
+        started = time.perf_counter()
+        ttft: Optional[float] = None
+        previous = 0.0
+        gaps: List[float] = []
+        try:
+            resp, backend = self._post("/api/chat", payload, timeout, stream=True)
+        except Exception as e:
+            self._failed(payload, e)
+            raise
+        try:
+            with resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    obj = json.loads(line)
+                    if isinstance(obj, dict) and obj.get("error"):
+                        raise RuntimeError(obj.get("error"))
+                    now = time.perf_counter()
+                    if obj.get("done"):
+                        self._report(obj, payload, backend, ttft=ttft, latency=now - started, gaps=gaps)
+                        yield obj
+                        break
+                    if ttft is None:
+                        ttft = now - started
+                    else:
+                        gaps.append(now - previous)
+                    previous = now
+                    yield obj
+        except Exception as e:
+            self._failed(payload, e)
+            raise
+        finally:
+            self.backends.end(backend)
+
     def chat_stream(
         self,
         *,
         model: str,
         messages: List[Dict[str, Any]],
         options: Dict[str, Any],
-        timeout: int = 360,
+        timeout: Optional[Timeout] = None,
+        on_done: Optional[DoneCallback] = None,
+        keep_alive: Optional[KeepAlive] = None,
     ) -> Iterator[str]:
         """Yield content chunks from Ollama chat stream.
 
         Uses JSONL responses with a final done object. Yields only non-empty
-        content strings from the "message.content" field.
+        content strings from the "message.content" field; the done object is
+        passed to ``on_done``.
         """
-        import json
-
-        payload = {
+        payload: Dict[str, Any] = {
             "model": model,
             "messages": messages,
             "stream": True,
             "options": options,
         }
-        with requests.post(
-            self.api_url,
-            json=payload,
-            timeout=timeout,
-            stream=True,
-        ) as resp:
-            resp.raise_for_status()
-            for line in resp.iter_lines(decode_unicode=True):
-                if not line:
-                    continue
-                obj = json.loads(line)
-                if isinstance(obj, dict) and obj.get("error"):
-                    raise RuntimeError(obj.get("error"))
-                if obj.get("done"):
-                    break
-                msg = obj.get("message") or {}
-                chunk = msg.get("content") or ""
-                if chunk:
-                    yield chunk
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        for obj in self._stream_frames(payload, timeout):
+            msg = obj.get("message") or {}
+            chunk = msg.get("content") or ""
+            if chunk:
+                yield chunk
+            if obj.get("done"):
+                if on_done is not None:
+                    on_done(obj)
+                break
 
     def chat_with_tools(
         self,
@@ -93,42 +285,89 @@ class OllamaClient:
         options: Dict[str, Any],
         tools: List[Dict[str, Any]],
         tool_choice: Optional[str] = "auto",
-        timeout: int = 360,
-    ) -> Dict[str, Any]:
-        """Call /api/chat with tools and return the full JSON response."""
+        timeout: Optional[Timeout] = None,
+        on_done: Optional[DoneCallback] = None,
+        keep_alive: Optional[KeepAlive] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream /api/chat with tools and yield each "message" delta.
+
+        Deltas carry either a piece of "content" or a list of "tool_calls"
+        (Ollama sends tool calls whole, not split across frames). A response
+        without tool calls is the final answer, so callers can render it as
+        it arrives instead of asking the model for it a second time. The done
+        object is passed to ``on_done``.
+        """
         payload: Dict[str, Any] = {
             "model": model,
             "messages": messages,
-            "stream": False,
+            "stream": True,
             "options": options,
             "tools": tools,
         }
         if tool_choice is not None:
             payload["tool_choice"] = tool_choice
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
 
-        response = requests.post(self.api_url, json=payload, timeout=timeout)
-        response.raise_for_status()
-        return response.json()
+        for obj in self._stream_frames(payload, timeout):
+            msg = obj.get("message") or {}
+            if msg.get("content") or msg.get("tool_calls"):
+                yield msg
+            if obj.get("done"):
+                if on_done is not None:
+                    on_done(obj)
+                break
 
-    def get_models(self, timeout: int = 30) -> Dict[str, str]:
-        """Fetch available models from /api/tags endpoint.
-        
-        Returns a dictionary mapping model names to themselves for compatibility
-        with the existing models configuration format.
+    def load(
+        self,
+        *,
+        model: str,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> Dict[str, Any]:
+        """Load a model into memory ahead of the first real request.
+
+        Without messages Ollama only loads the model. With messages (say the
+        system prompt) it also evaluates them and generates a single token,
+        which leaves that prompt in the KV cache so the next request that
+        starts the same way skips re-evaluating it. Returns the response
+        object with Ollama's load and prompt timings, which reach
+        ``on_stats`` like a chat's; failures reach ``on_error``.
         """
-        tags_url = self.api_base + "/api/tags"
+        payload: Dict[str, Any] = {"model": model, "messages": messages or [], "stream": False}
+        if messages:
+            payload["options"] = {**(options or {}), "num_predict": 1}
+        elif options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        started = time.perf_counter()
         try:
-            response = requests.get(tags_url, timeout=timeout)
-            response.raise_for_status()
-            data = response.json()
-            
-            models = {}
-            for model_info in data.get("models", []):
-                name = model_info.get("name", "")
-                if name:
-                    models[name] = name
-            
-            return models
+            response, backend = self._post("/api/chat", payload, timeout)
+            try:
+                response.raise_for_status()
+                data: Dict[str, Any] = response.json()
+            finally:
+                self.backends.end(backend)
         except Exception as e:
-            # If fetching fails, return empty dict - caller should handle gracefully
-            return {}
+            self._failed(payload, e)
+            raise
+        self._report(data, payload, backend, latency=time.perf_counter() - started)
+        return data
+
+    def _list_models(self, backend: Backend) -> List[str]:
+        response = self.session.get(backend.url + "/api/tags", timeout=self._timeout(_PROBE_TIMEOUT))
+        response.raise_for_status()
+        return [m.get("name", "") for m in response.json().get("models", []) if m.get("name")]
+
+    def get_models(self) -> Dict[str, str]:
+        """Fetch available models from the /api/tags endpoint of every backend.
+
+        Returns a dictionary mapping model names to themselves for compatibility
+        with the existing models configuration format. Backends that do not
+        answer are left out (and marked down); if none answer it is empty.
+        """
+        self.backends.probe_all()
+        return {name: name for name in self.backends.models()}
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .context import ContextWindow
+
+SUMMARY_REQUEST = "Summarize our conversation so far."
+
+Summarize = Callable[[List[Dict[str, Any]]], str]
+
+
+def transcript(messages: List[Dict[str, Any]]) -> str:
+    """Render messages as a plain "Role: text" transcript for the summarizer."""
+    lines: List[str] = []
+    for message in messages:
+        content = str(message.get("content") or "").strip()
+        if content:
+            lines.append(f"{str(message.get('role', 'user')).capitalize()}: {content}")
+    return "\n\n".join(lines)
+
+
+class Compactor:
+    """Summarize the oldest turns of a ContextWindow in the background.
+
+    ``maybe_start`` is called after a response: once the history passes
+    ``threshold`` of its token budget, every turn but the latest
+    ``keep_turns`` is handed to ``summarize`` on a worker thread. ``apply``
+    is called on the main thread before the next request; if the summary is
+    ready and those turns are still in place, they are replaced in one step
+    by a short user/assistant exchange carrying the summary. Otherwise the
+    history is left alone and the request goes out as usual.
+    """
+
+    def __init__(
+        self,
+        summarize: Summarize,
+        *,
+        threshold: float = 0.75,
+        keep_turns: int = 2,
+        min_tokens: int = 0,
+    ) -> None:
+        self._summarize = summarize
+        self.threshold = threshold
+        self.keep_turns = max(1, int(keep_turns))
+        self.min_tokens = min_tokens
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # (start index, the messages being summarized, their tokens, summary future)
+        self._job: Optional[Tuple[int, List[Dict[str, Any]], int, Future]] = None
+
+    @property
+    def pending(self) -> bool:
+        return self._job is not None
+
+    def _span(self, window: ContextWindow) -> Tuple[int, int]:
+        start = 1 if window and window[0].get("role") == "system" else 0
+        turns = [i for i in range(start, len(window)) if window[i].get("role") == "user"]
+        if len(turns) <= self.keep_turns:
+            return start, start
+        return start, turns[-self.keep_turns]
+
+    def maybe_start(self, window: ContextWindow) -> bool:
+        """Start summarizing old turns if the history is over the threshold."""
+        if self._job is not None or window.total <= window.max_tokens * self.threshold:
+            return False
+        start, end = self._span(window)
+        tokens = sum(window.tokens_of(i) for i in range(start, end))
+        if end - start < 2 or tokens <= self.min_tokens:
+            return False
+        snapshot = list(window[start:end])
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ollamarama-compact")
+            future = self._pool.submit(self._summarize, snapshot)
+        self._job = (start, snapshot, tokens, future)
+        logging.info(f"Compacting {len(snapshot)} old messages ({tokens} tokens) in the background")
+        return True
+
+    def apply(self, window: ContextWindow) -> int:
+        """Swap in a finished summary; returns the number of messages replaced."""
+        if self._job is None:
+            return 0
+        start, snapshot, tokens, future = self._job
+        if not future.done():
+            return 0
+        self._job = None
+        try:
+            summary = future.result().strip()
+        except Exception as e:
+            logging.warning(f"Compaction failed: {e}")
+            return 0
+        end = start + len(snapshot)
+        current = window[start:end]
+        # The history was reset or trimmed meanwhile: the summary is stale
+        if len(current) != len(snapshot) or any(a is not b for a, b in zip(current, snapshot)):
+            logging.info("Discarding compaction summary for turns that are no longer in the history")
+            return 0
+        if not summary:
+            return 0
+        before = window.total
+        window[start:end] = [
+            {"role": "user", "content": SUMMARY_REQUEST},
+            {"role": "assistant", "content": summary},
+        ]
+        logging.info(
+            f"Compacted {len(snapshot)} messages into a summary "
+            f"({tokens} -> {window.tokens_of(start) + window.tokens_of(start + 1)} tokens; "
+            f"history {before} -> {window.total})"
+        )
+        return len(snapshot)
+
+    def cancel(self) -> None:
+        """Forget any summary in progress (its result will be discarded)."""
+        self._job = None
+
+    def shutdown(self) -> None:
+        job, self._job = self._job, None
+        if job is not None:
+            # Only a summary that has not started can be cancelled; a running one is left to finish
+            job[3].cancel()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+__all__ = ["Compactor", "SUMMARY_REQUEST", "transcript"]
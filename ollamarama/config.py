@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List
 
@@ -20,15 +20,115 @@ class ModelOptions:
         }
 
 
+@dataclass
+class HttpOptions:
+    pool_size: int = 10
+    keep_alive: bool = True
+    connect_timeout: float = 10.0
+    read_timeout: float = 360.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.pool_size,
+            "keep_alive": self.keep_alive,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+        }
+
+
+@dataclass
+class BackendOptions:
+    policy: str = "round_robin"
+    health_interval: float = 30.0
+    cooldown: float = 15.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "health_interval": self.health_interval,
+            "cooldown": self.cooldown,
+        }
+
+
+@dataclass
+class ToolOptions:
+    max_workers: int = 4
+    serial: List[str] = field(default_factory=list)
+    cache_size: int = 256
+    cache: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ContextOptions:
+    max_tokens: int = 4096
+
+
+@dataclass
+class CompactionOptions:
+    enabled: bool = True
+    model: str = ""
+    threshold: float = 0.75
+    keep_turns: int = 2
+    summary_tokens: int = 512
+
+
+@dataclass
+class HistoryOptions:
+    enabled: bool = True
+    path: str = ""
+
+
+@dataclass
+class ServerOptions:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    concurrency: int = 8
+    max_sessions: int = 256
+    session_ttl: float = 3600.0
+
+
+@dataclass
+class MetricsOptions:
+    host: str = "127.0.0.1"
+    port: int = 0
+    file: str = ""
+    interval: float = 15.0
+
+
+@dataclass
+class LogOptions:
+    path: str = "ollamarama.log"
+    format: str = "text"
+    messages: str = "full"
+    max_bytes: int = 10 * 1024 * 1024
+    backups: int = 5
+    rotate: str = ""
+
+
 @dataclass
 class AppConfig:
-    api_base: str
+    # One URL, or several to balance requests across
+    api_base: str | List[str]
     models: Dict[str, str] | None
     default_model: str
     prompt: List[str]
     personality: str
     options: ModelOptions
+    intro: bool = True
+    status_line: bool = False
+    keep_alive: Any = None
     mcp_servers: Dict[str, Any] | None = None
+    mcp_timeout: float = 30.0
+    mcp_cache: bool = True
+    http: HttpOptions = field(default_factory=HttpOptions)
+    backends: BackendOptions = field(default_factory=BackendOptions)
+    tools: ToolOptions = field(default_factory=ToolOptions)
+    context: ContextOptions = field(default_factory=ContextOptions)
+    compaction: CompactionOptions = field(default_factory=CompactionOptions)
+    history: HistoryOptions = field(default_factory=HistoryOptions)
+    server: ServerOptions = field(default_factory=ServerOptions)
+    metrics: MetricsOptions = field(default_factory=MetricsOptions)
+    log: LogOptions = field(default_factory=LogOptions)
 
 
 def load_config(path: str | Path = "config.json") -> AppConfig:
@@ -51,7 +151,7 @@ def load_config(path: str | Path = "config.json") -> AppConfig:
     with p.open("r", encoding="utf-8") as f:
         raw = json.load(f)
 
-    api_base: str = raw.get("api_base", "http://localhost:11434")
+    api_base: str | List[str] = raw.get("api_base", "http://localhost:11434")
     models: Dict[str, str] | None = raw.get("models")
     default_model: str = raw.get("default_model", next(iter(models), "") if models else "")
     prompt: List[str] = raw.get(
@@ -73,7 +173,84 @@ def load_config(path: str | Path = "config.json") -> AppConfig:
         repeat_penalty=float(opts_raw.get("repeat_penalty", 1.0)),
     )
 
+    intro = bool(raw.get("intro", True))
+    status_line = bool(raw.get("status_line", False))
+    # A duration for every model, or a map of model key/name to duration with an optional "default"
+    keep_alive: Any = raw.get("keep_alive")
+
     mcp_servers: Dict[str, Any] | None = raw.get("mcp_servers")
+    mcp_timeout = float(raw.get("mcp_timeout", 30.0))
+    mcp_cache = bool(raw.get("mcp_cache", True))
+
+    http_raw = raw.get("http", {})
+    http = HttpOptions(
+        pool_size=int(http_raw.get("pool_size", 10)),
+        keep_alive=bool(http_raw.get("keep_alive", True)),
+        connect_timeout=float(http_raw.get("connect_timeout", 10.0)),
+        read_timeout=float(http_raw.get("read_timeout", 360.0)),
+    )
+
+    backends_raw = raw.get("backends", {})
+    backends = BackendOptions(
+        policy=str(backends_raw.get("policy") or "round_robin"),
+        health_interval=float(backends_raw.get("health_interval", 30.0)),
+        cooldown=float(backends_raw.get("cooldown", 15.0)),
+    )
+
+    tools_raw = raw.get("tools", {})
+    tools = ToolOptions(
+        max_workers=int(tools_raw.get("max_workers", 4)),
+        serial=list(tools_raw.get("serial", [])),
+        cache_size=int(tools_raw.get("cache_size", 256)),
+        cache=dict(tools_raw.get("cache", {})),
+    )
+
+    context_raw = raw.get("context", {})
+    context = ContextOptions(
+        max_tokens=int(context_raw.get("max_tokens", 4096)),
+    )
+
+    compaction_raw = raw.get("compaction", {})
+    compaction = CompactionOptions(
+        enabled=bool(compaction_raw.get("enabled", True)),
+        model=str(compaction_raw.get("model") or ""),
+        threshold=float(compaction_raw.get("threshold", 0.75)),
+        keep_turns=int(compaction_raw.get("keep_turns", 2)),
+        summary_tokens=int(compaction_raw.get("summary_tokens", 512)),
+    )
+
+    history_raw = raw.get("history", {})
+    history = HistoryOptions(
+        enabled=bool(history_raw.get("enabled", True)),
+        path=str(history_raw.get("path") or ""),
+    )
+
+    server_raw = raw.get("server", {})
+    server = ServerOptions(
+        host=str(server_raw.get("host") or "127.0.0.1"),
+        port=int(server_raw.get("port", 8765)),
+        concurrency=int(server_raw.get("concurrency", 8)),
+        max_sessions=int(server_raw.get("max_sessions", 256)),
+        session_ttl=float(server_raw.get("session_ttl", 3600)),
+    )
+
+    metrics_raw = raw.get("metrics", {})
+    metrics = MetricsOptions(
+        host=str(metrics_raw.get("host") or "127.0.0.1"),
+        port=int(metrics_raw.get("port") or 0),
+        file=str(metrics_raw.get("file") or ""),
+        interval=float(metrics_raw.get("interval", 15)),
+    )
+
+    log_raw = raw.get("log", {})
+    log = LogOptions(
+        path=str(log_raw.get("path", "ollamarama.log") or ""),
+        format=str(log_raw.get("format") or "text"),
+        messages=str(log_raw.get("messages") or "full"),
+        max_bytes=int(log_raw.get("max_bytes", 10 * 1024 * 1024) or 0),
+        backups=int(log_raw.get("backups", 5)),
+        rotate=str(log_raw.get("rotate") or ""),
+    )
 
     return AppConfig(
         api_base=api_base,
@@ -82,5 +259,19 @@ def load_config(path: str | Path = "config.json") -> AppConfig:
         prompt=prompt,
         personality=personality,
         options=options,
+        intro=intro,
+        status_line=status_line,
+        keep_alive=keep_alive,
         mcp_servers=mcp_servers,
+        mcp_timeout=mcp_timeout,
+        mcp_cache=mcp_cache,
+        http=http,
+        backends=backends,
+        tools=tools,
+        context=context,
+        compaction=compaction,
+        history=history,
+        server=server,
+        metrics=metrics,
+        log=log,
     )
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+# Per-message cost of the chat template (role markers, separators)
+_MESSAGE_OVERHEAD = 4
+# Rough characters per token for English text and code
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_text(text: str) -> int:
+    """Estimate the token count of a string without a tokenizer."""
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """Estimate the tokens one chat message adds to the prompt."""
+    tokens = _MESSAGE_OVERHEAD + estimate_text(str(message.get("content") or ""))
+    if message.get("tool_calls"):
+        tokens += estimate_text(json.dumps(message["tool_calls"], ensure_ascii=False, default=str))
+    return tokens
+
+
+class ContextWindow(list):
+    """Chat history that tracks its size in tokens and trims to a budget.
+
+    Each message is estimated once when it is added and its count kept in a
+    parallel list next to a running total, so appending and trimming never
+    re-count the history. ``record`` replaces estimates with the counts
+    Ollama reports in the final frame of a response.
+
+    ``trim`` drops whole turns from the front until the total, plus any
+    prompt overhead such as tool definitions, fits ``max_tokens``; the system message and the latest turn (from the last
+    user message on) are always kept, even when they alone exceed it.
+
+    It is a list, so it can be passed straight to the client; mutations
+    other than append/extend/pop/clear re-sync the counts from scratch.
+    """
+
+    def __init__(self, max_tokens: int = 4096, messages: Iterable[Dict[str, Any]] = ()) -> None:
+        super().__init__()
+        self.max_tokens = max(1, int(max_tokens))
+        self.total = 0
+        self._tokens: List[int] = []
+        self._last_user = -1
+        self.extend(messages)
+
+    # ---- list mutators that keep the counts in step ----
+    def append(self, message: Dict[str, Any]) -> None:
+        tokens = estimate_tokens(message)
+        super().append(message)
+        self._tokens.append(tokens)
+        self.total += tokens
+        if message.get("role") == "user":
+            self._last_user = len(self) - 1
+
+    def extend(self, messages: Iterable[Dict[str, Any]]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def __iadd__(self, messages: Iterable[Dict[str, Any]]) -> "ContextWindow":  # type: ignore[override]
+        self.extend(messages)
+        return self
+
+    def pop(self, index: int = -1) -> Dict[str, Any]:  # type: ignore[override]
+        index = index + len(self) if index < 0 else index
+        message = super().pop(index)
+        self.total -= self._tokens.pop(index)
+        if index <= self._last_user:
+            self._find_last_user()
+        return message
+
+    def clear(self) -> None:
+        super().clear()
+        self._tokens.clear()
+        self.total = 0
+        self._last_user = -1
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        known = self._known()
+        super().__setitem__(index, value)
+        self._resync(known)
+
+    def __delitem__(self, index: Any) -> None:
+        known = self._known()
+        super().__delitem__(index)
+        self._resync(known)
+
+    def insert(self, index: int, message: Dict[str, Any]) -> None:  # type: ignore[override]
+        known = self._known()
+        super().insert(index, message)
+        self._resync(known)
+
+    def remove(self, message: Dict[str, Any]) -> None:  # type: ignore[override]
+        known = self._known()
+        super().remove(message)
+        self._resync(known)
+
+    def _known(self) -> Dict[int, int]:
+        return {id(m): t for m, t in zip(self, self._tokens)}
+
+    def _resync(self, known: Dict[int, int]) -> None:
+        # Keep measured counts for messages that survived the mutation
+        self._tokens = [known.get(id(m)) or estimate_tokens(m) for m in self]
+        self.total = sum(self._tokens)
+        self._find_last_user()
+
+    def _find_last_user(self) -> None:
+        self._last_user = -1
+        for i in range(len(self) - 1, -1, -1):
+            if self[i].get("role") == "user":
+                self._last_user = i
+                break
+
+    def _set(self, index: int, tokens: int) -> None:
+        self.total += tokens - self._tokens[index]
+        self._tokens[index] = tokens
+
+    # ---- budget ----
+    def tokens_of(self, index: int) -> int:
+        return self._tokens[index]
+
+    def record(
+        self,
+        done: Optional[Dict[str, Any]],
+        *,
+        generated: Optional[int] = None,
+        overhead: int = 0,
+    ) -> None:
+        """Apply the token counts from a response's final frame.
+
+        Call after the reply has been appended. ``eval_count`` becomes the
+        size of the reply, scaled down when part of the ``generated``
+        characters (a hidden think block) was not kept. ``prompt_eval_count``
+        only ever raises the estimate of the newest prompt message: with the
+        KV cache reused Ollama reports just the new tokens, so a smaller
+        count says nothing about the rest. ``overhead`` is the part of the
+        prompt that is not history, such as tool definitions.
+        """
+        if not done or not self or self[-1].get("role") != "assistant":
+            return
+        last = len(self) - 1
+        reply = done.get("eval_count")
+        if isinstance(reply, int) and reply > 0:
+            content = str(self[last].get("content") or "")
+            if generated and generated > len(content):
+                reply = reply * len(content) // generated
+            self._set(last, reply + _MESSAGE_OVERHEAD)
+        prompt = done.get("prompt_eval_count")
+        if isinstance(prompt, int) and last >= 1:
+            newest = last - 1
+            before = self.total - self._tokens[last] - self._tokens[newest]
+            measured = prompt - before - overhead
+            if measured > self._tokens[newest]:
+                self._set(newest, measured)
+
+    def trim(self, overhead: int = 0) -> int:
+        """Drop the oldest turns until the history and ``overhead`` fit; returns how many messages went."""
+        budget = self.max_tokens - max(0, overhead)
+        if self.total <= budget:
+            return 0
+        start = 1 if self and self[0].get("role") == "system" else 0
+        limit = self._last_user if self._last_user >= 0 else len(self) - 1
+        end = start
+        total = self.total
+        while end < limit and total > budget:
+            total -= self._tokens[end]
+            end += 1
+        # Don't leave the replies of a dropped user message at the front
+        while end < limit and self[end].get("role") != "user":
+            total -= self._tokens[end]
+            end += 1
+        if end == start:
+            return 0
+        super().__delitem__(slice(start, end))
+        del self._tokens[start:end]
+        self.total = total
+        self._last_user -= end - start
+        return end - start
+
+
+__all__ = ["ContextWindow", "estimate_text", "estimate_tokens"]
@@ -1,15 +1,110 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
-from typing import Any, Dict, List
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
 
 from fastmcp import Client
+from fastmcp.exceptions import ToolError
 import mcp.types
 
+from .paths import write_json_atomic
+
+_SCHEMA_CACHE_MAX_AGE = 30 * 24 * 3600
+
+
+class _EventLoopThread:
+    """An asyncio event loop running forever in a daemon thread."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="ollamarama-mcp", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+class _ServerSession:
+    """A long-lived connection to one MCP server.
+
+    The connection is owned by a task on the event loop that stays inside
+    ``async with client`` until the session is closed, so stdio servers are
+    spawned and initialized once instead of once per call.
+    """
+
+    def __init__(self, name: str, cfg: Any) -> None:
+        self.name = name
+        self.cfg = cfg
+        self.client: Optional[Client] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.client is not None and self._task is not None and not self._task.done()
+
+    async def connect(self) -> Client:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.connected:
+                return self.client  # type: ignore[return-value]
+            ready: asyncio.Future = asyncio.get_running_loop().create_future()
+            self._closing = asyncio.Event()
+            self._task = asyncio.create_task(self._hold(ready, self._closing))
+            return await ready
+
+    async def _hold(self, ready: asyncio.Future, closing: asyncio.Event) -> None:
+        client = Client(self.cfg) if isinstance(self.cfg, str) else Client({self.name: self.cfg})
+        try:
+            async with client:
+                self.client = client
+                ready.set_result(client)
+                await closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            self.client = None
+            if not ready.done():
+                ready.cancel()
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if self._closing is not None:
+            self._closing.set()
+        if task is not None:
+            try:
+                await asyncio.wait_for(task, timeout=5)
+            except BaseException:
+                task.cancel()
+
 
 class FastMCPClient:
-    def __init__(self, servers: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        servers: Dict[str, Any],
+        *,
+        timeout: float = 120.0,
+        schema_cache: str | Path | None = None,
+    ) -> None:
         self._servers: Dict[str, Any] = {}
         for name, spec in servers.items():
             if isinstance(spec, str):
@@ -38,38 +133,173 @@ class FastMCPClient:
                         cfg["args"] = parts[1:]
                 self._servers[name] = cfg
         self._tool_servers: Dict[str, str] = {}
+        # Each server's tools as last listed (or read from the schema cache)
+        self._listed: Dict[str, List[Dict[str, Any]]] = {}
+        self._sessions: Dict[str, _ServerSession] = {
+            name: _ServerSession(name, cfg) for name, cfg in self._servers.items()
+        }
+        self.timeout = timeout
+        self.schema_cache = Path(schema_cache) if schema_cache else None
+        self._loop: Optional[_EventLoopThread] = None
+        self._loop_lock = threading.Lock()
 
-    async def _list_tools_async(self) -> List[Dict[str, Any]]:
+    def _submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = _EventLoopThread()
+            return self._loop.submit(coro)
+
+    async def _list_server_tools(self, name: str) -> List[Dict[str, Any]]:
+        client = await self._sessions[name].connect()
+        tools = await client.list_tools()
         schema: List[Dict[str, Any]] = []
-        for name, cfg in self._servers.items():
-            client = Client(cfg) if isinstance(cfg, str) else Client({name: cfg})
-            async with client:
-                tools = await client.list_tools()
-            for tool in tools:
-                self._tool_servers[tool.name] = name
-                schema.append(
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": tool.name,
-                            "description": tool.description or "",
-                            "parameters": tool.inputSchema
-                            or {
-                                "type": "object",
-                                "properties": {},
-                                "additionalProperties": False,
-                            },
+        for tool in tools:
+            schema.append(
+                {
+                    "type": "function",
+                    "function": {
+                        "name": tool.name,
+                        "description": tool.description or "",
+                        "parameters": tool.inputSchema
+                        or {
+                            "type": "object",
+                            "properties": {},
+                            "additionalProperties": False,
                         },
-                    }
-                )
+                    },
+                }
+            )
         return schema
 
+    async def _discover_async(
+        self, timeout: float, *, keep_known: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        names = list(self._sessions)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._list_server_tools(name), timeout) for name in names),
+            return_exceptions=True,
+        )
+        schema: List[Dict[str, Any]] = []
+        failures: Dict[str, str] = {}
+        tool_servers: Dict[str, str] = {}
+        listed: Dict[str, List[Dict[str, Any]]] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.TimeoutError):
+                    failures[name] = f"timed out after {timeout:g}s"
+                else:
+                    failures[name] = str(result) or type(result).__name__
+                if keep_known and name in self._listed:
+                    # A slow or failed refresh: keep offering the tools listed before
+                    result = self._listed[name]
+                else:
+                    # Drop the server so later calls don't try to reach it
+                    await self._sessions.pop(name).close()
+                    self._servers.pop(name, None)
+                    continue
+            else:
+                listed[name] = result
+            for tool in result:
+                tool_servers[tool["function"]["name"]] = name
+            schema.extend(result)
+        self._tool_servers = tool_servers
+        self._listed.update(listed)
+        if listed:
+            self._store_schema(listed)
+        return schema, failures
+
+    def discover(self, timeout: float = 30.0) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """Connect to every server concurrently and list their tools once.
+
+        Returns the combined tool schema and a map of server name to error
+        for servers that failed or did not answer within ``timeout`` seconds.
+        Failed servers are removed; the connections of the others stay open
+        and are reused by ``call_tool``.
+        """
+        return self._submit(self._discover_async(timeout)).result()
+
+    def refresh(self, timeout: float = 30.0) -> Future:
+        """Run ``discover`` in the background; the Future yields its result.
+
+        Unlike ``discover``, a server that fails here is kept with the tools
+        it listed before (or that were cached), so one slow answer does not
+        take a working server away; it is still reported in the failures.
+        """
+        return self._submit(self._discover_async(timeout, keep_known=True))
+
+    def _fingerprint(self, name: str) -> str:
+        raw = json.dumps({"name": name, "config": self._servers[name]}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _read_schema_cache(self) -> Dict[str, Any]:
+        if self.schema_cache is None:
+            return {}
+        try:
+            with self.schema_cache.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _store_schema(self, listed: Dict[str, List[Dict[str, Any]]]) -> None:
+        if self.schema_cache is None:
+            return
+        data = self._read_schema_cache()
+        now = time.time()
+        for name, tools in listed.items():
+            data[self._fingerprint(name)] = {"server": name, "tools": tools, "updated": now}
+        # Forget servers nobody has started in a month
+        data = {k: v for k, v in data.items() if now - v.get("updated", 0) < _SCHEMA_CACHE_MAX_AGE}
+        try:
+            write_json_atomic(self.schema_cache, data)
+        except OSError:
+            pass
+
+    def cached_tools(self) -> Optional[List[Dict[str, Any]]]:
+        """Return tool schemas cached by a previous run, if every server has them.
+
+        Entries are keyed by a hash of each server's name and configuration,
+        so editing a server's config invalidates only that server. When this
+        returns a schema the tool map is populated and calls work right away
+        (connecting on first use); callers should still ``refresh`` to pick
+        up changes.
+        """
+        data = self._read_schema_cache()
+        schema: List[Dict[str, Any]] = []
+        tool_servers: Dict[str, str] = {}
+        for name in self._servers:
+            entry = data.get(self._fingerprint(name))
+            if not isinstance(entry, dict) or not isinstance(entry.get("tools"), list):
+                return None
+            for tool in entry["tools"]:
+                tool_servers[tool["function"]["name"]] = name
+            schema.extend(entry["tools"])
+        self._tool_servers = tool_servers
+        self._listed = {name: data[self._fingerprint(name)]["tools"] for name in self._servers}
+        return schema
+
+    @property
+    def servers(self) -> List[str]:
+        return list(self._servers)
+
     def list_tools(self) -> List[Dict[str, Any]]:
-        return asyncio.run(self._list_tools_async())
+        schema, _ = self.discover(self.timeout)
+        return schema
 
-    async def _call_tool_async(self, client: Client, name: str, arguments: Dict[str, Any]) -> Any:
-        async with client:
-            result = await client.call_tool(name, arguments)
+    async def _call_tool_async(self, server_name: str, name: str, arguments: Dict[str, Any]) -> Any:
+        session = self._sessions[server_name]
+        # Reuse the open connection; if it has dropped, reconnect once and retry
+        for attempt in range(2):
+            client = await session.connect()
+            try:
+                result = await client.call_tool(name, arguments)
+                break
+            except ToolError:
+                raise
+            except Exception:
+                await session.close()
+                if attempt:
+                    raise
         if result.data is not None:
             return result.data
         if result.structured_content is not None:
@@ -80,14 +310,9 @@ class FastMCPClient:
                 texts.append(block.text)
         return {"result": "\n".join(texts)}
 
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
-        server_name = self._tool_servers.get(name)
-        if server_name is None:
-            return json.dumps({"error": f"Unknown tool: {name}"}, ensure_ascii=False)
-        cfg = self._servers.get(server_name)
-        client = Client(cfg) if isinstance(cfg, str) else Client({server_name: cfg})
+    def _encode(self, name: str, future: Future) -> str:
         try:
-            data = asyncio.run(self._call_tool_async(client, name, arguments))
+            data = future.result()
         except Exception as e:
             return json.dumps({"error": f"Tool execution error for {name}: {e}"}, ensure_ascii=False)
         try:
@@ -95,5 +320,44 @@ class FastMCPClient:
         except Exception:
             return json.dumps({"result": str(data)}, ensure_ascii=False)
 
+    def call_tool_async(self, name: str, arguments: Dict[str, Any]) -> Future:
+        """Submit a tool call to the background loop and return a Future.
+
+        The future resolves to the same JSON string ``call_tool`` returns, so
+        callers on the UI thread can keep rendering while the call runs.
+        """
+        result: Future = Future()
+        server_name = self._tool_servers.get(name)
+        if server_name is None:
+            result.set_result(json.dumps({"error": f"Unknown tool: {name}"}, ensure_ascii=False))
+            return result
+        inner = self._submit(self._call_tool_async(server_name, name, arguments))
+        inner.add_done_callback(lambda f: result.set_result(self._encode(name, f)))
+        return result
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        future = self.call_tool_async(name, arguments)
+        try:
+            return future.result(self.timeout)
+        except Exception as e:
+            return json.dumps({"error": f"Tool execution error for {name}: {e}"}, ensure_ascii=False)
+
+    async def _close_async(self) -> None:
+        await asyncio.gather(
+            *(session.close() for session in self._sessions.values()), return_exceptions=True
+        )
+
+    def close(self) -> None:
+        """Disconnect from every server and stop the background loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            loop.submit(self._close_async()).result(10)
+        except Exception:
+            pass
+        loop.stop()
+
 
 __all__ = ["FastMCPClient"]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Iterator, Optional, Tuple
+
+from .config import LogOptions
+
+FORMATS = ("text", "json")
+MESSAGES = ("full", "metadata")
+# Rotation period -> strftime of the period a moment falls in
+ROTATE_PERIODS = {"hourly": "%Y-%m-%d %H", "daily": "%Y-%m-%d", "weekly": "%G-%V"}
+
+# (id, perf_counter at its start) of the turn running in this thread or context
+_turn: ContextVar[Optional[Tuple[str, float]]] = ContextVar("ollamarama_turn", default=None)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_message_bodies = True
+
+
+class RotatingLogHandler(RotatingFileHandler):
+    """Roll the log over when it reaches ``max_bytes`` or a new ``rotate`` period starts.
+
+    Backups are numbered as with RotatingFileHandler (``ollamarama.log.1``
+    is the newest). The period is checked against the file's last write, so
+    a log left from yesterday is rolled over by the first record of today
+    even when the app was not running at midnight.
+    """
+
+    def __init__(self, path: str, *, max_bytes: int = 0, backups: int = 5, rotate: str = "") -> None:
+        super().__init__(
+            path, maxBytes=max(0, max_bytes), backupCount=max(1, backups), encoding="utf-8", delay=True
+        )
+        self._period_format = ROTATE_PERIODS.get(rotate, "")
+        try:
+            last_write = os.stat(path).st_mtime
+        except OSError:
+            last_write = time.time()
+        self._period = self._period_of(last_write)
+
+    def _period_of(self, moment: float) -> str:
+        return time.strftime(self._period_format, time.localtime(moment)) if self._period_format else ""
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self._period_format and self._period_of(record.created) != self._period:
+            self._period = self._period_of(record.created)
+            return os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0
+        return bool(super().shouldRollover(record))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, message, the turn and any ``fields`` passed as extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+        data = {
+            "time": created.isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["message"] += "\n" + self.formatException(record.exc_info)
+        if getattr(record, "turn", None):
+            data["turn"] = record.turn
+            data["turn_seconds"] = record.turn_seconds
+        data.update(getattr(record, "fields", None) or {})
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only our listener reads the record, so it is updated in place rather
+        # than copied; the message and any traceback are rendered here, since
+        # arguments and exc_info may not outlive the call
+        record.msg = self.format(record)
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record.stack_info = None
+        return record
+
+
+class _TurnFilter(logging.Filter):
+    # Runs in the thread that logs the record, before it is queued, to see its turn
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = _turn.get()
+        if current is not None:
+            record.turn = current[0]
+            record.turn_seconds = round(time.perf_counter() - current[1], 4)
+        return True
+
+
+def setup_logging(options: LogOptions) -> None:
+    """Send log records to ``options.path`` through a queue and a writer thread.
+
+    Logging a record only formats its message and queues it; a
+    QueueListener thread writes and rotates the file, so disk writes stay
+    out of the streaming and prompt loop. Like ``logging.basicConfig``, this
+    does nothing when logging is already set up.
+    """
+    global _listener, _queue_handler, _message_bodies
+    for name, value, allowed in (
+        ("format", options.format, FORMATS),
+        ("messages", options.messages, MESSAGES),
+        ("rotate", options.rotate, ("", *ROTATE_PERIODS)),
+    ):
+        if value not in allowed:
+            raise ValueError(f"Unknown log {name} {value!r}; expected one of {', '.join(map(repr, allowed))}")
+    _message_bodies = options.messages == "full"
+    root = logging.getLogger()
+    if _listener is not None or root.handlers:
+        return
+    root.setLevel(logging.INFO)
+    if not options.path:
+        root.addHandler(logging.NullHandler())
+        return
+
+    handler = RotatingLogHandler(
+        options.path, max_bytes=options.max_bytes, backups=options.backups, rotate=options.rotate
+    )
+    if options.format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _QueueHandler(records)
+    _queue_handler.addFilter(_TurnFilter())
+    root.addHandler(_queue_handler)
+    _listener = QueueListener(records, handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Write out queued records; later ones are written directly. Runs at exit."""
+    global _listener, _queue_handler
+    if _listener is None or _queue_handler is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+
+
+@contextmanager
+def log_turn() -> Iterator[str]:
+    """Tag records logged in this context with a new turn id (or the enclosing turn's)."""
+    current = _turn.get()
+    if current is not None:
+        yield current[0]
+        return
+    turn_id = uuid.uuid4().hex[:12]
+    token = _turn.set((turn_id, time.perf_counter()))
+    try:
+        yield turn_id
+    finally:
+        _turn.reset(token)
+
+
+def log_fields(label: str, **fields: Any) -> None:
+    """Log ``label: [key value, ...]``; the JSON format gets ``fields`` as keys of their own."""
+    details = ", ".join(f"{key} {value}" for key, value in fields.items())
+    logging.info(f"{label}: [{details}]", extra={"fields": fields})
+
+
+def log_message(label: str, content: str, **fields: Any) -> None:
+    """Log a chat message, or with ``log.messages: "metadata"`` only its size and ``fields``."""
+    fields["chars"] = len(content)
+    if _message_bodies:
+        logging.info(f"{label}: {content}", extra={"fields": fields})
+    else:
+        log_fields(label, **fields)
+
+
+__all__ = [
+    "FORMATS",
+    "JsonFormatter",
+    "MESSAGES",
+    "ROTATE_PERIODS",
+    "RotatingLogHandler",
+    "log_fields",
+    "log_message",
+    "log_turn",
+    "setup_logging",
+    "stop_logging",
+]
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import abc
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .paths import write_json_atomic
+from .stats import GenerationStats
+
+Labels = Tuple[str, ...]
+# Returns (label values, value) pairs when the metrics are exported
+Collect = Callable[[], Iterable[Tuple[Labels, float]]]
+
+# Request, first-token and tool latencies (seconds)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Gaps between streamed chunks (seconds)
+GAP_BUCKETS = (0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Generation speed (tokens per second)
+RATE_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 50.0, 75.0, 100.0, 150.0, 250.0)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric(abc.ABC):
+    """A named family of samples, one per combination of label values."""
+
+    type = "unknown"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _label_text(self, values: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abc.abstractmethod
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        """Label values and the value (or histogram state) of each sample."""
+
+    def openmetrics(self) -> List[str]:
+        lines = [f"# TYPE {self.name} {self.type}", f"# HELP {self.name} {self.help}"]
+        suffix = "_total" if self.type == "counter" else ""
+        for values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{self._label_text(values)} {_number(value)}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "help": self.help,
+            "samples": [
+                {"labels": dict(zip(self.labels, values)), "value": value} for values, value in self.samples()
+            ],
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+
+class Histogram(Metric):
+    """Counts of observations per bucket, plus their count and sum."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), *, buckets: Sequence[float]) -> None:
+        super().__init__(name, help, labels)
+        self.bounds = tuple(sorted(buckets))
+        # Per label values: [count in each bucket (the last is +Inf), sum]
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        self.observe_many((value,), *labels)
+
+    def observe_many(self, values: Iterable[float], *labels: str) -> None:
+        bounds = self.bounds
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(bounds) + 1), [0.0])
+            counts, total = entry
+            for value in values:
+                counts[bisect_left(bounds, value)] += 1
+                total[0] += value
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        with self._lock:
+            return sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items())
+
+    def openmetrics(self) -> List[str]:
+        lines = [f"# TYPE {self.name} {self.type}", f"# HELP {self.name} {self.help}"]
+        for values, (counts, total) in self.samples():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_number(total)}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = []
+        for values, (counts, total) in self.samples():
+            cumulative = 0
+            buckets: Dict[str, int] = {}
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                buckets[_number(bound)] = cumulative
+            samples.append(
+                {"labels": dict(zip(self.labels, values)), "count": cumulative, "sum": total, "buckets": buckets}
+            )
+        return {"type": self.type, "help": self.help, "samples": samples}
+
+
+class Collected(Metric):
+    """A gauge or counter whose values are read from elsewhere when exported."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), *, type: str, collect: Collect) -> None:
+        super().__init__(name, help, labels)
+        self.type = type
+        self._collect = collect
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        try:
+            return sorted((tuple(labels), float(value)) for labels, value in self._collect())
+        except Exception as e:
+            logging.warning(f"Collecting metric {self.name} failed: {e}")
+            return []
+
+
+class Metrics:
+    """The app's metrics, and their optional exporters.
+
+    Recording is a dict update under a lock, done once per request, tool
+    call or event (never per streamed chunk), so it costs microseconds
+    whether or not anything exports it. ``serve`` exposes OpenMetrics text
+    on a local port; ``write_file`` flushes a JSON snapshot every
+    ``interval`` seconds. Values that other components already track
+    (cache hit counts, history size) are read when exported, via
+    ``collect``.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.chat_requests = self._add(Counter("ollamarama_chat_requests", "Chat requests answered", ["model"]))
+        self.chat_errors = self._add(Counter("ollamarama_chat_errors", "Chat requests that failed", ["model"]))
+        self.prompt_tokens = self._add(
+            Counter("ollamarama_prompt_tokens", "Prompt tokens evaluated by Ollama", ["model"])
+        )
+        self.generated_tokens = self._add(
+            Counter("ollamarama_generated_tokens", "Tokens generated by Ollama", ["model"])
+        )
+        self.request_seconds = self._add(
+            Histogram(
+                "ollamarama_chat_request_seconds",
+                "Chat request latency until the final frame",
+                ["model"],
+                buckets=LATENCY_BUCKETS,
+            )
+        )
+        self.ttft_seconds = self._add(
+            Histogram(
+                "ollamarama_chat_first_token_seconds",
+                "Time to the first streamed chunk",
+                ["model"],
+                buckets=LATENCY_BUCKETS,
+            )
+        )
+        self.load_seconds = self._add(
+            Histogram(
+                "ollamarama_model_load_seconds",
+                "Model load time reported by Ollama",
+                ["model"],
+                buckets=LATENCY_BUCKETS,
+            )
+        )
+        self.tokens_per_second = self._add(
+            Histogram(
+                "ollamarama_generation_tokens_per_second",
+                "Generation speed reported by Ollama",
+                ["model"],
+                buckets=RATE_BUCKETS,
+            )
+        )
+        self.chunk_gap_seconds = self._add(
+            Histogram(
+                "ollamarama_stream_chunk_gap_seconds",
+                "Time between streamed chunks",
+                ["model"],
+                buckets=GAP_BUCKETS,
+            )
+        )
+        self.tool_calls = self._add(Counter("ollamarama_tool_calls", "Tool calls, cached ones included", ["tool"]))
+        self.tool_errors = self._add(Counter("ollamarama_tool_errors", "Tool calls that returned an error", ["tool"]))
+        self.tool_seconds = self._add(
+            Histogram(
+                "ollamarama_tool_call_seconds",
+                "Tool execution time (cache misses)",
+                ["tool"],
+                buckets=LATENCY_BUCKETS,
+            )
+        )
+        self.mcp_events = self._add(
+            Counter("ollamarama_mcp_events", "MCP server connections, refreshes and failures", ["server", "event"])
+        )
+        self.history_trimmed = self._add(
+            Counter("ollamarama_history_trimmed_messages", "Messages dropped to fit the context budget")
+        )
+        self.compactions = self._add(Counter("ollamarama_compactions", "Old turns replaced by a summary"))
+
+    def _add(self, metric: Any) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collect(
+        self, name: str, help: str, collect: Collect, *, labels: Sequence[str] = (), type: str = "gauge"
+    ) -> None:
+        """Export a value read at export time, e.g. a cache's hit count."""
+        self._add(Collected(name, help, labels, type=type, collect=collect))
+
+    # ---- recording ----
+    def observe_request(self, stats: GenerationStats) -> None:
+        model = stats.model
+        self.chat_requests.inc(model)
+        self.prompt_tokens.inc(model, amount=stats.prompt_tokens)
+        self.generated_tokens.inc(model, amount=stats.tokens)
+        self.request_seconds.observe(stats.latency, model)
+        if stats.ttft is not None:
+            self.ttft_seconds.observe(stats.ttft, model)
+        if stats.load > 0:
+            self.load_seconds.observe(stats.load, model)
+        if stats.eval > 0:
+            self.tokens_per_second.observe(stats.rate, model)
+        if stats.gaps:
+            self.chunk_gap_seconds.observe_many(stats.gaps, model)
+
+    def observe_tool(self, name: str, seconds: float, *, error: bool) -> None:
+        self.tool_seconds.observe(seconds, name)
+        if error:
+            self.tool_errors.inc(name)
+
+    # ---- export ----
+    def openmetrics(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.openmetrics())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "timestamp": time.time(),
+            "metrics": {name: metric.snapshot() for name, metric in list(self._metrics.items())},
+        }
+
+    def serve(self, host: str, port: int) -> Tuple[str, int]:
+        """Serve OpenMetrics text at http://host:port/metrics on a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.openmetrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        self._server = server
+        threading.Thread(target=server.serve_forever, name="ollamarama-metrics", daemon=True).start()
+        address = server.server_address
+        logging.info(f"Metrics served on http://{address[0]}:{address[1]}/metrics")
+        return address[0], address[1]
+
+    def write_file(self, path: str | Path, interval: float = 15.0) -> None:
+        """Write a JSON snapshot to ``path`` every ``interval`` seconds, and once more on close."""
+        target = Path(path)
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self._write(target)
+            self._write(target)
+
+        self._writer = threading.Thread(target=run, name="ollamarama-metrics-file", daemon=True)
+        self._writer.start()
+
+    def _write(self, path: Path) -> None:
+        try:
+            write_json_atomic(path, self.snapshot())
+        except Exception as e:
+            logging.warning(f"Writing metrics to {path} failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(5)
+            self._writer = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+__all__ = ["Counter", "Histogram", "Metrics"]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+
+def cache_dir() -> Path:
+    """Return the directory for on-disk caches.
+
+    Uses ``$OLLAMARAMA_CACHE_DIR`` when set, else ``$XDG_CACHE_HOME/ollamarama``
+    (``~/.cache/ollamarama``). The directory is created by the writers.
+    """
+    env = os.environ.get("OLLAMARAMA_CACHE_DIR")
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "ollamarama"
+
+
+def data_dir() -> Path:
+    """Return the directory for data worth keeping, such as saved conversations.
+
+    Uses ``$OLLAMARAMA_DATA_DIR`` when set, else ``$XDG_DATA_HOME/ollamarama``
+    (``~/.local/share/ollamarama``).
+    """
+    env = os.environ.get("OLLAMARAMA_DATA_DIR")
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+    return Path(base) / "ollamarama"
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON to ``path`` via a temp file so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -1,14 +1,33 @@
 from __future__ import annotations
 
-from rich.console import Console
-from rich.markdown import Markdown
+import re
+import time
+from typing import TYPE_CHECKING, List, Optional
 
+from rich.console import Console, Group, RenderableType
+from rich.segment import Segment, Segments
+from rich.text import Text
 
-def get_console() -> Console:
-    return Console(width=120, highlight=False)
+if TYPE_CHECKING:
+    from rich.markdown import Markdown
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_LIST_RE = re.compile(r"^ {0,3}([-*+]|\d{1,9}[.)])(\s|$)")
+
+
+def _is_blank(line: List[Segment]) -> bool:
+    return all(
+        not seg.text.strip() and not (seg.style and seg.style.bgcolor) for seg in line
+    )
+
+
+def get_console(*, stderr: bool = False) -> Console:
+    return Console(width=120, highlight=False, stderr=stderr)
 
 
 def print_markdown(console: Console, text: str) -> None:
+    from rich.markdown import Markdown
+
     console.print(Markdown(text, code_theme="monokai"), style="gold3")
 
 
@@ -27,3 +46,154 @@ def print_help(console: Console, path: str = "help.txt") -> None:
     except Exception as e:
         print_error(console, f"Failed to load help: {e}")
 
+
+class MarkdownStream:
+    """Incrementally render streamed Markdown for a Live display.
+
+    The text is split into top-level blocks as it arrives: a block ends at
+    the first content line after a blank line, or at the closing line of a
+    fenced code block. Finished blocks are rendered (and highlighted) once and
+    cached as segments; each frame only re-parses the unfinished tail.
+    Frames are built at most ``fps`` times a second rather than per chunk
+    (``due``) and painted by the Live display's own refresh, and
+    ``final()`` renders the whole text in one pass so the last frame is
+    identical to a plain ``Markdown`` of the full response.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        *,
+        code_theme: str = "monokai",
+        style: str = "gold3",
+        fps: float = 24.0,
+    ) -> None:
+        self.console = console
+        self.code_theme = code_theme
+        self.style = style
+        self._interval = 1.0 / fps if fps > 0 else 0.0
+        self._last_frame = 0.0
+        self._parts: List[str] = []
+        self._blocks: List[str] = []
+        self._rendered: List[Segments] = []
+        self._rendered_width: Optional[int] = None
+        # Unfinished text after the last block boundary and scan state for it
+        self._tail = ""
+        self._scan = 0
+        self._fence: Optional[str] = None
+        self._started = False
+        self._blank = False
+        self._list = False
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts[:] = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, text: str) -> None:
+        if not text:
+            return
+        self._parts.append(text)
+        self._tail += text
+        while True:
+            nl = self._tail.find("\n", self._scan)
+            if nl == -1:
+                break
+            start = self._scan
+            self._scan = nl + 1
+            self._scan_line(self._tail[start:nl], start)
+
+    def _scan_line(self, line: str, start: int) -> None:
+        if self._fence is not None:
+            m = _FENCE_RE.match(line)
+            if (
+                m
+                and m.group(1)[0] == self._fence[0]
+                and len(m.group(1)) >= len(self._fence)
+                and not line.strip()[len(m.group(1)):].strip()
+            ):
+                self._fence = None
+                self._finish(self._scan)
+            return
+
+        if not line.strip():
+            self._blank = self._started
+            return
+
+        if self._blank:
+            # Blank-separated list items stay together so numbering and
+            # spacing match the full render.
+            continues_list = self._list and (
+                _LIST_RE.match(line) is not None or line[:1] in (" ", "\t")
+            )
+            if not continues_list:
+                self._finish(start)
+                start = 0
+            self._blank = False
+
+        if not self._started:
+            self._started = True
+            self._list = _LIST_RE.match(line) is not None
+
+        m = _FENCE_RE.match(line)
+        if m:
+            self._fence = m.group(1)
+
+    def _finish(self, end: int) -> None:
+        block = self._tail[:end]
+        if block.strip():
+            self._blocks.append(block)
+        self._tail = self._tail[end:]
+        self._scan -= end
+        self._started = False
+        self._blank = False
+        self._list = False
+
+    def _markdown(self, text: str) -> Markdown:
+        # rich.markdown (markdown-it, pygments) is only imported on first render
+        from rich.markdown import Markdown
+
+        return Markdown(text, code_theme=self.code_theme, style=self.style)
+
+    def due(self) -> bool:
+        """Return True when the frame budget allows another repaint."""
+        return time.monotonic() - self._last_frame >= self._interval
+
+    def _render_block(self, text: str) -> Segments:
+        """Render a block to segments without its leading/trailing blank lines."""
+        lines = self.console.render_lines(self._markdown(text), self.console.options, pad=False)
+        while lines and _is_blank(lines[0]):
+            lines.pop(0)
+        while lines and _is_blank(lines[-1]):
+            lines.pop()
+        segments: List[Segment] = []
+        for line in lines:
+            segments.extend(line)
+            segments.append(Segment.line())
+        return Segments(segments)
+
+    def renderable(self) -> RenderableType:
+        """Build the current frame from cached blocks plus the live tail."""
+        width = self.console.width
+        if width != self._rendered_width:
+            self._rendered = []
+            self._rendered_width = width
+        for block in self._blocks[len(self._rendered):]:
+            self._rendered.append(self._render_block(block))
+
+        # Top-level elements are separated by exactly one blank line
+        items: List[RenderableType] = []
+        for segments in self._rendered:
+            if items:
+                items.append(Text())
+            items.append(segments)
+        if self._tail.strip():
+            if items:
+                items.append(Text())
+            items.append(self._render_block(self._tail))
+        self._last_frame = time.monotonic()
+        return Group(*items)
+
+    def final(self) -> Markdown:
+        return self._markdown(self.text)
@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from .cli import add_common_arguments, apply_overrides, grow_pool
+from .context import ContextWindow
+
+if TYPE_CHECKING:
+    from .app import App
+
+_SESSION_PATH = re.compile(r"^/sessions/([0-9a-f]{32})(/chat)?$")
+
+
+def resolve_model(app: App, name: str) -> Optional[str]:
+    """Return the model name for a key, full name or shortened name, or None if unknown."""
+    models = app.models
+    if name in models:
+        return models[name]
+    if name in models.values():
+        return name
+    short_to_full = {app._shorten_model_name(full): full for full in models}
+    if name in short_to_full:
+        return models[short_to_full[name]]
+    return None
+
+
+class ChatSession:
+    """One client's conversation: its own history, model and options.
+
+    ``lock`` is held for the whole of a turn, so a session answers one
+    message at a time while other sessions run in parallel.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        messages: ContextWindow,
+        *,
+        model: str,
+        options: Dict[str, Any],
+        tools: bool,
+    ) -> None:
+        self.id = session_id
+        self.messages = messages
+        self.model = model
+        self.options = options
+        self.tools = tools
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "model": self.model,
+            "options": self.options,
+            "tools": self.tools,
+            "tokens": self.messages.total,
+            "messages": list(self.messages),
+        }
+
+
+class SessionManager:
+    """In-memory sessions, least recently used first.
+
+    Sessions idle for longer than ``ttl`` seconds are dropped, and the
+    least recently used ones once there are more than ``max_sessions``;
+    both are checked whenever a session is created, so no sweeper thread
+    is needed.
+    """
+
+    def __init__(self, *, max_tokens: int, max_sessions: int = 256, ttl: float = 3600.0) -> None:
+        self.max_tokens = max_tokens
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(
+        self,
+        *,
+        system: str | None,
+        model: str,
+        options: Dict[str, Any],
+        tools: bool,
+    ) -> ChatSession:
+        messages = ContextWindow(self.max_tokens)
+        if system:
+            messages.append({"role": "system", "content": system})
+        session = ChatSession(uuid.uuid4().hex, messages, model=model, options=options, tools=tools)
+        with self._lock:
+            self._evict()
+            self._sessions[session.id] = session
+        logging.info(f"Server session {session.id} created ({model})")
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [
+            {"id": s.id, "model": s.model, "messages": len(s.messages), "tokens": s.messages.total}
+            for s in reversed(sessions)
+        ]
+
+    def _evict(self) -> None:
+        expired = time.monotonic() - self.ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= expired and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
+            logging.info(f"Server session {session_id} evicted")
+
+
+class ClientGone(Exception):
+    """The HTTP client disconnected while a reply was streaming."""
+
+
+class ChatServer(ThreadingHTTPServer):
+    """HTTP front end for one App, shared by every session.
+
+    Each connection gets a thread; all of them use the app's pooled
+    OllamaClient, MCP client, tool runner and tool cache. At most
+    ``concurrency`` turns run against Ollama at once, the rest wait for a
+    slot, so a burst of clients cannot open unbounded upstream requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        app: App,
+        *,
+        concurrency: int = 8,
+        max_sessions: int = 256,
+        session_ttl: float = 3600.0,
+    ) -> None:
+        self.app = app
+        self.concurrency = max(1, int(concurrency))
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self.sessions = SessionManager(
+            max_tokens=app.config.context.max_tokens, max_sessions=max_sessions, ttl=session_ttl
+        )
+        app.metrics.collect(
+            "ollamarama_server_sessions", "Open server sessions", lambda: [((), len(self.sessions))]
+        )
+        super().__init__(address, ChatHandler)
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """JSON API; replies stream as chunked JSON lines (application/x-ndjson).
+
+    GET    /health                 {"status": "ok", ...}
+    GET    /models                 model keys to names
+    GET    /sessions               sessions, most recently used first
+    POST   /sessions               {"persona"|"system", "model", "options", "tools"} -> the session
+    GET    /sessions/<id>          the session with its messages
+    DELETE /sessions/<id>
+    POST   /sessions/<id>/chat     {"message", "stream"}: one turn in the session
+    POST   /chat                   {"prompt"|"messages", "system", "model", "options", "tools", "stream"}
+                                   one turn without keeping any history
+
+    Streamed events are {"type": "delta", "content"}, {"type": "tool_call",
+    "name", "arguments"}, then {"type": "done", "response", "usage"} or
+    {"type": "error", "error"}. With "stream": false the done event's fields
+    come back as one JSON object.
+    """
+
+    server: ChatServer
+    protocol_version = "HTTP/1.1"
+    server_version = "ollamarama"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"Server: {self.address_string()} {format % args}")
+
+    # ---- responses ----
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _start_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _send_event(self, event: Dict[str, Any]) -> None:
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        except OSError as e:
+            raise ClientGone(str(e)) from e
+
+    def _end_stream(self) -> None:
+        try:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except OSError:
+            self.close_connection = True
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        except ValueError:
+            self._error(400, "Request body must be JSON")
+            return None
+        if not isinstance(body, dict):
+            self._error(400, "Request body must be a JSON object")
+            return None
+        return body
+
+    # ---- routes ----
+    def do_GET(self) -> None:
+        app = self.server.app
+        if self.path == "/health":
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "model": app.model,
+                    "sessions": len(self.server.sessions),
+                    "tools": len(app._tools_schema) if app.tools_enabled else 0,
+                    "backends": [backend.to_dict() for backend in app.client.backends.backends],
+                    "stats": app.stats.summary(),
+                },
+            )
+        elif self.path == "/models":
+            self._send_json(200, app.models)
+        elif self.path == "/sessions":
+            self._send_json(200, self.server.sessions.list())
+        else:
+            match = _SESSION_PATH.match(self.path)
+            session = self.server.sessions.get(match.group(1)) if match and not match.group(2) else None
+            if session is None:
+                self._error(404, "Not found")
+            else:
+                self._send_json(200, session.to_dict())
+
+    def do_DELETE(self) -> None:
+        match = _SESSION_PATH.match(self.path)
+        if match and not match.group(2) and self.server.sessions.delete(match.group(1)):
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self._error(404, "Not found")
+
+    def do_POST(self) -> None:
+        body = self._read_json()
+        if body is None:
+            return
+        if self.path == "/sessions":
+            self._create_session(body)
+            return
+        if self.path == "/chat":
+            self._chat_once(body)
+            return
+        match = _SESSION_PATH.match(self.path)
+        if not match or not match.group(2):
+            self._error(404, "Not found")
+            return
+        session = self.server.sessions.get(match.group(1))
+        if session is None:
+            self._error(404, "No such session")
+            return
+        self._chat(session, body)
+
+    def _settings(self, body: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any], bool]]:
+        """Model, options and tools for a request, or None after replying with an error."""
+        app = self.server.app
+        model = app.model
+        if body.get("model"):
+            resolved = resolve_model(app, str(body["model"]))
+            if resolved is None:
+                self._error(400, f"Unknown model: {body['model']}")
+                return None
+            model = resolved
+        options = dict(app.options)
+        if body.get("options") is not None:
+            if not isinstance(body["options"], dict):
+                self._error(400, '"options" must be an object')
+                return None
+            options.update(body["options"])
+        tools = bool(body.get("tools", app.tools_enabled)) and bool(app._tools_schema)
+        return model, options, tools
+
+    def _create_session(self, body: Dict[str, Any]) -> None:
+        app = self.server.app
+        settings = self._settings(body)
+        if settings is None:
+            return
+        model, options, tools = settings
+        if body.get("system") is not None:
+            system = str(body["system"])
+        else:
+            # An empty persona is stock mode, without a system prompt
+            persona = app.personality if body.get("persona") is None else str(body["persona"])
+            system = app._persona_prompt(persona) if persona else ""
+        session = self.server.sessions.create(system=system, model=model, options=options, tools=tools)
+        self._send_json(201, session.to_dict())
+
+    def _chat(self, session: ChatSession, body: Dict[str, Any]) -> None:
+        message = body.get("message")
+        if not isinstance(message, str) or not message.strip():
+            self._error(400, 'Request needs a "message" string')
+            return
+        if not session.lock.acquire(blocking=False):
+            self._error(409, "The session is answering another message")
+            return
+        window = session.messages
+        history = list(window)
+        window.append({"role": "user", "content": message})
+        # Tool definitions share the context window with the history
+        dropped = window.trim(self.server.app._tools_tokens if session.tools else 0)
+        finished = False
+
+        def finish(reply: Optional[str]) -> None:
+            # Runs before the reply goes out, so the client's next message sees it and finds the session free
+            nonlocal finished
+            finished = True
+            try:
+                if reply is not None:
+                    window.append({"role": "assistant", "content": reply})
+                elif dropped:
+                    # Failed or abandoned: leave the history as it was, turns trimmed for it included
+                    window.clear()
+                    window.extend(history)
+                elif window and window[-1].get("role") == "user":
+                    window.pop()
+            finally:
+                session.lock.release()
+
+        try:
+            self._turn(
+                list(window),
+                body,
+                model=session.model,
+                options=session.options,
+                tools=session.tools,
+                extra={"session": session.id},
+                finish=finish,
+            )
+        finally:
+            if not finished:
+                finish(None)
+
+    def _chat_once(self, body: Dict[str, Any]) -> None:
+        from .batch import record_messages
+
+        settings = self._settings(body)
+        if settings is None:
+            return
+        model, options, tools = settings
+        try:
+            messages = record_messages(self.server.app, body)
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        self._turn(messages, body, model=model, options=options, tools=tools)
+
+    def _turn(
+        self,
+        messages: List[Dict[str, Any]],
+        body: Dict[str, Any],
+        *,
+        model: str,
+        options: Dict[str, Any],
+        tools: bool,
+        extra: Optional[Dict[str, Any]] = None,
+        finish: Optional[Callable[[Optional[str]], None]] = None,
+    ) -> Optional[str]:
+        """Answer ``messages`` and send the reply; returns it, or None if it failed.
+
+        ``finish`` gets the reply (None on failure) before the end of the
+        response is sent.
+        """
+        finish = finish or (lambda reply: None)
+        app = self.server.app
+        stream = bool(body.get("stream", True))
+        if stream:
+            self._start_stream()
+        started = time.perf_counter()
+        try:
+            with self.server.slots:
+                reply, usage = app.complete(
+                    messages,
+                    tools=tools,
+                    model=model,
+                    options=options,
+                    on_event=self._send_event if stream else None,
+                )
+        except ClientGone:
+            logging.info("Server: client disconnected mid-reply")
+            finish(None)
+            self.close_connection = True
+            return None
+        except Exception as e:
+            logging.exception("Server turn failed")
+            finish(None)
+            if stream:
+                try:
+                    self._send_event({"type": "error", "error": str(e) or type(e).__name__})
+                    self._end_stream()
+                except ClientGone:
+                    self.close_connection = True
+            else:
+                self._error(502, str(e) or type(e).__name__)
+            return None
+        result: Dict[str, Any] = {
+            **(extra or {}),
+            "response": reply,
+            "model": model,
+            "usage": usage,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        finish(reply)
+        if stream:
+            try:
+                self._send_event({"type": "done", **result})
+            except ClientGone:
+                self.close_connection = True
+            self._end_stream()
+        else:
+            self._send_json(200, result)
+        return reply
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="ollamarama serve",
+        description=(
+            "Serve chat over HTTP: each client session keeps its own history, and replies stream as JSON lines. "
+            "Sessions share one pooled Ollama client and the MCP servers."
+        ),
+    )
+    parser.add_argument("--host", help="Address to listen on (default from config.json, 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Port to listen on (default from config.json, 8765)")
+    parser.add_argument(
+        "-j", "--concurrency", type=int, help="Replies generated at once; others wait (default 8)"
+    )
+    parser.add_argument("--no-tools", dest="tools", action="store_false", help="Disable tool calling")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from .app import App
+
+    app = App(interactive=False)
+    if not apply_overrides(app, args):
+        sys.exit(2)
+    options = app.config.server
+    concurrency = args.concurrency or options.concurrency
+    grow_pool(app, concurrency)
+    if args.tools:
+        app.load_mcp_servers()
+    else:
+        app.tools_enabled = False
+    app.warm_up(app._persona_prompt(app.personality) if app.personality else None)
+    app.start_metrics()
+
+    try:
+        server = ChatServer(
+            (args.host or options.host, args.port or options.port),
+            app,
+            concurrency=concurrency,
+            max_sessions=options.max_sessions,
+            session_ttl=options.session_ttl,
+        )
+    except OSError as e:
+        app.console.print(f"[red]Cannot listen[/]: {e}")
+        app.shutdown()
+        sys.exit(1)
+    host, port = server.server_address[:2]
+    app.console.print(f"Serving {app.model} on http://{host}:{port} (Ctrl+C to stop)", style="green")
+    logging.info(f"Server listening on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        app.shutdown()
+
+
+__all__ = ["ChatServer", "ChatSession", "SessionManager", "main", "resolve_model"]
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from typing import List, Tuple
+
+
+class StartupProfile:
+    """Wall-clock time of each start-up phase, for ``--startup-profile``.
+
+    ``mark(name)`` closes the phase that ran since the previous mark, so
+    instrumenting a sequence of steps costs one line per step.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+
+    def reset(self) -> None:
+        self.started = self._last = time.perf_counter()
+        self.phases.clear()
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self) -> str:
+        width = max((len(name) for name, _ in self.phases), default=0)
+        lines = [f"{name:<{width}}  {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"{'total':<{width}}  {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+PROFILE = StartupProfile()
+
+__all__ = ["PROFILE", "StartupProfile"]
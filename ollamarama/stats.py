@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+# Ollama reports durations in nanoseconds
+_NS = 1e9
+# Requests (and chunk gaps) kept for the percentiles
+_WINDOW = 1000
+_GAP_WINDOW = 20000
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Return the ``p``-th percentile (0-100) of ``values``, interpolating between ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class GenerationStats:
+    """Timings and token counts of one chat request.
+
+    Token counts and the load/prompt/eval durations come from Ollama's
+    final ``done`` frame (converted to seconds). ``ttft`` (time to the
+    first content chunk), ``latency`` (until the done frame) and the gaps
+    between chunks are measured by the client; ``ttft`` is None for
+    requests that were not streamed.
+    """
+
+    model: str = ""
+    backend: str = ""
+    prompt_tokens: int = 0
+    tokens: int = 0
+    load: float = 0.0
+    prompt_eval: float = 0.0
+    eval: float = 0.0
+    total: float = 0.0
+    ttft: Optional[float] = None
+    latency: float = 0.0
+    gaps: List[float] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def from_done(cls, done: Dict[str, Any], **measured: Any) -> "GenerationStats":
+        def seconds(key: str) -> float:
+            return float(done.get(key) or 0) / _NS
+
+        values: Dict[str, Any] = {
+            "model": str(done.get("model") or ""),
+            "prompt_tokens": int(done.get("prompt_eval_count") or 0),
+            "tokens": int(done.get("eval_count") or 0),
+            "load": seconds("load_duration"),
+            "prompt_eval": seconds("prompt_eval_duration"),
+            "eval": seconds("eval_duration"),
+            "total": seconds("total_duration"),
+        }
+        values.update(measured)
+        return cls(**values)
+
+    @property
+    def rate(self) -> float:
+        """Generated tokens per second, as timed by Ollama."""
+        return self.tokens / self.eval if self.eval > 0 else 0.0
+
+    @property
+    def prompt_rate(self) -> float:
+        return self.prompt_tokens / self.prompt_eval if self.prompt_eval > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "backend": self.backend,
+            "prompt_tokens": self.prompt_tokens,
+            "tokens": self.tokens,
+            "load": round(self.load, 4),
+            "prompt_eval": round(self.prompt_eval, 4),
+            "eval": round(self.eval, 4),
+            "ttft": None if self.ttft is None else round(self.ttft, 4),
+            "latency": round(self.latency, 4),
+            "rate": round(self.rate, 2),
+            "prompt_rate": round(self.prompt_rate, 2),
+            "gap_p50": round(percentile(self.gaps, 50), 4),
+            "gap_p95": round(percentile(self.gaps, 95), 4),
+        }
+
+    def summary(self) -> str:
+        """One line for the status line, e.g. ``120 tokens · 42.1 tok/s · first token 0.35s``."""
+        parts = [f"{self.tokens} tokens", f"{self.rate:.1f} tok/s"]
+        if self.ttft is not None:
+            parts.append(f"first token {self.ttft:.2f}s")
+        if self.load >= 0.1:
+            parts.append(f"load {self.load:.1f}s")
+        return " · ".join(parts)
+
+
+class StatsRecorder:
+    """Collects GenerationStats from every request a client makes.
+
+    Totals cover the whole session; percentiles use the latest 1000
+    requests (and their chunk gaps). ``begin_turn`` starts a new "last
+    turn": requests made afterwards from the same thread belong to it, so
+    background work such as compaction or warm-up does not. Safe to call
+    from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._recent: Deque[GenerationStats] = deque(maxlen=_WINDOW)
+        self._gaps: Deque[float] = deque(maxlen=_GAP_WINDOW)
+        self._turn: List[GenerationStats] = []
+        self._turn_thread: Optional[int] = None
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.tokens = 0
+
+    def begin_turn(self) -> None:
+        with self._lock:
+            self._turn = []
+            self._turn_thread = threading.get_ident()
+
+    def record(self, stats: GenerationStats) -> None:
+        with self._lock:
+            self._recent.append(stats)
+            self._gaps.extend(stats.gaps)
+            self.requests += 1
+            self.prompt_tokens += stats.prompt_tokens
+            self.tokens += stats.tokens
+            if threading.get_ident() == self._turn_thread:
+                self._turn.append(stats)
+
+    @property
+    def last_turn(self) -> List[GenerationStats]:
+        """Requests of the latest turn (one per tool round)."""
+        with self._lock:
+            return list(self._turn)
+
+    def summary(self) -> Dict[str, Any]:
+        """Session totals and p50/p95 of speed, time to first token, latency and chunk gaps."""
+        with self._lock:
+            recent = list(self._recent)
+            gaps = list(self._gaps)
+            totals = {"requests": self.requests, "prompt_tokens": self.prompt_tokens, "tokens": self.tokens}
+        rates = [s.rate for s in recent if s.eval > 0]
+        ttfts = [s.ttft for s in recent if s.ttft is not None]
+        latencies = [s.latency for s in recent]
+        return {
+            **totals,
+            "rate": {"p50": percentile(rates, 50), "p95": percentile(rates, 95)},
+            "ttft": {"p50": percentile(ttfts, 50), "p95": percentile(ttfts, 95)},
+            "latency": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95)},
+            "gap": {"p50": percentile(gaps, 50), "p95": percentile(gaps, 95)},
+        }
+
+
+__all__ = ["GenerationStats", "StatsRecorder", "percentile"]
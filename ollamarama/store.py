@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    model TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS messages_session_seq ON messages(session_id, seq);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated);
+"""
+
+# Full-text index over message content, kept in step by _append. It is an
+# external-content table, so the text itself is only stored once.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+_TITLE_LENGTH = 60
+# Marks the matched terms in search snippets
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+_SNIPPET_TOKENS = 12
+_SNIPPET_CHARS = 80
+
+_Op = Tuple[Callable[..., Any], Tuple[Any, ...], Future]
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=10, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the UI thread read while the writer appends; NORMAL only
+    # fsyncs at checkpoints, which is durable enough for chat history
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class SessionStore:
+    """Conversations persisted in SQLite, written by one background thread.
+
+    Every write is queued to a writer thread that drains the queue into a
+    single transaction, so callers (the UI thread, mid-stream) never wait on
+    disk. Each message is inserted once, when it is final. Reads use a
+    separate connection per thread and only touch the rows they need:
+    listing reads the sessions table, resuming reads one session's messages
+    through the (session_id, seq) index.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = _connect(self.path)
+        try:
+            conn.executescript(_SCHEMA)
+            self.fts = self._init_fts(conn)
+        finally:
+            conn.close()
+        self._queue: "queue.Queue[Optional[_Op]]" = queue.Queue()
+        self._local = threading.local()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="ollamarama-store", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _init_fts(conn: sqlite3.Connection) -> bool:
+        """Create the search index if SQLite has FTS5; returns whether it does."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            with conn:
+                conn.executescript(_FTS_SCHEMA)
+                # Index messages saved before the index existed
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            logging.info(f"SQLite FTS5 unavailable, search will scan messages: {e}")
+            return False
+        return True
+
+    # ---- writer thread ----
+    def _run(self) -> None:
+        conn = _connect(self.path)
+        stop = False
+        while not stop:
+            batch: List[_Op] = []
+            item = self._queue.get()
+            while item is not None:
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if item is None:
+                stop = True
+            results: List[Tuple[Future, Any, Optional[BaseException]]] = []
+            try:
+                with conn:
+                    for func, args, future in batch:
+                        try:
+                            results.append((future, func(conn, *args), None))
+                        except Exception as e:
+                            logging.warning(f"Session store write failed: {e}")
+                            results.append((future, None, e))
+            except sqlite3.Error as e:
+                logging.warning(f"Session store commit failed: {e}")
+                results = [(future, None, e) for _, _, future in batch]
+            # Resolve only after the commit so readers see what was written
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+        conn.close()
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("Session store is closed"))
+        else:
+            self._queue.put((func, args, future))
+        return future
+
+    @staticmethod
+    def _create(conn: sqlite3.Connection, model: str, title: str, now: float) -> int:
+        cur = conn.execute(
+            "INSERT INTO sessions (created, updated, model, title) VALUES (?, ?, ?, ?)",
+            (now, now, model, title),
+        )
+        return int(cur.lastrowid)
+
+    def _append(self, conn: sqlite3.Connection, session_id: int, role: str, content: str, now: float) -> int:
+        row = conn.execute("SELECT message_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No session {session_id}")
+        seq = row["message_count"] + 1
+        cur = conn.execute(
+            "INSERT INTO messages (session_id, seq, role, content, created) VALUES (?, ?, ?, ?, ?)",
+            (session_id, seq, role, content, now),
+        )
+        conn.execute(
+            "UPDATE sessions SET message_count = ?, updated = ? WHERE id = ?", (seq, now, session_id)
+        )
+        if self.fts:
+            conn.execute("INSERT INTO messages_fts(rowid, content) VALUES (?, ?)", (cur.lastrowid, content))
+        return int(cur.lastrowid)
+
+    # ---- public API ----
+    def create_session(self, model: str = "", title: str = "") -> int:
+        """Start a session and return its id (waits for the writer, a few ms)."""
+        title = " ".join(title.split())[:_TITLE_LENGTH]
+        return self._submit(self._create, model, title, time.time()).result()
+
+    def append(self, session_id: int, message: Dict[str, Any]) -> Future:
+        """Queue one finished message for writing; returns without waiting."""
+        return self._submit(
+            self._append,
+            session_id,
+            str(message.get("role") or ""),
+            str(message.get("content") or ""),
+            time.time(),
+        )
+
+    def flush(self) -> None:
+        """Wait until every queued write is committed."""
+        if not self._closed:
+            self._queue.join()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def list_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the most recently updated sessions that have messages."""
+        self.flush()
+        rows = self._reader().execute(
+            "SELECT id, created, updated, model, title, message_count FROM sessions "
+            "WHERE message_count > 0 ORDER BY updated DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_session(self) -> Optional[int]:
+        sessions = self.list_sessions(limit=1)
+        return sessions[0]["id"] if sessions else None
+
+    def get_session(self, session_id: int) -> Optional[Dict[str, Any]]:
+        self.flush()
+        row = self._reader().execute(
+            "SELECT id, created, updated, model, title, message_count FROM sessions WHERE id = ?",
+            (session_id,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def load_messages(self, session_id: int) -> List[Dict[str, str]]:
+        """Return one session's messages in order, as chat messages."""
+        self.flush()
+        rows = self._reader().execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        return [{"role": row["role"], "content": row["content"]} for row in rows]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find messages matching every word of ``query``, best matches first.
+
+        Words are matched as whole tokens, case- and accent-insensitively; a
+        trailing ``*`` matches a prefix. Each hit carries its session id,
+        message number (``seq``), role, the session title and a snippet with
+        the matches wrapped in MATCH_START/MATCH_END. Ranking is FTS5's bm25;
+        without FTS5 a slower substring scan returns the newest hits.
+        """
+        words = query.split()
+        if not words:
+            return []
+        self.flush()
+        if not self.fts:
+            return self._scan(words, limit)
+        terms = []
+        for word in words:
+            prefix = word.endswith("*") and len(word) > 1
+            word = word.rstrip("*")
+            # Quote every word so FTS5 operators and punctuation are literal
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+        rows = self._reader().execute(
+            "SELECT m.session_id, m.seq, m.role, m.created, s.title, "
+            f"snippet(messages_fts, 0, ?, ?, '…', {_SNIPPET_TOKENS}) AS snippet "
+            "FROM messages_fts "
+            "JOIN messages m ON m.id = messages_fts.rowid "
+            "JOIN sessions s ON s.id = m.session_id "
+            "WHERE messages_fts MATCH ? ORDER BY bm25(messages_fts) LIMIT ?",
+            (MATCH_START, MATCH_END, " ".join(terms), limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _scan(self, words: List[str], limit: int) -> List[Dict[str, Any]]:
+        # A bare "*" would match every message
+        words = [word.rstrip("*") for word in words if word.rstrip("*")]
+        if not words:
+            return []
+
+        def escape(word: str) -> str:
+            return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+        where = " AND ".join("m.content LIKE ? ESCAPE '\\'" for _ in words)
+        rows = self._reader().execute(
+            "SELECT m.session_id, m.seq, m.role, m.created, s.title, m.content "
+            "FROM messages m JOIN sessions s ON s.id = m.session_id "
+            f"WHERE {where} ORDER BY m.id DESC LIMIT ?",
+            (*(f"%{escape(w)}%" for w in words), limit),
+        ).fetchall()
+        pattern = re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+        hits: List[Dict[str, Any]] = []
+        for row in rows:
+            hit = dict(row)
+            content = hit.pop("content")
+            match = pattern.search(content)
+            start = max(0, match.start() - _SNIPPET_CHARS // 2) if match else 0
+            text = content[start : start + _SNIPPET_CHARS]
+            hit["snippet"] = ("…" if start else "") + pattern.sub(
+                lambda m: MATCH_START + m.group(0) + MATCH_END, text
+            ) + ("…" if start + _SNIPPET_CHARS < len(content) else "")
+            hits.append(hit)
+        return hits
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Commit pending writes and stop the writer thread."""
+        self._closed = True
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout)
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+__all__ = ["MATCH_END", "MATCH_START", "SessionStore"]
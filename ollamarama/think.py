@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+_OPEN = "<think>"
+_CLOSE = "</think>"
+# ASCII-only case folding: unlike str.lower() it never changes the text's length
+_CLOSE_RE = re.compile(re.escape(_CLOSE), re.IGNORECASE | re.ASCII)
+
+# Filter states
+_START = 0  # before any visible content: looking for a leading <think>
+_THINK = 1  # inside the think block: looking for </think>
+_AFTER = 2  # just after </think>: dropping leading whitespace
+_PASS = 3  # everything else is visible
+
+
+class ThinkFilter:
+    """Streaming filter that hides a leading <think>...</think> block.
+
+    Feed chunks as they arrive; ``feed`` returns the newly visible text.
+    Tags are matched case-insensitively and may be split across chunks. Each
+    character is examined once and visible text is kept as a list of chunks,
+    so the cost is linear in the length of the stream.
+
+    - If the text (ignoring leading whitespace) starts with <think>, nothing
+      is visible until the first </think>; whitespace after it is dropped.
+    - If the block is never closed, ``hidden`` stays True and callers should
+      treat the visible text as empty.
+    - Otherwise the text passes through unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._state = _START
+        self._pending: List[str] = []
+        self._matched = 0
+        self._visible: List[str] = []
+
+    @property
+    def hidden(self) -> bool:
+        return self._state == _THINK
+
+    @property
+    def text(self) -> str:
+        if len(self._visible) > 1:
+            self._visible[:] = ["".join(self._visible)]
+        return self._visible[0] if self._visible else ""
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        if self._state == _PASS:
+            return self._emit(chunk)
+        if self._state == _START:
+            return self._feed_start(chunk)
+        if self._state == _THINK:
+            return self._feed_think(chunk)
+        return self._feed_after(chunk)
+
+    def finish(self) -> str:
+        """Flush text held back while deciding whether a think block starts."""
+        if self._state == _START and self._pending:
+            self._state = _PASS
+            pending = "".join(self._pending)
+            self._pending = []
+            return self._emit(pending)
+        return ""
+
+    def _emit(self, text: str) -> str:
+        if text:
+            self._visible.append(text)
+        return text
+
+    def _feed_start(self, chunk: str) -> str:
+        for i, c in enumerate(chunk):
+            if self._matched == 0 and c.isspace():
+                self._pending.append(c)
+                continue
+            if c.lower() == _OPEN[self._matched]:
+                self._matched += 1
+                self._pending.append(c)
+                if self._matched == len(_OPEN):
+                    self._state = _THINK
+                    self._pending = []
+                    self._matched = 0
+                    return self._feed_think(chunk[i + 1:])
+                continue
+            # Not a think block: release what was held back and pass through
+            self._state = _PASS
+            pending = "".join(self._pending)
+            self._pending = []
+            return self._emit(pending + chunk[i:])
+        return ""
+
+    def _feed_think(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        # Prefix with the part of </think> matched at the end of the last chunk
+        window = _CLOSE[:self._matched] + chunk
+        match = _CLOSE_RE.search(window)
+        if match:
+            self._state = _AFTER
+            self._matched = 0
+            return self._feed_after(window[match.end():])
+        self._matched = 0
+        for k in range(min(len(_CLOSE) - 1, len(window)), 0, -1):
+            if _CLOSE_RE.match(window[-k:] + _CLOSE[k:]):
+                self._matched = k
+                break
+        return ""
+
+    def _feed_after(self, chunk: str) -> str:
+        rest = chunk.lstrip()
+        if not rest:
+            return ""
+        self._state = _PASS
+        return self._emit(rest)
+
+
+def strip_think(text: str) -> str:
+    """Return the visible part of a complete response (see ThinkFilter)."""
+    f = ThinkFilter()
+    visible = f.feed(text)
+    visible += f.finish()
+    return "" if f.hidden else visible
+
+
+__all__ = ["ThinkFilter", "strip_think"]
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ToolCall = Tuple[str, Dict[str, Any]]
+StatusCallback = Callable[[int, str], None]
+
+
+def parse_tool_call(call: Dict[str, Any]) -> ToolCall:
+    """Return (name, arguments) for an Ollama tool call.
+
+    Arguments may arrive as a dict or as stringified JSON; anything that
+    cannot be parsed becomes an empty dict.
+    """
+    func = call.get("function") or {}
+    name = func.get("name") or ""
+    raw_args = func.get("arguments")
+    try:
+        if isinstance(raw_args, str):
+            args = json.loads(raw_args) if raw_args.strip() else {}
+        elif isinstance(raw_args, dict):
+            args = raw_args
+        else:
+            args = {}
+    except Exception:
+        args = {}
+    if not isinstance(args, dict):
+        args = {}
+    return name, args
+
+
+def preview_call(name: str, args: Dict[str, Any], limit: int = 120) -> str:
+    try:
+        preview = json.dumps(args, ensure_ascii=False)
+    except Exception:
+        return name
+    if len(preview) > limit:
+        preview = preview[: limit - 3] + "..."
+    return f"{name} {preview}"
+
+
+class _SerialLock:
+    """Shared by ordinary calls, exclusive for serial ones.
+
+    A serial call waits for the calls running in other turns to finish and
+    holds off new ones meanwhile, so it cannot be starved.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._cond:
+            while self._exclusive or self._waiting:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                if not self._shared:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+class ToolRunner:
+    """Run the tool calls of one assistant turn on a bounded thread pool.
+
+    Independent calls run concurrently; results are returned in the order
+    of the calls. Tools named in ``serial`` (e.g. ones with side effects)
+    never overlap with any other call: the batch is split around them and
+    they run alone, in order. One runner may serve several turns at once
+    (batch runs, the server), so a serial call also waits for the calls of
+    other turns, and theirs wait for it.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str, Dict[str, Any]], str],
+        *,
+        max_workers: int = 4,
+        serial: Iterable[str] = (),
+    ) -> None:
+        self._execute = execute
+        self.max_workers = max(1, int(max_workers))
+        self.serial = set(serial)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._serial_lock = _SerialLock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ollamarama-tool"
+                )
+            return self._pool
+
+    def _call(self, index: int, call: ToolCall, on_status: Optional[StatusCallback]) -> str:
+        if on_status:
+            on_status(index, "running")
+        try:
+            result = self._execute(call[0], call[1])
+        except Exception as e:
+            result = json.dumps({"error": f"Tool execution error for {call[0]}: {e}"}, ensure_ascii=False)
+        if on_status:
+            on_status(index, "done")
+        return result
+
+    def run(self, calls: List[ToolCall], on_status: Optional[StatusCallback] = None) -> List[str]:
+        results: List[str] = [""] * len(calls)
+        batch: List[int] = []
+
+        def flush() -> None:
+            if not batch:
+                return
+            with self._serial_lock.shared():
+                if len(batch) == 1 or self.max_workers == 1:
+                    for i in batch:
+                        results[i] = self._call(i, calls[i], on_status)
+                else:
+                    pool = self._get_pool()
+                    futures: List[Tuple[int, Future]] = [
+                        (i, pool.submit(self._call, i, calls[i], on_status)) for i in batch
+                    ]
+                    for i, fut in futures:
+                        results[i] = fut.result()
+            batch.clear()
+
+        for i, (name, _) in enumerate(calls):
+            if name in self.serial:
+                flush()
+                with self._serial_lock.exclusive():
+                    results[i] = self._call(i, calls[i], on_status)
+            else:
+                batch.append(i)
+        flush()
+        return results
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+__all__ = ["ToolRunner", "parse_tool_call", "preview_call"]
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_SESSION: Optional[requests.Session] = None
+_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the pooled HTTP session shared by the bundled tools.
+
+    Keeping one session means repeat calls to the same host (geocoding,
+    forecasts, fetched sites) reuse open keep-alive connections, including
+    from the parallel tool runner threads.
+    """
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "ollamarama"
+            _SESSION = session
+        return _SESSION
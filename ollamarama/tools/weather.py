@@ -1,9 +1,92 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
 
 import requests
 
+from ..cache import TTLCache
+from ..paths import cache_dir, write_json_atomic
+from ._http import get_session
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Current conditions change slowly; share them briefly between calls
+FORECAST_TTL = 300.0
+_FORECASTS = TTLCache(max_entries=128)
+
+_GEOCODE_LOCK = threading.Lock()
+_GEOCODES: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def _endpoint(env: str, default: str) -> str:
+    # Read on every call, so a local stand-in server (e.g. in tests) can be swapped in at any time
+    return os.environ.get(env) or default
+
+
+def _geocode_path():
+    return cache_dir() / "geocode.json"
+
+
+def _normalize_city(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+
+def _load_geocodes() -> Dict[str, Dict[str, Any]]:
+    global _GEOCODES
+    if _GEOCODES is None:
+        try:
+            with _geocode_path().open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            _GEOCODES = data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            _GEOCODES = {}
+    return _GEOCODES
+
+
+def _geocode(city: str) -> Optional[Dict[str, Any]]:
+    """Resolve a city to name/country/lat/lon, using the on-disk cache first.
+
+    Coordinates never change, so successful lookups are kept forever in
+    geocode.json under the cache directory. Misses are not cached.
+    """
+    key = _normalize_city(city)
+    with _GEOCODE_LOCK:
+        hit = _load_geocodes().get(key)
+    if hit is not None:
+        return hit
+
+    geo = get_session().get(
+        _endpoint("OLLAMARAMA_GEOCODING_URL", GEOCODING_URL),
+        params={"name": city, "count": 1},
+        timeout=20,
+    )
+    geo.raise_for_status()
+    data = geo.json() or {}
+    results = data.get("results") or []
+    if not results:
+        return None
+    r0 = results[0]
+    place = {
+        "name": r0.get("name") or city,
+        "country": r0.get("country") or "",
+        "latitude": r0.get("latitude"),
+        "longitude": r0.get("longitude"),
+    }
+    if place["latitude"] is None or place["longitude"] is None:
+        return place
+    with _GEOCODE_LOCK:
+        geocodes = _load_geocodes()
+        geocodes[key] = place
+        try:
+            write_json_atomic(_geocode_path(), geocodes)
+        except OSError:
+            pass
+    return place
+
 
 def _units_map(units: str) -> Dict[str, str]:
     u = (units or "metric").lower()
@@ -44,38 +127,35 @@ def get_weather(city: str, units: str = "metric") -> Dict[str, Any]:
         return {"error": "Invalid 'city' argument; expected a non-empty string."}
 
     try:
-        geo = requests.get(
-            "https://geocoding-api.open-meteo.com/v1/search",
-            params={"name": city, "count": 1},
-            timeout=20,
-        )
-        geo.raise_for_status()
-        data = geo.json() or {}
-        results = data.get("results") or []
-        if not results:
+        place = _geocode(city)
+        if place is None:
             return {"error": f"City not found: {city}"}
-        r0 = results[0]
-        name = r0.get("name") or city
-        country = r0.get("country") or ""
-        lat = r0.get("latitude")
-        lon = r0.get("longitude")
+        name = place["name"]
+        country = place["country"]
+        lat = place["latitude"]
+        lon = place["longitude"]
         if lat is None or lon is None:
             return {"error": f"Failed to geocode: {city}"}
 
         unit_params = _units_map(units)
-        wx = requests.get(
-            "https://api.open-meteo.com/v1/forecast",
-            params={
-                "latitude": lat,
-                "longitude": lon,
-                "current_weather": True,
-                **unit_params,
-            },
-            timeout=20,
-        )
-        wx.raise_for_status()
-        wdata = wx.json() or {}
-        cw = (wdata.get("current_weather") or {})
+        forecast_key = (lat, lon, unit_params["temperature_unit"])
+        cw = _FORECASTS.get(forecast_key)
+        if cw is None:
+            wx = get_session().get(
+                _endpoint("OLLAMARAMA_FORECAST_URL", FORECAST_URL),
+                params={
+                    "latitude": lat,
+                    "longitude": lon,
+                    "current_weather": True,
+                    **unit_params,
+                },
+                timeout=20,
+            )
+            wx.raise_for_status()
+            wdata = wx.json() or {}
+            cw = (wdata.get("current_weather") or {})
+            if cw:
+                _FORECASTS.set(forecast_key, cw, FORECAST_TTL)
         temp = cw.get("temperature")
         wind = cw.get("windspeed")
         code = cw.get("weathercode")
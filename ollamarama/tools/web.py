@@ -1,26 +1,227 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import codecs
+import logging
+import os
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 import requests
+from requests.utils import get_encoding_from_headers
 
+from ..cache import HttpCache
+from ..paths import cache_dir
+from ._http import get_session
 
-def fetch_url(url: str, max_bytes: int = 65536) -> Dict[str, Any]:
-    """Fetch text content from a URL, truncating to max_bytes."""
+_CHUNK_SIZE = 16384
+
+HTTP_CACHE_MB = 64
+_HTTP_CACHE: Optional[HttpCache] = None
+_HTTP_CACHE_LOCK = threading.Lock()
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "td", "th", "title", "tr", "ul",
+}
+
+
+class _HTMLText(HTMLParser):
+    """Incremental HTML to plain text: drops markup, scripts and styles."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skip = 0
+        self._title = False
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag == "title":
+            self._title = True
+        elif tag in _SKIP_TAGS:
+            self._skip += 1
+        if tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._title = False
+        elif tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        if tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        # The <title> lives in <head>, which is otherwise skipped
+        if not self._skip or self._title:
+            self._parts.append(data)
+
+    def text(self) -> str:
+        raw = "".join(self._parts)
+        lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in raw.split("\n"))
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _is_html(content_type: str) -> bool:
+    ct = content_type.lower()
+    return "text/html" in ct or "application/xhtml" in ct
+
+
+def _http_cache_mb() -> float:
+    value = os.environ.get("OLLAMARAMA_HTTP_CACHE_MB")
+    if not value:
+        return HTTP_CACHE_MB
     try:
-        resp = requests.get(url, timeout=20)
-        resp.raise_for_status()
-        text = resp.text
-        encoded = text.encode("utf-8")
-        truncated = False
-        if len(encoded) > max_bytes:
-            text = encoded[:max_bytes].decode("utf-8", errors="ignore")
+        return float(value)
+    except ValueError:
+        logging.warning(f"OLLAMARAMA_HTTP_CACHE_MB={value!r} is not a number; using {HTTP_CACHE_MB} MiB")
+        return HTTP_CACHE_MB
+
+
+def http_cache() -> HttpCache:
+    """Return the on-disk response cache used by fetch_url.
+
+    Its size is read from OLLAMARAMA_HTTP_CACHE_MB on first use.
+    """
+    global _HTTP_CACHE
+    with _HTTP_CACHE_LOCK:
+        if _HTTP_CACHE is None:
+            max_bytes = int(_http_cache_mb() * 1024 * 1024)
+            _HTTP_CACHE = HttpCache(cache_dir() / "http", max_bytes=max_bytes)
+        return _HTTP_CACHE
+
+
+class _TextReader:
+    """Decode a body as it arrives and, for HTML, reduce it to text chunk by chunk."""
+
+    def __init__(self, content_type: str, text_only: bool) -> None:
+        encoding = get_encoding_from_headers({"content-type": content_type}) or "utf-8"
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._html = _HTMLText() if text_only and _is_html(content_type) else None
+        self._parts: List[str] = []
+
+    def feed(self, data: bytes, *, final: bool = False) -> None:
+        text = self._decoder.decode(data, final=final)
+        if self._html is not None:
+            self._html.feed(text)
+        else:
+            self._parts.append(text)
+
+    def text(self, *, truncated: bool) -> str:
+        # A multi-byte character cut by the cap is dropped, not replaced
+        self.feed(b"", final=not truncated)
+        if self._html is not None:
+            self._html.close()
+            return self._html.text()
+        return "".join(self._parts)
+
+
+def _read_capped(resp: requests.Response, max_bytes: int, reader: _TextReader) -> Tuple[bytes, bool]:
+    """Read the body until max_bytes, feeding each chunk to ``reader``; returns (raw body, truncated)."""
+    chunks: List[bytes] = []
+    read = 0
+    truncated = False
+    for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+        if read + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - read]
             truncated = True
-        return {
-            "url": url,
-            "status": resp.status_code,
-            "content": text,
-            "truncated": truncated,
-        }
+        read += len(chunk)
+        reader.feed(chunk)
+        # Kept as raw bytes for the HTTP cache
+        chunks.append(chunk)
+        if truncated:
+            break
+    return b"".join(chunks), truncated
+
+
+def _result(
+    url: str,
+    status: int,
+    headers: Mapping[str, str],
+    content: str,
+    *,
+    bytes_read: int,
+    truncated: bool,
+    size: Optional[int],
+    cache: str,
+) -> Dict[str, Any]:
+    skipped: Optional[int] = 0
+    if truncated:
+        skipped = max(0, size - bytes_read) if size is not None else None
+    return {
+        "url": url,
+        "status": status,
+        "content_type": headers.get("content-type") or "",
+        "content": content,
+        "truncated": truncated,
+        "bytes_read": bytes_read,
+        "bytes_skipped": skipped,
+        "cache": cache,
+    }
+
+
+def _cached_result(url: str, entry: Dict[str, Any], *, max_bytes: int, text_only: bool, cache: str) -> Dict[str, Any]:
+    body = entry["body"]
+    truncated = not entry.get("complete") or len(body) > max_bytes
+    body = body[:max_bytes]
+    reader = _TextReader(entry["headers"].get("content-type") or "", text_only)
+    reader.feed(body)
+    return _result(
+        url, entry["status"], entry["headers"], reader.text(truncated=truncated),
+        bytes_read=len(body), truncated=truncated, size=entry.get("size"), cache=cache,
+    )
+
+
+def fetch_url(url: str, max_bytes: int = 65536, text_only: bool = True) -> Dict[str, Any]:
+    """Fetch text content from a URL, reading at most max_bytes.
+
+    The body is streamed and decoded incrementally, and reading stops at
+    the byte cap instead of downloading the whole response. HTML is reduced
+    to plain text chunk by chunk as it is read when ``text_only`` is set.
+    Responses are kept in an on-disk HTTP cache that honours Cache-Control
+    and revalidates stale entries with If-None-Match / If-Modified-Since.
+    """
+    try:
+        max_bytes = max(0, int(max_bytes))
+        cache = http_cache()
+        entry = cache.lookup(url)
+        # A body cached under a smaller cap can't serve a bigger request
+        if entry is not None and not (entry.get("complete") or len(entry["body"]) >= max_bytes):
+            entry = None
+        if entry is not None and cache.is_fresh(entry):
+            cache.hit(url)
+            return _cached_result(url, entry, max_bytes=max_bytes, text_only=text_only, cache="hit")
+
+        request_headers = cache.validators(entry) if entry is not None else {}
+        with get_session().get(url, headers=request_headers, timeout=20, stream=True) as resp:
+            if entry is not None and resp.status_code == 304:
+                cache.refresh(url, entry, resp.headers)
+                cache.hit(url, revalidated=True)
+                return _cached_result(url, entry, max_bytes=max_bytes, text_only=text_only, cache="revalidated")
+            resp.raise_for_status()
+            cache.miss()
+            reader = _TextReader(resp.headers.get("content-type") or "", text_only)
+            body, truncated = _read_capped(resp, max_bytes, reader)
+
+            size: Optional[int] = None if truncated else len(body)
+            length = resp.headers.get("content-length")
+            # Content-Length counts encoded bytes; only comparable when uncompressed
+            if truncated and length and length.isdigit() and resp.headers.get("content-encoding", "identity") == "identity":
+                size = int(length)
+            if resp.status_code == 200:
+                cache.store(url, resp.status_code, resp.headers, body, complete=not truncated, size=size)
+            return _result(
+                url, resp.status_code, resp.headers, reader.text(truncated=truncated),
+                bytes_read=len(body), truncated=truncated, size=size, cache="miss",
+            )
     except requests.RequestException as e:
         return {"error": f"Request failed: {e}"}
+    except ValueError as e:
+        return {"error": f"Invalid arguments: {e}"}
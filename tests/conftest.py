@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+
+# Answers one request: (status, headers, body). The request's body is in ``request.body``.
+Route = Callable[["StubHandler"], Tuple[int, Dict[str, str], bytes]]
+
+
+class StubServer(ThreadingHTTPServer):
+    """A local HTTP server on a free port that counts requests by path."""
+
+    daemon_threads = True
+
+    def __init__(self, route: Route) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.route = route
+        self.requests: Counter = Counter()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+    body = b""
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _answer(self) -> None:
+        self.body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests[urlsplit(self.path).path] += 1
+        status, headers, body = self.server.route(self)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _answer
+
+
+@pytest.fixture
+def serve(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[[Route], StubServer]]:
+    """Start stub servers for a test: ``serve(route)`` returns a running one."""
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    servers: List[StubServer] = []
+
+    def start(route: Route) -> StubServer:
+        server = StubServer(route)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
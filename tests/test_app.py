@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from ollamarama.app import App
+from ollamarama.config import AppConfig, CompactionOptions, HistoryOptions, LogOptions, ModelOptions
+
+_MCP_TOOL: Dict[str, Any] = {
+    "type": "function",
+    "function": {"name": "lookup", "description": "Look up a key", "parameters": {"type": "object"}},
+}
+
+
+def _app(monkeypatch: pytest.MonkeyPatch, builtin: List[Dict[str, Any]]) -> App:
+    monkeypatch.setattr(App, "_load_tools_schema", lambda self, path=None: builtin)
+    config = AppConfig(
+        api_base="http://127.0.0.1:9",
+        models={"m": "m"},
+        default_model="m",
+        prompt=["you are ", "."],
+        personality="",
+        options=ModelOptions(),
+        compaction=CompactionOptions(enabled=False),
+        history=HistoryOptions(enabled=False),
+        log=LogOptions(path=""),
+    )
+    return App(interactive=False, config=config)
+
+
+def test_mcp_tools_enable_tool_calling_without_a_bundled_schema(monkeypatch: pytest.MonkeyPatch) -> None:
+    app = _app(monkeypatch, [])
+    assert not app.tools_enabled
+    app._set_tools_schema([_MCP_TOOL])
+    assert app.tools_enabled
+    assert app._tools_schema == [_MCP_TOOL]
+    app.shutdown()
+
+
+def test_tools_turned_off_stay_off(monkeypatch: pytest.MonkeyPatch) -> None:
+    app = _app(monkeypatch, [_MCP_TOOL])
+    assert app.tools_enabled
+    app.toggle_tools()
+    app._set_tools_schema([_MCP_TOOL])
+    assert not app.tools_enabled
+    app.shutdown()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from rich.console import Console
+
+import ollamarama.app
+from ollamarama.batch import BatchRunner, finished_ids, main, read_jobs
+
+
+class FakeApp:
+    """Answers a prompt with it upper-cased after ``delay`` seconds; "fail" raises."""
+
+    def __init__(self, *, interactive: bool = True) -> None:
+        self.console = Console(file=io.StringIO())
+        self.config = SimpleNamespace(
+            metrics=SimpleNamespace(port=None, file=""), http=SimpleNamespace(pool_size=64)
+        )
+        self.options: Dict[str, float] = {}
+        self.personality = ""
+        self.model = "fake"
+        self.prompts: List[str] = []
+        self._lock = threading.Lock()
+
+    def complete(self, messages: List[Dict[str, Any]], *, tools: Any = None) -> Tuple[str, Dict[str, int]]:
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+        time.sleep(float(prompt.split(":")[1]) if ":" in prompt else 0)
+        if prompt.startswith("fail"):
+            raise RuntimeError("model went away")
+        usage = {"rounds": 1, "tool_calls": 0, "prompt_eval_count": 3, "eval_count": len(prompt)}
+        return prompt.upper(), usage
+
+    def start_metrics(self) -> None:
+        pass
+
+    def load_mcp_servers(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _run(records: List[Any], *, ordered: bool) -> List[Dict[str, Any]]:
+    out = io.StringIO()
+    runner = BatchRunner(FakeApp(), out, concurrency=4, ordered=ordered)  # type: ignore[arg-type]
+    jobs = read_jobs(io.StringIO("\n".join(records)))
+    runner.run((index, job_id, record) for index, (job_id, record) in enumerate(jobs))
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+# Later prompts finish first
+_DELAYS = {"a": 0.15, "b": 0.1, "c": 0.05, "d": 0}
+_SLOW_FIRST = [json.dumps({"id": name, "prompt": f"{name}:{delay}"}) for name, delay in _DELAYS.items()]
+
+
+def test_results_are_written_in_input_order() -> None:
+    results = _run(_SLOW_FIRST, ordered=True)
+    assert [r["id"] for r in results] == ["a", "b", "c", "d"]
+    assert results[0]["response"] == "A:0.15"
+    assert (results[0]["model"], results[0]["prompt_tokens"]) == ("fake", 3)
+
+
+def test_as_completed_writes_results_as_they_finish() -> None:
+    results = _run(_SLOW_FIRST, ordered=False)
+    assert [r["id"] for r in results] == ["d", "c", "b", "a"]
+
+
+def test_bad_records_become_error_lines() -> None:
+    records = ["[1, 2]", "42", json.dumps({"id": "x"}), "plain text prompt", json.dumps("a JSON string"), "fail"]
+    results = _run(records, ordered=True)
+    assert [r["id"] for r in results] == [1, 2, "x", 4, 5, 6]
+    assert results[0]["error"] == "line 1: expected an object or a string"
+    assert results[1]["error"] == "line 2: expected an object or a string"
+    assert "prompt" in results[2]["error"]
+    assert results[3]["response"] == "PLAIN TEXT PROMPT"
+    assert results[4]["response"] == "A JSON STRING"
+    assert results[5]["error"] == "model went away"
+
+
+def test_resume_skips_answered_ids_and_a_cut_off_line(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = tmp_path / "in.jsonl"
+    source.write_text("\n".join(json.dumps({"id": name, "prompt": name}) for name in "abcd") + "\n")
+    output = tmp_path / "out.jsonl"
+    # a answered, b failed, c cut short by the interrupted run
+    output.write_text(
+        json.dumps({"id": "a", "response": "A"}) + "\n"
+        + json.dumps({"id": "b", "error": "timed out"}) + "\n"
+        + '{"id": "c", "resp'
+    )
+    assert finished_ids(str(output)) == {json.dumps("a")}
+
+    apps: List[FakeApp] = []
+
+    def create_app(**kwargs: Any) -> FakeApp:
+        apps.append(FakeApp(**kwargs))
+        return apps[-1]
+
+    monkeypatch.setattr(ollamarama.app, "App", create_app)
+    main([str(source), "-o", str(output), "--resume"])
+
+    assert sorted(apps[0].prompts) == ["b", "c", "d"]
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [(r["id"], r.get("response") or r.get("error")) for r in lines] == [
+        ("a", "A"),
+        ("b", "timed out"),
+        ("b", "B"),
+        ("c", "C"),
+        ("d", "D"),
+    ]
+    assert finished_ids(str(output)) == {json.dumps(name) for name in "abcd"}
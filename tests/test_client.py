@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import requests
+
+from ollamarama.client import OllamaClient
+from ollamarama.stats import GenerationStats
+
+
+_DONE = {
+    "model": "m",
+    "message": {"role": "assistant", "content": ""},
+    "done": True,
+    "load_duration": 2_000_000_000,
+    "prompt_eval_count": 10,
+    "prompt_eval_duration": 500_000_000,
+    "eval_count": 1,
+    "eval_duration": 10_000_000,
+}
+
+
+class Ollama:
+    """Answers every /api/chat with ``status``; 200 carries a done frame."""
+
+    def __init__(self, serve: Any, status: int) -> None:
+        self.status = status
+        self.server = serve(self)
+        self.url = self.server.url
+
+    @property
+    def requests(self) -> int:
+        return self.server.requests["/api/chat"]
+
+    def __call__(self, request: Any) -> Tuple[int, Dict[str, str], bytes]:
+        data = _DONE if self.status == 200 else {"error": "failed"}
+        return self.status, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+
+def _client(serve: Any, *statuses: int) -> Tuple[OllamaClient, List[Ollama]]:
+    hosts = [Ollama(serve, status) for status in statuses]
+    return OllamaClient([host.url for host in hosts], health_interval=0), hosts
+
+
+def test_last_backend_5xx_is_recorded(serve) -> None:
+    client, hosts = _client(serve, 500, 503)
+    with pytest.raises(requests.HTTPError):
+        client.chat(model="m", messages=[{"role": "user", "content": "hi"}], options={})
+    assert [host.requests for host in hosts] == [1, 1]
+    assert [backend.failures for backend in client.backends.backends] == [1, 1]
+    assert not any(backend.healthy for backend in client.backends.backends)
+    assert all(backend.in_flight == 0 for backend in client.backends.backends)
+    client.close()
+
+
+def test_last_backend_404_drops_the_model(serve) -> None:
+    client, hosts = _client(serve, 404, 404)
+    for backend in client.backends.backends:
+        backend.models.add("m:latest")
+    with pytest.raises(requests.HTTPError):
+        client.chat(model="m", messages=[], options={})
+    assert not any(backend.has_model("m") for backend in client.backends.backends)
+    assert [backend.failures for backend in client.backends.backends] == [0, 0]
+    client.close()
+
+
+def test_load_reports_stats_and_errors(serve) -> None:
+    client, hosts = _client(serve, 200)
+    reported: List[GenerationStats] = []
+    errors: List[str] = []
+    client.on_stats = reported.append
+    client.on_error = lambda model, error: errors.append(model)
+    data = client.load(model="m", messages=[{"role": "system", "content": "be brief"}])
+    assert data["load_duration"] == 2_000_000_000
+    assert [(stats.model, stats.load, stats.prompt_tokens) for stats in reported] == [("m", 2.0, 10)]
+    assert reported[0].backend == hosts[0].url
+
+    hosts[0].status = 500
+    with pytest.raises(requests.HTTPError):
+        client.load(model="m")
+    assert errors == ["m"]
+    assert len(reported) == 1
+    client.close()
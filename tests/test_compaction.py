@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import wait
+from typing import Any, Dict, List
+
+import pytest
+
+from ollamarama.compaction import SUMMARY_REQUEST, Compactor, transcript
+from ollamarama.context import ContextWindow
+
+
+class Summarizer:
+    """Summarizes once ``release`` is set; records what it was given."""
+
+    def __init__(self, summary: str = "They talked about turns 0 to 2.") -> None:
+        self.summary = summary
+        self.release = threading.Event()
+        self.calls: List[List[Dict[str, Any]]] = []
+
+    def __call__(self, messages: List[Dict[str, Any]]) -> str:
+        self.calls.append(messages)
+        self.release.wait(5)
+        if not self.summary:
+            raise RuntimeError("model went away")
+        return self.summary
+
+
+def _window(turns: int = 5, max_tokens: int = 1000) -> ContextWindow:
+    window = ContextWindow(max_tokens, [{"role": "system", "content": "be brief"}])
+    for i in range(turns):
+        window.append({"role": "user", "content": f"question {i} " + "x" * 300})
+        window.append({"role": "assistant", "content": f"answer {i} " + "y" * 300})
+    return window
+
+
+def _finish(compactor: Compactor, summarizer: Summarizer) -> None:
+    """Let the summary finish and wait for it."""
+    summarizer.release.set()
+    assert compactor._job is not None
+    wait([compactor._job[3]], timeout=5)
+
+
+@pytest.fixture
+def summarizer() -> Summarizer:
+    return Summarizer()
+
+
+@pytest.fixture
+def compactor(summarizer: Summarizer) -> Any:
+    compactor = Compactor(summarizer, threshold=0.5, keep_turns=2)
+    yield compactor
+    summarizer.release.set()
+    compactor.shutdown()
+
+
+def test_nothing_starts_below_the_threshold(compactor: Compactor, summarizer: Summarizer) -> None:
+    assert not compactor.maybe_start(_window(turns=2))
+    assert not compactor.pending
+    assert summarizer.calls == []
+
+
+def test_kept_turns_are_never_summarized(compactor: Compactor) -> None:
+    # Over the threshold, but there are only the turns to keep
+    assert not compactor.maybe_start(_window(turns=2, max_tokens=200))
+
+
+def test_old_turns_are_summarized_and_swapped_in(compactor: Compactor, summarizer: Summarizer) -> None:
+    window = _window()
+    kept = list(window[7:])
+    assert compactor.maybe_start(window)
+    assert compactor.pending
+    # One summary at a time
+    assert not compactor.maybe_start(window)
+    assert compactor.apply(window) == 0
+
+    _finish(compactor, summarizer)
+    assert summarizer.calls == [list(_window()[1:7])]
+    before = window.total
+    assert compactor.apply(window) == 6
+    assert not compactor.pending
+    assert window[0]["role"] == "system"
+    assert window[1:3] == [
+        {"role": "user", "content": SUMMARY_REQUEST},
+        {"role": "assistant", "content": summarizer.summary},
+    ]
+    assert list(window[3:]) == kept
+    assert window.total < before
+    assert window.total == sum(window.tokens_of(i) for i in range(len(window)))
+
+
+def test_summary_of_turns_no_longer_there_is_discarded(compactor: Compactor, summarizer: Summarizer) -> None:
+    window = _window()
+    compactor.maybe_start(window)
+    # An equal but different message: the turns were replaced meanwhile
+    window[3] = dict(window[3])
+    _finish(compactor, summarizer)
+    snapshot = list(window)
+    assert compactor.apply(window) == 0
+    assert not compactor.pending
+    assert list(window) == snapshot
+
+
+def test_reset_history_discards_the_summary(compactor: Compactor, summarizer: Summarizer) -> None:
+    window = _window()
+    compactor.maybe_start(window)
+    window.clear()
+    window.extend(_window(turns=1))
+    _finish(compactor, summarizer)
+    assert compactor.apply(window) == 0
+    assert len(window) == 3
+
+
+def test_cancel_forgets_the_summary(compactor: Compactor, summarizer: Summarizer) -> None:
+    window = _window()
+    compactor.maybe_start(window)
+    compactor.cancel()
+    assert not compactor.pending
+    summarizer.release.set()
+    assert compactor.apply(window) == 0
+    assert len(window) == 11
+    # A new one can start right away
+    assert compactor.maybe_start(window)
+
+
+def test_failed_summary_leaves_the_history(summarizer: Summarizer) -> None:
+    summarizer.summary = ""
+    compactor = Compactor(summarizer, threshold=0.5, keep_turns=2)
+    window = _window()
+    compactor.maybe_start(window)
+    _finish(compactor, summarizer)
+    assert compactor.apply(window) == 0
+    assert len(window) == 11
+    compactor.shutdown()
+
+
+def test_shutdown_cancels_a_queued_summary(summarizer: Summarizer) -> None:
+    compactor = Compactor(summarizer, threshold=0.5, keep_turns=2)
+    compactor.maybe_start(_window())
+    assert compactor._job is not None
+    future = compactor._job[3]
+    compactor.shutdown()
+    summarizer.release.set()
+    # Either it had started (and finishes) or it never runs
+    assert future.cancelled() or future.result(5) == summarizer.summary
+    assert not compactor.pending
+
+
+def test_transcript_skips_empty_messages() -> None:
+    messages = [
+        {"role": "user", "content": " hi "},
+        {"role": "assistant", "content": ""},
+        {"role": "assistant", "content": "hello"},
+    ]
+    assert transcript(messages) == "User: hi\n\nAssistant: hello"
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from ollamarama.context import ContextWindow
+
+
+def _turns(count: int, size: int = 400):
+    for i in range(count):
+        yield {"role": "user", "content": f"q{i} " + "x" * size}
+        yield {"role": "assistant", "content": f"a{i} " + "y" * size}
+
+
+def test_trim_keeps_system_and_latest_turn() -> None:
+    window = ContextWindow(300, [{"role": "system", "content": "sys"}, *_turns(5)])
+    dropped = window.trim()
+    assert dropped == 8
+    assert [m["role"] for m in window] == ["system", "user", "assistant"]
+    assert window[1]["content"].startswith("q4")
+    assert window.total == sum(window.tokens_of(i) for i in range(len(window)))
+
+
+def test_trim_reserves_overhead() -> None:
+    window = ContextWindow(1000, _turns(4))
+    assert window.total <= 1000
+    assert window.trim() == 0
+    # Tool definitions of 400 tokens leave room for fewer turns
+    assert window.trim(400) == 4
+    assert window.total + 400 <= 1000
+    assert window[0]["content"].startswith("q2")
+
+
+def test_pop_keeps_counts_in_step() -> None:
+    window = ContextWindow(4096, _turns(2))
+    window.append({"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "f"}}]})
+    window.append({"role": "tool", "content": "result"})
+    window.append({"role": "assistant", "content": "done"})
+    window.pop(4)
+    window.pop(4)
+    assert [m["role"] for m in window][-2:] == ["assistant", "assistant"]
+    assert window.total == sum(window.tokens_of(i) for i in range(len(window)))
+    window.append({"role": "user", "content": "next"})
+    assert window.trim(window.max_tokens) == 5
+    assert [m["content"] for m in window] == ["next"]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+
+from ollamarama.metrics import Metrics
+from ollamarama.server import ChatServer, SessionManager
+
+
+class FakeApp:
+    """What ChatServer uses of App. Replies echo the prompt word by word; "fail" raises.
+
+    A prompt of "wait" blocks until ``release`` is set, to hold a session busy.
+    """
+
+    def __init__(self, max_tokens: int = 4096) -> None:
+        self.config = SimpleNamespace(context=SimpleNamespace(max_tokens=max_tokens))
+        self.metrics = Metrics()
+        self.model = "fake"
+        self.models = {"fake": "fake"}
+        self.options: Dict[str, Any] = {}
+        self.tools_enabled = False
+        self._tools_schema: List[Dict[str, Any]] = []
+        self.personality = ""
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.requests: List[List[Dict[str, Any]]] = []
+
+    def _persona_prompt(self, personality: str) -> str:
+        return f"you are {personality}."
+
+    def _shorten_model_name(self, name: str) -> str:
+        return name
+
+    def complete(self, messages: List[Dict[str, Any]], *, on_event: Any = None, **settings: Any) -> Tuple[str, Any]:
+        self.requests.append(list(messages))
+        prompt = messages[-1]["content"]
+        if prompt == "wait":
+            self.started.set()
+            self.release.wait(5)
+        words = [f"{word} " for word in prompt.split()]
+        for word in words[:2]:
+            if on_event is not None:
+                on_event({"type": "delta", "content": word})
+        if prompt.startswith("fail"):
+            raise RuntimeError("model went away")
+        usage = {"rounds": 1, "tool_calls": 0, "prompt_eval_count": 1, "eval_count": len(words)}
+        return "".join(words), usage
+
+
+@pytest.fixture
+def app() -> FakeApp:
+    return FakeApp()
+
+
+@pytest.fixture
+def server(app: FakeApp) -> Iterator[ChatServer]:
+    srv = ChatServer(("127.0.0.1", 0), app, concurrency=2)  # type: ignore[arg-type]
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield srv
+    app.release.set()
+    srv.shutdown()
+    srv.server_close()
+
+
+def _request(server: ChatServer, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None)
+        response = conn.getresponse()
+        data = response.read()
+    finally:
+        conn.close()
+    return response.status, json.loads(data) if data else None
+
+
+def _session(server: ChatServer, **settings: Any) -> str:
+    status, session = _request(server, "POST", "/sessions", settings)
+    assert status == 201
+    return session["id"]
+
+
+# ---- SessionManager ----
+def _manager(**kwargs: Any) -> SessionManager:
+    return SessionManager(max_tokens=1000, **kwargs)
+
+
+def _create(manager: SessionManager) -> str:
+    return manager.create(system=None, model="m", options={}, tools=False).id
+
+
+def test_idle_sessions_expire() -> None:
+    manager = _manager(ttl=60)
+    old, recent = _create(manager), _create(manager)
+    manager._sessions[old].last_used -= 61
+    newest = _create(manager)
+    assert manager.get(old) is None
+    assert [s["id"] for s in manager.list()] == [newest, recent]
+
+
+def test_least_recently_used_session_goes_first() -> None:
+    manager = _manager(max_sessions=2)
+    first, second = _create(manager), _create(manager)
+    manager.get(first)
+    third = _create(manager)
+    assert len(manager) == 2
+    assert manager.get(second) is None
+    assert [s["id"] for s in manager.list()] == [third, first]
+
+
+# ---- HTTP ----
+def test_session_keeps_history(server: ChatServer, app: FakeApp) -> None:
+    session_id = _session(server, persona="a pirate", stream=False)
+    body = {"message": "ahoy there", "stream": False}
+    status, result = _request(server, "POST", f"/sessions/{session_id}/chat", body)
+    assert status == 200
+    assert (result["session"], result["response"]) == (session_id, "ahoy there ")
+    _request(server, "POST", f"/sessions/{session_id}/chat", {"message": "again", "stream": False})
+    assert [m["role"] for m in app.requests[-1]] == ["system", "user", "assistant", "user"]
+    assert app.requests[-1][0]["content"] == "you are a pirate."
+
+
+def test_busy_session_answers_409(server: ChatServer, app: FakeApp) -> None:
+    session_id = _session(server)
+    first = threading.Thread(
+        target=_request, args=(server, "POST", f"/sessions/{session_id}/chat", {"message": "wait", "stream": False})
+    )
+    first.start()
+    assert app.started.wait(5)
+    status, error = _request(server, "POST", f"/sessions/{session_id}/chat", {"message": "hello"})
+    assert status == 409
+    assert "another message" in error["error"]
+    # Other sessions are not held up
+    other = _session(server)
+    assert _request(server, "POST", f"/sessions/{other}/chat", {"message": "hi", "stream": False})[0] == 200
+    app.release.set()
+    first.join(5)
+    status, _ = _request(server, "POST", f"/sessions/{session_id}/chat", {"message": "hello", "stream": False})
+    assert status == 200
+
+
+def test_failed_turn_leaves_history_unchanged(server: ChatServer) -> None:
+    session_id = _session(server, system="be brief")
+    _request(server, "POST", f"/sessions/{session_id}/chat", {"message": "one", "stream": False})
+    before = _request(server, "GET", f"/sessions/{session_id}")[1]["messages"]
+    status, error = _request(server, "POST", f"/sessions/{session_id}/chat", {"message": "fail now", "stream": False})
+    assert (status, error) == (502, {"error": "model went away"})
+    assert _request(server, "GET", f"/sessions/{session_id}")[1]["messages"] == before
+
+
+def test_failed_turn_restores_trimmed_history(app: FakeApp, server: ChatServer) -> None:
+    session_id = _session(server)
+    session = server.sessions.get(session_id)
+    assert session is not None
+    session.messages.max_tokens = 40
+    for word in ("one", "two"):
+        _request(server, "POST", f"/sessions/{session_id}/chat", {"message": word * 20, "stream": False})
+    before = list(session.messages)
+    assert len(before) == 2
+    # Making room for this message drops the previous turn; the failure brings it back
+    _request(server, "POST", f"/sessions/{session_id}/chat", {"message": "fail " + "x" * 60, "stream": False})
+    assert len(app.requests[-1]) == 1
+    assert list(session.messages) == before
+    assert session.messages.total == sum(session.messages.tokens_of(i) for i in range(len(before)))
+
+
+def _raw_stream(server: ChatServer, path: str, body: Dict[str, Any]) -> Tuple[bytes, bytes]:
+    """POST and return the raw response head and body, chunk framing included."""
+    data = json.dumps(body).encode()
+    with socket.create_connection(server.server_address[:2], timeout=10) as sock:
+        sock.sendall(
+            f"POST {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        raw = b""
+        while True:
+            part = sock.recv(65536)
+            if not part:
+                break
+            raw += part
+    head, _, rest = raw.partition(b"\r\n\r\n")
+    return head, rest
+
+
+def _chunks(body: bytes) -> List[bytes]:
+    chunks = []
+    while True:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            assert body == b"\r\n"
+            return chunks
+        chunks.append(body[:size])
+        assert body[size : size + 2] == b"\r\n"
+        body = body[size + 2 :]
+
+
+def test_stream_is_one_json_line_per_chunk(server: ChatServer) -> None:
+    head, body = _raw_stream(server, "/chat", {"prompt": "hello streaming world"})
+    assert head.startswith(b"HTTP/1.1 200")
+    assert b"Transfer-Encoding: chunked" in head
+    assert b"Content-Type: application/x-ndjson" in head
+    chunks = _chunks(body)
+    assert all(chunk.endswith(b"\n") and chunk.count(b"\n") == 1 for chunk in chunks)
+    events = [json.loads(chunk) for chunk in chunks]
+    assert [event["type"] for event in events] == ["delta", "delta", "done"]
+    assert "".join(event["content"] for event in events[:2]) == "hello streaming "
+    assert events[-1]["response"] == "hello streaming world "
+    assert events[-1]["usage"]["eval_count"] == 3
+
+
+def test_stream_ends_with_an_error_event(server: ChatServer) -> None:
+    _, body = _raw_stream(server, "/chat", {"prompt": "fail here"})
+    events = [json.loads(chunk) for chunk in _chunks(body)]
+    assert events[-1] == {"type": "error", "error": "model went away"}
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import Any, List
+
+import pytest
+
+from ollamarama import store as store_module
+from ollamarama.store import MATCH_END, MATCH_START, SessionStore
+
+_MESSAGES = [
+    {"role": "user", "content": "How do I use C++ templates?"},
+    {"role": "assistant", "content": "Templates AND concepts in C++20 work like this"},
+    {"role": "user", "content": 'He said "hi", 100% of it_was true'},
+    {"role": "assistant", "content": "Use * for pointers"},
+]
+# Fails the way creating the index does on an SQLite built without FTS5
+_NO_FTS5 = "CREATE VIRTUAL TABLE messages_fts USING no_such_module(content);"
+
+
+@pytest.fixture(params=["fts5", "scan"])
+def store(request: Any, tmp_path, monkeypatch: pytest.MonkeyPatch) -> Any:
+    if request.param == "scan":
+        monkeypatch.setattr(store_module, "_FTS_SCHEMA", _NO_FTS5)
+    sessions = SessionStore(tmp_path / "sessions.db")
+    assert sessions.fts == (request.param == "fts5")
+    yield sessions
+    sessions.close()
+
+
+def _fill(store: SessionStore) -> int:
+    session_id = store.create_session("m", "  A question\nabout   C++ ")
+    for message in _MESSAGES:
+        store.append(session_id, message)
+    return session_id
+
+
+def _seqs(hits: List[Any]) -> List[int]:
+    return sorted(hit["seq"] for hit in hits)
+
+
+def test_messages_load_in_order(store: SessionStore) -> None:
+    session_id = _fill(store)
+    assert store.load_messages(session_id) == _MESSAGES
+    session = store.get_session(session_id)
+    assert session is not None
+    assert session["title"] == "A question about C++"
+    assert session["message_count"] == 4
+    assert store.latest_session() == session_id
+
+
+def test_sessions_without_messages_are_not_listed(store: SessionStore) -> None:
+    store.create_session("m")
+    session_id = _fill(store)
+    assert [session["id"] for session in store.list_sessions()] == [session_id]
+
+
+def test_close_writes_queued_messages(tmp_path) -> None:
+    path = tmp_path / "sessions.db"
+    store = SessionStore(path)
+    session_id = store.create_session("m")
+    futures = [store.append(session_id, {"role": "user", "content": f"message {i}"}) for i in range(200)]
+    store.close()
+    assert all(future.done() for future in futures)
+    with pytest.raises(RuntimeError):
+        store.append(session_id, {"role": "user", "content": "too late"}).result()
+
+    reopened = SessionStore(path)
+    try:
+        messages = reopened.load_messages(session_id)
+    finally:
+        reopened.close()
+    assert [m["content"] for m in messages] == [f"message {i}" for i in range(200)]
+
+
+def test_failed_write_leaves_the_rest_of_its_batch(store: SessionStore) -> None:
+    session_id = store.create_session("m")
+    first = store.append(session_id, {"role": "user", "content": "one"})
+    missing = store.append(12345, {"role": "user", "content": "lost"})
+    last = store.append(session_id, {"role": "assistant", "content": "two"})
+    with pytest.raises(KeyError):
+        missing.result()
+    assert (first.result(), last.result()) != (None, None)
+    assert [m["content"] for m in store.load_messages(session_id)] == ["one", "two"]
+
+
+@pytest.mark.parametrize(
+    "query, seqs",
+    [
+        ("C++", [1, 2]),
+        ("c++ templates", [1, 2]),
+        ("templ*", [1, 2]),
+        ("AND", [2]),
+        ("concepts AND", [2]),
+        ('"hi"', [3]),
+        ("*", []),
+        ("NEAR(", []),
+        ("", []),
+    ],
+)
+def test_search_takes_words_literally(store: SessionStore, query: str, seqs: List[int]) -> None:
+    _fill(store)
+    assert _seqs(store.search(query)) == seqs
+
+
+def test_lone_quote_is_not_fts_syntax(store: SessionStore) -> None:
+    _fill(store)
+    # FTS5 ignores punctuation; the fallback matches it as a substring
+    assert _seqs(store.search('"')) == ([] if store.fts else [3])
+
+
+def test_search_hits_carry_session_and_snippet(store: SessionStore) -> None:
+    session_id = _fill(store)
+    hits = store.search("concepts")
+    assert len(hits) == 1
+    hit = hits[0]
+    assert (hit["session_id"], hit["seq"], hit["role"]) == (session_id, 2, "assistant")
+    assert hit["title"] == "A question about C++"
+    assert f"{MATCH_START}concepts{MATCH_END}" in hit["snippet"]
+
+
+def test_scan_escapes_like_wildcards(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(store_module, "_FTS_SCHEMA", _NO_FTS5)
+    store = SessionStore(tmp_path / "sessions.db")
+    try:
+        _fill(store)
+        assert _seqs(store.search("100%")) == [3]
+        assert _seqs(store.search("it_was")) == [3]
+        assert store.search("10_%") == []
+    finally:
+        store.close()
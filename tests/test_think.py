@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from ollamarama.think import ThinkFilter, strip_think
+
+
+def run(chunks: List[str]) -> ThinkFilter:
+    f = ThinkFilter()
+    shown = "".join(f.feed(chunk) for chunk in chunks) + f.finish()
+    assert shown == f.text
+    return f
+
+
+def splits(text: str):
+    # Every way of cutting the text in two, plus one character per chunk
+    for i in range(len(text) + 1):
+        yield [text[:i], text[i:]]
+    yield list(text)
+
+
+@pytest.mark.parametrize("chunks", list(splits("<think>plan it</think>\n\nHello **world**")))
+def test_hides_think_block_split_anywhere(chunks: List[str]) -> None:
+    f = run(chunks)
+    assert not f.hidden
+    assert f.text == "Hello **world**"
+
+
+@pytest.mark.parametrize("text", ["<THINK>x</Think> ok", "  \n<think>x</THINK>ok", "<Think>a</think>\tok"])
+def test_tags_are_case_insensitive(text: str) -> None:
+    assert strip_think(text) == text.rsplit(">", 1)[1].lstrip()
+
+
+@pytest.mark.parametrize("chunks", list(splits("<think>never closed </thin")))
+def test_unclosed_block_stays_hidden(chunks: List[str]) -> None:
+    f = run(chunks)
+    assert f.hidden
+    assert f.text == ""
+    assert strip_think("".join(chunks)) == ""
+
+
+@pytest.mark.parametrize("text", ["Plain answer", "Not <think>a block</think> here", "  <thinking> aloud", "<", ""])
+def test_text_without_leading_block_passes_through(text: str) -> None:
+    f = run(list(text) or [""])
+    assert f.text == text
+    assert strip_think(text) == text
+
+
+@pytest.mark.parametrize("chunks", list(splits("<think>İİ straße ΣΑΣ</think>İok ü")))
+def test_non_ascii_text_keeps_its_place(chunks: List[str]) -> None:
+    # "İ".lower() is two characters; indexes must not drift
+    f = run(chunks)
+    assert f.text == "İok ü"
+
+
+def test_partial_close_tag_across_chunks_that_is_not_a_tag() -> None:
+    f = run(["<think>a </thi", "nk no", "pe </th", "INK>done"])
+    assert f.text == "done"
+
+
+def test_whitespace_after_block_is_dropped_across_chunks() -> None:
+    f = run(["<think>x</think>", "\n", " \n", "answer"])
+    assert f.text == "answer"
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List
+
+from ollamarama.toolrunner import ToolRunner
+
+
+class Recorder:
+    """A tool executor that notes which calls were running together."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.running: List[str] = []
+        self.overlaps: List[List[str]] = []
+
+    def __call__(self, name: str, arguments: Dict[str, Any]) -> str:
+        label = f"{name}:{arguments.get('n')}"
+        with self._lock:
+            self.running.append(label)
+            self.overlaps.append(list(self.running))
+        time.sleep(0.02)
+        with self._lock:
+            self.running.remove(label)
+        return label
+
+
+def test_results_follow_call_order() -> None:
+    runner = ToolRunner(Recorder(), max_workers=4, serial=["write"])
+    calls = [("read", {"n": i}) for i in range(3)] + [("write", {"n": 3}), ("read", {"n": 4})]
+    assert runner.run(calls) == ["read:0", "read:1", "read:2", "write:3", "read:4"]
+    runner.shutdown()
+
+
+def test_serial_calls_run_alone_across_turns() -> None:
+    recorder = Recorder()
+    runner = ToolRunner(recorder, max_workers=4, serial=["write"])
+    turns = [
+        [("read", {"n": f"{turn}.{i}"}) for i in range(4)] + [("write", {"n": f"{turn}.w"})]
+        for turn in range(4)
+    ]
+    threads = [threading.Thread(target=runner.run, args=(calls,)) for calls in turns]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    runner.shutdown()
+    assert len(recorder.overlaps) == 20
+    for running in recorder.overlaps:
+        if any(label.startswith("write") for label in running):
+            assert len(running) == 1, running
+    # Ordinary calls of different turns may still overlap
+    assert max(len(running) for running in recorder.overlaps) > 1
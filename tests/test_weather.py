@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Dict, Iterator, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+
+from ollamarama.tools import weather
+
+
+def open_meteo(request: Any) -> Tuple[int, Dict[str, str], bytes]:
+    """The geocoding and forecast endpoints."""
+    if urlsplit(request.path).path == "/geocode":
+        data = {"results": [{"name": "Oslo", "country": "Norway", "latitude": 59.91, "longitude": 10.75}]}
+    else:
+        data = {"current_weather": {"temperature": 4.2, "windspeed": 11.0, "weathercode": 3}}
+    return 200, {"Content-Type": "application/json"}, json.dumps(data).encode("utf-8")
+
+
+@pytest.fixture
+def stub(serve, tmp_path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Any]:
+    server = serve(open_meteo)
+    monkeypatch.setenv("OLLAMARAMA_GEOCODING_URL", server.url + "/geocode")
+    monkeypatch.setenv("OLLAMARAMA_FORECAST_URL", server.url + "/forecast")
+    monkeypatch.setenv("OLLAMARAMA_CACHE_DIR", str(tmp_path))
+    # Start from empty caches
+    monkeypatch.setattr(weather, "_GEOCODES", None)
+    weather._FORECASTS.clear()
+    yield server
+    weather._FORECASTS.clear()
+
+
+def test_repeat_city_reuses_geocode_and_forecast(stub: Any) -> None:
+    first = weather.get_weather("Oslo")
+    assert first["location"] == "Oslo, Norway"
+    assert first["temperature"] == 4.2
+    assert stub.requests == {"/geocode": 1, "/forecast": 1}
+
+    # Same city, spelled differently: no geocoding and, within the TTL, no forecast request
+    assert weather.get_weather("  oslo ") == first
+    assert stub.requests == {"/geocode": 1, "/forecast": 1}
+
+
+def test_geocodes_survive_a_restart(stub: Any, tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    weather.get_weather("Oslo")
+    assert (tmp_path / "geocode.json").exists()
+    # A new process: nothing in memory, coordinates read back from disk
+    monkeypatch.setattr(weather, "_GEOCODES", None)
+    weather._FORECASTS.clear()
+    weather.get_weather("Oslo")
+    assert stub.requests == {"/geocode": 1, "/forecast": 2}
+
+
+def test_forecast_is_fetched_again_after_ttl(stub: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(weather, "FORECAST_TTL", 0.05)
+    weather.get_weather("Oslo")
+    time.sleep(0.1)
+    weather.get_weather("Oslo")
+    assert stub.requests == {"/geocode": 1, "/forecast": 2}
+
+
+def test_units_are_cached_separately(stub: Any) -> None:
+    weather.get_weather("Oslo")
+    weather.get_weather("Oslo", units="imperial")
+    assert stub.requests == {"/geocode": 1, "/forecast": 2}
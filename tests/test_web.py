@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from ollamarama.tools import web
+
+# "é" is two bytes in UTF-8; repeated so chunk and cap boundaries land inside characters
+_HTML = (
+    "<html><head><title>Café</title><style>p {color: red}</style></head><body>"
+    + "<p>" + "é" * 20000 + "</p><script>var x = '<p>';</script><p>Fin</p></body></html>"
+).encode("utf-8")
+
+
+class Pages:
+    """The site under test; ``version`` changes what the plain pages say."""
+
+    def __init__(self, serve: Any) -> None:
+        self.version = 1
+        self.server = serve(self)
+        self.url = self.server.url
+        self.requests = self.server.requests
+
+    def __call__(self, request: Any) -> Tuple[int, Dict[str, str], bytes]:
+        text = f"version {self.version}".encode()
+        if request.path == "/html":
+            return 200, {"Content-Type": "text/html; charset=utf-8", "Cache-Control": "max-age=60"}, _HTML
+        if request.path == "/etag":
+            headers = {"Content-Type": "text/plain", "Cache-Control": "no-cache", "ETag": '"v1"'}
+            if request.headers.get("If-None-Match") == headers["ETag"]:
+                return 304, headers, b""
+            return 200, headers, text
+        control = {"/no-store": "no-store", "/max-age-0": "max-age=0"}[request.path]
+        return 200, {"Content-Type": "text/plain", "Cache-Control": control}, text
+
+
+@pytest.fixture
+def server(serve, tmp_path, monkeypatch: pytest.MonkeyPatch) -> Pages:
+    monkeypatch.setenv("OLLAMARAMA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(web, "_HTTP_CACHE", None)
+    return Pages(serve)
+
+
+def test_html_is_decoded_and_reduced_to_text(server: Pages) -> None:
+    result = web.fetch_url(server.url + "/html", max_bytes=len(_HTML))
+    assert not result["truncated"]
+    assert result["content"] == "Café\n\n" + "é" * 20000 + "\n\nFin"
+    assert result["bytes_read"] == len(_HTML)
+
+
+def test_cap_inside_a_character_drops_it(server: Pages) -> None:
+    # Stop one byte into an "é"
+    cap = _HTML.index("é".encode() * 2) + 3
+    result = web.fetch_url(server.url + "/html", max_bytes=cap)
+    assert result["truncated"]
+    assert result["bytes_read"] == cap
+    assert result["bytes_skipped"] == len(_HTML) - cap
+    assert result["content"] == "Café\n\né"
+    assert "�" not in result["content"]
+
+
+def test_cached_page_gives_the_same_text(server: Pages) -> None:
+    first = web.fetch_url(server.url + "/html", max_bytes=len(_HTML))
+    second = web.fetch_url(server.url + "/html", max_bytes=len(_HTML))
+    assert server.requests["/html"] == 1
+    assert (first["cache"], second["cache"]) == ("miss", "hit")
+    assert second["content"] == first["content"]
+    raw = web.fetch_url(server.url + "/html", max_bytes=len(_HTML), text_only=False)
+    assert raw["content"] == _HTML.decode("utf-8")
+
+
+@pytest.mark.parametrize("path", ["/no-store", "/max-age-0"])
+def test_uncacheable_pages_are_fetched_again(server: Pages, path: str) -> None:
+    assert web.fetch_url(server.url + path)["content"] == "version 1"
+    server.version = 2
+    assert web.fetch_url(server.url + path)["content"] == "version 2"
+    assert server.requests[path] == 2
+
+
+def test_no_cache_page_is_revalidated(server: Pages) -> None:
+    first = web.fetch_url(server.url + "/etag")
+    second = web.fetch_url(server.url + "/etag")
+    assert server.requests["/etag"] == 2
+    assert (first["cache"], second["cache"]) == ("miss", "revalidated")
+    assert second["content"] == "version 1"
+
+
+@pytest.mark.parametrize("value, mib", [("8", 8), ("0.5", 0.5), ("", 64), ("lots", 64)])
+def test_cache_size_is_read_on_first_use(
+    value: str, mib: float, tmp_path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setenv("OLLAMARAMA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("OLLAMARAMA_HTTP_CACHE_MB", value)
+    monkeypatch.setattr(web, "_HTTP_CACHE", None)
+    assert web.http_cache().max_bytes == int(mib * 1024 * 1024)
+    assert ("is not a number" in caplog.text) == (value == "lots")